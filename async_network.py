@@ -0,0 +1,143 @@
+"""
+Motor de Red asyncio para Paxos
+Grupo 7 - Sistemas Distribuidos UTPL
+
+Alternativa a `PaxosNetwork` basada en `asyncio.DatagramProtocol`. Un único
+hilo ejecuta el event loop, que recibe datagramas, ejecuta los handlers y
+los temporizadores. No hay sondeo con timeout: detener la red es inmediato.
+"""
+
+import asyncio
+import socket
+import threading
+from typing import Callable, Optional
+
+from config import SOCKET_BUFFER_SIZE, WIRE_CODEC, Message, log_message
+from network import BaseNetwork, TimerHandle
+
+
+class _PaxosProtocol(asyncio.DatagramProtocol):
+    """Protocolo UDP que entrega cada datagrama a la red Paxos."""
+
+    def __init__(self, network: "AsyncPaxosNetwork"):
+        self.network = network
+
+    def datagram_received(self, data: bytes, addr):
+        try:
+            self.network._process_datagram(data, self.network.sender_of(addr))
+        except Exception as e:
+            log_message("ERROR", f"Error recibiendo mensaje: {e}")
+
+    def error_received(self, exc: Exception):
+        log_message("ERROR", f"Error de socket: {exc}")
+
+
+class AsyncPaxosNetwork(BaseNetwork):
+    """
+    Motor de red Paxos sobre asyncio.
+
+    Tiene la misma interfaz que `PaxosNetwork`, por lo que `PaxosNode` puede
+    usar cualquiera de los dos. `send_to` y `call_later` pueden llamarse
+    desde cualquier hilo: si no se está en el hilo del loop, la operación
+    se delega con `call_soon_threadsafe`.
+    """
+
+    def __init__(self, local_ip: str, message_handler: Callable[[Message, str], None],
+                 codec: str = WIRE_CODEC, members: Optional[list[str]] = None):
+        """
+        Inicializa el motor asyncio.
+
+        Args:
+            local_ip: IP local del nodo (IP de ZeroTier)
+            message_handler: Función callback para procesar mensajes recibidos
+            codec: Códec preferido (CODEC_BINARY o CODEC_JSON)
+            members: IPs de todos los nodos del cluster
+        """
+        super().__init__(local_ip, message_handler, codec, members)
+
+        self.loop = asyncio.new_event_loop()
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.loop_thread: Optional[threading.Thread] = None
+
+        host, port = self.address
+        log_message("INFO", f"Red asyncio inicializada en {host}:{port}")
+
+    def start(self):
+        """Inicia el event loop en su hilo y abre el socket UDP."""
+        self.loop_thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.loop_thread.start()
+
+        future = asyncio.run_coroutine_threadsafe(self._open_endpoint(), self.loop)
+        self.transport = future.result()
+        self.running = True
+        log_message("SUCCESS", "Event loop de red iniciado")
+
+    async def _open_endpoint(self) -> asyncio.DatagramTransport:
+        """Crea el socket UDP (con la misma lógica de bind que PaxosNetwork)."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_SIZE)
+        except OSError:
+            pass
+        host, port = self.address
+        try:
+            # Intentar bind a la IP específica de ZeroTier
+            sock.bind((host, port))
+            log_message("INFO", f"Socket vinculado a {host}:{port}")
+        except OSError:
+            # Si falla, intentar bind a todas las interfaces
+            log_message("WARN", f"No se pudo vincular a {host}, usando 0.0.0.0")
+            sock.bind(('0.0.0.0', port))
+
+        transport, _ = await self.loop.create_datagram_endpoint(
+            lambda: _PaxosProtocol(self), sock=sock)
+        return transport
+
+    def stop(self):
+        """Detiene el event loop inmediatamente y cierra el socket."""
+        self.running = False
+        if self.loop.is_running():
+            self.loop.call_soon_threadsafe(self._shutdown)
+        if self.loop_thread:
+            self.loop_thread.join(timeout=2.0)
+        if not self.loop.is_running():
+            self.loop.close()
+        log_message("INFO", "Red detenida")
+
+    def _shutdown(self):
+        """Cierra el transporte y detiene el loop (en el hilo del loop)."""
+        if self.transport:
+            self.transport.close()
+        self.loop.stop()
+
+    def in_loop_thread(self) -> bool:
+        """Indica si el llamador está en el hilo del event loop."""
+        return self.loop_thread is not None and threading.get_ident() == self.loop_thread.ident
+
+    def _sendto(self, datagram: bytes, target_ip: str):
+        """Envía un datagrama (el transporte solo se usa desde el loop)."""
+        address = self.resolve(target_ip)
+        if self.in_loop_thread():
+            self.transport.sendto(datagram, address)
+        else:
+            self.loop.call_soon_threadsafe(self.transport.sendto, datagram, address)
+
+    def call_later(self, delay: float, callback: Callable[[], None]) -> TimerHandle:
+        """Programa un temporizador en el event loop."""
+        handle = TimerHandle(self.loop.time() + delay, callback)
+        if self.in_loop_thread():
+            self.loop.call_later(delay, self._fire, handle)
+        else:
+            self.loop.call_soon_threadsafe(self.loop.call_later, delay, self._fire, handle)
+        return handle
+
+    @staticmethod
+    def _fire(handle: TimerHandle):
+        """Ejecuta un temporizador si no fue cancelado."""
+        if handle.cancelled:
+            return
+        try:
+            handle.callback()
+        except Exception as e:
+            log_message("ERROR", f"Error en temporizador: {e}")
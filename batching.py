@@ -0,0 +1,133 @@
+"""
+Agrupación de Peticiones (Batching) para Paxos
+Grupo 7 - Sistemas Distribuidos UTPL
+
+Este módulo agrupa los valores enviados por los clientes durante una
+ventana corta de tiempo (o hasta un tamaño máximo) y los propone como un
+único valor. Así un solo ACCEPT y una sola espera de quórum deciden
+cientos de comandos.
+"""
+
+import json
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+
+from config import BATCH_MAX_DELAY_MS, BATCH_MAX_BYTES
+
+# Clave que identifica un valor agrupado dentro del log
+BATCH_KEY = "__batch__"
+
+
+def make_batch(values: list) -> dict:
+    """Empaqueta varios valores de cliente en un único valor Paxos."""
+    return {BATCH_KEY: values}
+
+
+def is_batch(value: Any) -> bool:
+    """Indica si un valor decidido es un lote de valores."""
+    return isinstance(value, dict) and BATCH_KEY in value
+
+
+def unpack_values(value: Any) -> list:
+    """Retorna la lista de valores de cliente contenidos en un valor decidido."""
+    if is_batch(value):
+        return list(value[BATCH_KEY])
+    if value is None:
+        return []  # no-op
+    return [value]
+
+
+def estimate_size(value: Any) -> int:
+    """Tamaño aproximado (bytes) que ocupará un valor en el mensaje."""
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    return len(json.dumps(value, default=str))
+
+
+class RequestBatcher:
+    """
+    Acumula valores de clientes y los propone en lotes.
+
+    Un lote se envía cuando pasan `max_delay_ms` desde el primer valor
+    acumulado o cuando su tamaño alcanza `max_bytes`, lo que ocurra antes.
+    Cada cliente recibe su propio Future, que se completa con el
+    resultado del lote.
+    """
+
+    def __init__(self, propose_async: Callable[..., Future],
+                 call_later: Callable[[float, Callable[[], None]], Any],
+                 max_delay_ms: float = BATCH_MAX_DELAY_MS,
+                 max_bytes: int = BATCH_MAX_BYTES):
+        """
+        Inicializa el agrupador.
+
+        Args:
+            propose_async: Función que propone un valor y retorna un Future
+            call_later: Función para programar el vencimiento del lote
+            max_delay_ms: Tiempo máximo que un valor espera en el lote
+            max_bytes: Tamaño máximo acumulado de un lote
+        """
+        self.propose_async = propose_async
+        self.call_later = call_later
+        self.max_delay = max_delay_ms / 1000.0
+        self.max_bytes = max_bytes
+
+        self.values: list = []
+        self.futures: list[Future] = []
+        self.size = 0
+        self.timer: Optional[Any] = None
+        self.lock = threading.Lock()
+
+    def submit(self, value: Any) -> Future:
+        """
+        Añade un valor al lote actual.
+
+        Args:
+            value: Valor del cliente
+
+        Returns:
+            Future que se completa con True si el lote fue decidido
+        """
+        future: Future = Future()
+        flush_now = False
+
+        with self.lock:
+            self.values.append(value)
+            self.futures.append(future)
+            self.size += estimate_size(value)
+
+            if self.size >= self.max_bytes:
+                flush_now = True
+            elif self.timer is None:
+                self.timer = self.call_later(self.max_delay, self.flush)
+
+        if flush_now:
+            self.flush()
+        return future
+
+    def flush(self):
+        """Propone el lote acumulado (si hay alguno)."""
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            values, futures = self.values, self.futures
+            self.values, self.futures, self.size = [], [], 0
+
+        if not values:
+            return
+
+        # Un único valor se propone tal cual, sin envoltorio de lote
+        value = values[0] if len(values) == 1 else make_batch(values)
+
+        def resolve(success: bool):
+            for future in futures:
+                future.set_result(success)
+
+        self.propose_async(value, resolve)
+
+    def pending(self) -> int:
+        """Cantidad de valores esperando en el lote actual."""
+        with self.lock:
+            return len(self.values)
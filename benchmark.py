@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+"""
+benchmark.py - Pruebas de rendimiento de Paxos con generador de carga
+Grupo 7 - Sistemas Distribuidos UTPL
+
+Envía valores a un cluster y mide el throughput y la latencia de
+compromiso (desde que el cliente envía un valor hasta que sabe que fue
+decidido), con percentiles p50/p95/p99/p99.9 y la duración de cada fase
+(Fase 1, Fase 2 y el reenvío al líder).
+
+Modos de carga:
+    closed: `--clients` clientes, cada uno con un valor en curso; al
+            terminar uno envía el siguiente (mide la capacidad)
+    open:   llegan `--rate` valores por segundo sin esperar respuestas
+            (mide la latencia a una carga dada). La latencia se cuenta
+            desde el instante previsto de llegada, así que un retraso del
+            generador no la oculta
+
+Clusters:
+    sim:    N nodos en este proceso sobre la red simulada (tiempo virtual,
+            resultados repetibles con la misma --seed)
+    local:  N-1 nodos en procesos aparte (run_cluster.py) y el nodo que
+            recibe la carga en este proceso, con sockets UDP en 127.0.0.1
+
+Los resultados se pueden guardar en JSON (--output) y comparar con los de
+otra versión (--compare).
+
+Ejemplos:
+    python benchmark.py --nodes 5 --mode closed --clients 32 --duration 10
+    python benchmark.py --target local --nodes 3 --mode open --rate 2000
+    python benchmark.py --nodes 7 --output nuevo.json --compare base.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+
+from config import Colors, configure_logging, flush_logs
+from histogram import LatencyHistogram
+from network import BaseNetwork
+from run_cluster import generate_members, launch_node, parse_option, stop_cluster, write_cluster_file
+
+PHASES = ("phase1", "phase2", "forward")
+DEFAULT_DURATION = 10.0
+DRAIN_TIMEOUT = 30.0  # Segundos de espera por los valores en curso al terminar
+
+
+class LoadGenerator:
+    """
+    Genera carga sobre uno o más nodos y mide la latencia de cada valor.
+
+    Usa el reloj y los temporizadores de la red de un nodo, así que
+    funciona igual en tiempo real (sockets) y en tiempo virtual (red
+    simulada). Los valores se reparten por turnos entre `entries`.
+    """
+
+    def __init__(self, entries: list[Callable[[Any], Future]], network: BaseNetwork,
+                 value_size: int = 16, warmup: float = 0.0, seed: int = 0):
+        """
+        Args:
+            entries: Funciones `submit` de los nodos que reciben la carga
+            network: Red cuyo reloj y temporizadores se usan
+            value_size: Tamaño de cada valor (caracteres)
+            warmup: Segundos iniciales que no se cuentan en los resultados
+            seed: Semilla de las llegadas aleatorias (modo open con Poisson)
+        """
+        self.entries = entries
+        self.network = network
+        self.value_size = value_size
+        self.warmup = warmup
+        self.rng = random.Random(seed)
+
+        self.latency = LatencyHistogram()
+        self.phases = {phase: LatencyHistogram() for phase in PHASES}
+        self.lock = threading.Lock()
+        self.issued = 0
+        self.outstanding = 0
+        self.committed = 0     # Decididos (después del warmup)
+        self.failed = 0        # Rechazados o con error (después del warmup)
+        self.open_loop = False
+        self.rate = 0.0
+        self.poisson = False
+        self.next_arrival = 0.0
+        self.started_at = 0.0
+        self.measure_from = 0.0
+        self.last_completion = 0.0
+        self.deadline: Optional[float] = None
+        self.limit: Optional[int] = None
+
+    def observe_phase(self, phase: str, seconds: float):
+        """Listener para `PaxosNode.phase_listeners`."""
+        if self.started_at and self.network.monotonic() >= self.measure_from:
+            self.phases[phase].record(seconds)
+
+    def _begin(self, duration: Optional[float], requests: Optional[int]):
+        self.started_at = self.network.monotonic()
+        self.measure_from = self.started_at + self.warmup
+        self.deadline = self.started_at + duration if duration else None
+        self.limit = requests
+
+    def _may_issue(self, at: float) -> bool:
+        """Indica si aún se envían valores en el instante `at` (con lock)."""
+        if self.deadline is not None and at >= self.deadline:
+            return False
+        return self.limit is None or self.issued < self.limit
+
+    def _reserve(self, at: float) -> Optional[int]:
+        """Reserva el siguiente valor a enviar; None si la carga terminó."""
+        with self.lock:
+            if not self._may_issue(at):
+                return None
+            index = self.issued
+            self.issued += 1
+            self.outstanding += 1
+            return index
+
+    def start_closed(self, clients: int, duration: Optional[float] = None,
+                     requests: Optional[int] = None):
+        """Carga de lazo cerrado: `clients` valores en curso a la vez."""
+        self._begin(duration, requests)
+        for _ in range(clients):
+            self.network.call_later(0.0, self._next_closed)
+
+    def _next_closed(self):
+        now = self.network.monotonic()
+        index = self._reserve(now)
+        if index is not None:
+            self._submit(index, now, closed=True)
+
+    def start_open(self, rate: float, duration: float, poisson: bool = False):
+        """Carga de lazo abierto: `rate` llegadas por segundo."""
+        self.open_loop = True
+        self.rate = rate
+        self.poisson = poisson
+        self._begin(duration, None)
+        self.next_arrival = self.started_at
+        self.network.call_later(0.0, self._tick)
+
+    def _tick(self):
+        now = self.network.monotonic()
+        # Enviar las llegadas vencidas, cada una con su instante previsto
+        while self.next_arrival <= now:
+            index = self._reserve(self.next_arrival)
+            if index is None:
+                return
+            self._submit(index, self.next_arrival, closed=False)
+            gap = self.rng.expovariate(self.rate) if self.poisson else 1.0 / self.rate
+            self.next_arrival += gap
+        self.network.call_later(self.next_arrival - now, self._tick)
+
+    def _submit(self, index: int, intended: float, closed: bool):
+        value = str(index).zfill(self.value_size)
+        entry = self.entries[index % len(self.entries)]
+        future = entry(value)
+        future.add_done_callback(lambda f: self._on_done(f, intended, closed))
+
+    def _on_done(self, future: Future, intended: float, closed: bool):
+        now = self.network.monotonic()
+        try:
+            success = bool(future.result())
+        except Exception:
+            success = False
+        with self.lock:
+            self.outstanding -= 1
+            if intended >= self.measure_from:
+                if success:
+                    self.committed += 1
+                    self.latency.record(now - intended)
+                    self.last_completion = max(self.last_completion, now)
+                else:
+                    self.failed += 1
+        if closed:
+            # Desde un temporizador, no desde el callback que resolvió el future
+            self.network.call_later(0.0, self._next_closed)
+
+    def finished(self) -> bool:
+        """Indica si ya no se enviarán valores y no queda ninguno en curso."""
+        if not self.started_at:
+            return False
+        at = self.next_arrival if self.open_loop else self.network.monotonic()
+        with self.lock:
+            return self.outstanding == 0 and not self._may_issue(at)
+
+    def results(self) -> dict:
+        """Throughput, latencia de compromiso y duración de cada fase."""
+        window = max(self.last_completion - self.measure_from, 1e-9)
+        return {
+            "issued": self.issued,
+            "committed": self.committed,
+            "failed": self.failed,
+            "unfinished": self.outstanding,
+            "measured_s": round(window, 3),
+            "throughput_per_s": round(self.committed / window, 1) if self.committed else 0.0,
+            "latency_ms": self.latency.summary(),
+            "latency_histogram_ms": [[round(upper * 1000, 3), n]
+                                     for upper, n in self.latency.buckets()],
+            "phases_ms": {phase: histogram.summary()
+                          for phase, histogram in self.phases.items() if histogram.count},
+        }
+
+
+# =============================================================================
+# CLUSTERS
+# =============================================================================
+
+def start_load(generator: LoadGenerator, args: argparse.Namespace) -> float:
+    """
+    Inicia la carga según el modo elegido.
+
+    Returns:
+        Segundos que puede tardar la prueba, incluido el warmup y la espera
+        por los valores en curso
+    """
+    duration = args.duration + args.warmup if args.duration else None
+    if args.mode == "open":
+        generator.start_open(args.rate, duration, args.poisson)
+    else:
+        generator.start_closed(args.clients, duration, args.requests)
+    return (duration or 3600.0) + DRAIN_TIMEOUT
+
+
+def run_simulated(args: argparse.Namespace, options: dict) -> dict:
+    """Ejecuta la prueba sobre un cluster en la red simulada."""
+    from sim_network import LinkProfile, SimulatedCluster, SimulatedNetwork
+
+    profile = LinkProfile(latency=args.latency / 1000, jitter=args.jitter / 1000, loss=args.loss)
+    network = SimulatedNetwork(seed=args.seed, profile=profile)
+    cluster = SimulatedCluster(args.nodes, network, **options)
+    cluster.start()
+    leader = cluster.wait_for_leader()
+    if leader is None:
+        raise RuntimeError("El cluster simulado no eligió líder")
+
+    targets = [leader] if args.entry == "leader" else cluster.nodes
+    generator = LoadGenerator([node.submit for node in targets], leader.network,
+                              args.value_size, args.warmup, args.seed)
+    for node in cluster.nodes:
+        node.phase_listeners.append(generator.observe_phase)
+
+    wall = time.perf_counter()
+    timeout = start_load(generator, args)
+    network.run_until(generator.finished, timeout=timeout)
+    results = generator.results()
+    results["wall_s"] = round(time.perf_counter() - wall, 3)
+    results["network"] = dict(network.stats)
+    cluster.stop()
+    return results
+
+
+def run_local(args: argparse.Namespace, options: dict) -> dict:
+    """
+    Ejecuta la prueba con sockets reales: los demás nodos corren en
+    procesos aparte (sin elección, solo como acceptors y learners) y el
+    nodo de este proceso es el líder que recibe la carga.
+    """
+    from paxos_node import PaxosNode
+
+    members = generate_members(args.nodes, base_port=args.base_port)
+    handle, cluster_path = tempfile.mkstemp(prefix="paxos-bench-", suffix=".json")
+    os.close(handle)
+    write_cluster_file(cluster_path, members, {**options, "election": False}, args.log_level)
+    processes = [launch_node(member, cluster_path, args.log_dir) for member in members[1:]]
+    node = None
+    try:
+        node = PaxosNode(members[0], members=members, **options)
+        node.start()
+        # Ser líder antes de medir: si la elección no llega a tiempo, la
+        # primera propuesta ejecuta la Fase 1
+        deadline = time.monotonic() + 10.0
+        while not node.leader_ballot and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        generator = LoadGenerator([node.submit], node.network, args.value_size,
+                                  args.warmup, args.seed)
+        node.phase_listeners.append(generator.observe_phase)
+        wall = time.perf_counter()
+        limit = time.monotonic() + start_load(generator, args)
+        while not generator.finished() and time.monotonic() < limit:
+            time.sleep(0.01)
+        results = generator.results()
+        results["wall_s"] = round(time.perf_counter() - wall, 3)
+        results["node_stats"] = dict(node.stats)
+        return results
+    finally:
+        if node:
+            node.stop()
+        stop_cluster(processes)
+        os.remove(cluster_path)
+
+
+# =============================================================================
+# RESULTADOS
+# =============================================================================
+
+def environment() -> dict:
+    """Versión del código y del entorno, para comparar resultados."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.TimeoutExpired):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def print_report(report: dict):
+    """Imprime un resumen legible de los resultados."""
+    config, results = report["benchmark"], report["results"]
+    latency = results["latency_ms"]
+    print(f"\n{Colors.CYAN}{'='*60}{Colors.RESET}")
+    print(f"{Colors.CYAN}BENCHMARK: {config['target']}, {config['nodes']} nodos, "
+          f"lazo {'abierto' if config['mode'] == 'open' else 'cerrado'}{Colors.RESET}")
+    print(f"{Colors.CYAN}{'='*60}{Colors.RESET}")
+    print(f"  Enviados:   {results['issued']} (los del warmup de {config['warmup']:g} s no se miden)")
+    print(f"  Decididos:  {results['committed']} medidos "
+          f"({results['failed']} fallidos, {results['unfinished']} sin terminar)")
+    print(f"  Throughput: {results['throughput_per_s']} valores/s "
+          f"en {results['measured_s']} s (reales: {results['wall_s']} s)")
+    print(f"  Latencia:   p50 {latency['p50_ms']} ms | p95 {latency['p95_ms']} ms | "
+          f"p99 {latency['p99_ms']} ms | p99.9 {latency['p999_ms']} ms | "
+          f"máx {latency['max_ms']} ms")
+    for phase, summary in results["phases_ms"].items():
+        print(f"  {phase:<11} n={summary['count']:<7} p50 {summary['p50_ms']} ms | "
+              f"p99 {summary['p99_ms']} ms")
+    print()
+
+
+def compare(report: dict, baseline: dict, max_regression: Optional[float],
+            out=sys.stdout) -> bool:
+    """
+    Compara con los resultados de otra versión.
+
+    Returns:
+        False si el throughput bajó o el p99 subió más de `max_regression` %
+    """
+    new, old = report["results"], baseline["results"]
+    rows = [
+        ("throughput_per_s", new["throughput_per_s"], old["throughput_per_s"], True),
+        ("p50_ms", new["latency_ms"]["p50_ms"], old["latency_ms"]["p50_ms"], False),
+        ("p99_ms", new["latency_ms"]["p99_ms"], old["latency_ms"]["p99_ms"], False),
+        ("p999_ms", new["latency_ms"]["p999_ms"], old["latency_ms"]["p999_ms"], False),
+    ]
+    print(f"{Colors.YELLOW}Comparación con {baseline['environment'].get('git_commit')}:{Colors.RESET}", file=out)
+    ok = True
+    for name, value, previous, higher_is_better in rows:
+        change = (value - previous) / previous * 100 if previous else 0.0
+        worse = -change if higher_is_better else change
+        regressed = max_regression is not None and name in ("throughput_per_s", "p99_ms") \
+            and worse > max_regression
+        ok = ok and not regressed
+        color = Colors.RED if worse > 0 else Colors.GREEN
+        print(f"  {name:<17} {previous:>10} -> {value:<10} {color}{change:+.1f}%{Colors.RESET}"
+              f"{'  REGRESIÓN' if regressed else ''}", file=out)
+    return ok
+
+
+def main():
+    """Función principal."""
+    parser = argparse.ArgumentParser(description="Benchmark de throughput y latencia de Paxos")
+    parser.add_argument("--target", choices=("sim", "local"), default="sim",
+                        help="Cluster simulado en este proceso o local con sockets (por defecto sim)")
+    parser.add_argument("--nodes", type=int, default=3, help="Cantidad de nodos (por defecto 3)")
+    parser.add_argument("--mode", choices=("closed", "open"), default="closed",
+                        help="Lazo cerrado (clientes) o abierto (tasa fija)")
+    parser.add_argument("--clients", type=int, default=16,
+                        help="Clientes concurrentes en lazo cerrado (por defecto 16)")
+    parser.add_argument("--rate", type=float, default=1000.0,
+                        help="Valores por segundo en lazo abierto (por defecto 1000)")
+    parser.add_argument("--poisson", action="store_true",
+                        help="Llegadas de Poisson en lugar de equiespaciadas (lazo abierto)")
+    parser.add_argument("--duration", type=float,
+                        help=f"Segundos de carga, tras el warmup (por defecto {DEFAULT_DURATION:g}, "
+                             f"o sin límite con --requests)")
+    parser.add_argument("--requests", type=int,
+                        help="En lazo cerrado, terminar tras enviar esta cantidad de valores")
+    parser.add_argument("--warmup", type=float, default=1.0,
+                        help="Segundos iniciales que no se miden (por defecto 1)")
+    parser.add_argument("--value-size", type=int, default=16,
+                        help="Tamaño de cada valor en caracteres (por defecto 16)")
+    parser.add_argument("--entry", choices=("leader", "any"), default="leader",
+                        help="sim: enviar al líder o repartir entre todos los nodos")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla (por defecto 0)")
+    parser.add_argument("--latency", type=float, default=5.0,
+                        help="sim: latencia de ida en ms (por defecto 5)")
+    parser.add_argument("--jitter", type=float, default=1.0,
+                        help="sim: jitter máximo en ms (por defecto 1)")
+    parser.add_argument("--loss", type=float, default=0.0,
+                        help="sim: probabilidad de perder un datagrama (por defecto 0)")
+    parser.add_argument("--base-port", type=int, default=5001,
+                        help="local: puerto del primer nodo (por defecto 5001)")
+    parser.add_argument("--log-dir", help="local: directorio para la salida de cada nodo")
+    parser.add_argument("--set", dest="options", action="append", type=parse_option,
+                        default=[], metavar="CLAVE=VALOR",
+                        help="Opción de PaxosNode para todos los nodos (repetible)")
+    parser.add_argument("--log-level", default="WARN", help="Nivel mínimo de log (por defecto WARN)")
+    parser.add_argument("--output", help="Guardar los resultados en este archivo JSON")
+    parser.add_argument("--json", action="store_true",
+                        help="Imprimir los resultados en JSON en lugar del resumen")
+    parser.add_argument("--compare", help="Resultados JSON de otra versión para comparar")
+    parser.add_argument("--max-regression", type=float,
+                        help="Con --compare, terminar con código 1 si el throughput baja o "
+                             "el p99 sube más de este porcentaje")
+    args = parser.parse_args()
+
+    if args.duration is None and not (args.mode == "closed" and args.requests):
+        args.duration = DEFAULT_DURATION
+    # Con --json, los logs van a stderr: la salida estándar queda solo para el JSON
+    configure_logging(level=args.log_level, stream=sys.stderr if args.json else None)
+    options = dict(args.options)
+
+    runner = run_simulated if args.target == "sim" else run_local
+    results = runner(args, options)
+
+    report = {
+        "benchmark": {
+            "target": args.target, "nodes": args.nodes, "mode": args.mode,
+            "clients": args.clients if args.mode == "closed" else None,
+            "rate": args.rate if args.mode == "open" else None,
+            "poisson": args.poisson, "duration": args.duration, "requests": args.requests,
+            "warmup": args.warmup, "value_size": args.value_size, "entry": args.entry,
+            "seed": args.seed, "options": options,
+            "network": ({"latency_ms": args.latency, "jitter_ms": args.jitter, "loss": args.loss}
+                        if args.target == "sim" else None),
+        },
+        "environment": environment(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    flush_logs()
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        out = sys.stderr if args.json else sys.stdout
+        if not compare(report, baseline, args.max_regression, out):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+"""
+Códec Binario de Mensajes Paxos
+Grupo 7 - Sistemas Distribuidos UTPL
+
+Este módulo implementa un formato binario versionado para los mensajes
+Paxos, mucho más compacto y rápido de procesar que JSON, y la detección
+automática del formato recibido (binario o JSON).
+
+Formato v1 (big-endian):
+
+    Cabecera fija (21 bytes):
+        magic (B) | versión (B) | tipo (B) | campos presentes (H)
+        | propuesta (q) | slot (q)
+
+    Campos opcionales, en este orden, solo si su bit está activo:
+        sender             -> longitud (B) + UTF-8
+        value              -> valor etiquetado
+        accepted_proposal  -> q
+        accepted_value     -> valor etiquetado
+        accepted           -> cantidad (I) + [slot (q) | propuesta (q) | valor]
+        snapshot_slot      -> q
+        chunk_index/count  -> I + I
+        decided_slot       -> q
+        promised_proposal  -> q
+
+    Los campos nuevos se añaden al final con un bit nuevo, de modo que un
+    decodificador anterior los ignora sin romperse.
+
+    Valor etiquetado: etiqueta (B) + contenido
+        None, True, False  -> sin contenido
+        int                -> q
+        float              -> d
+        str, bytes         -> longitud (I) + datos
+        list               -> cantidad (I) + valores
+        dict               -> cantidad (I) + [clave (str) + valor]
+"""
+
+import json
+import struct
+from typing import Any, Tuple, Union
+
+from config import Message, MessageType, serialize_message
+
+# =============================================================================
+# CONSTANTES DEL FORMATO
+# =============================================================================
+
+CODEC_BINARY = "binary"
+CODEC_JSON = "json"
+
+MAGIC = 0xB7  # Nunca coincide con '{' (0x7B), el primer byte de un JSON
+VERSION = 1
+
+# Tipo de mensaje <-> byte
+TYPE_CODES = {
+    MessageType.PREPARE: 1,
+    MessageType.PROMISE: 2,
+    MessageType.ACCEPT: 3,
+    MessageType.ACCEPTED: 4,
+    MessageType.NACK: 5,
+    MessageType.LEARN: 6,
+    MessageType.SNAPSHOT_REQUEST: 7,
+    MessageType.SNAPSHOT_CHUNK: 8,
+    MessageType.CATCHUP_REQUEST: 9,
+    MessageType.CATCHUP_REPLY: 10,
+    MessageType.HEARTBEAT: 11,
+    MessageType.HEARTBEAT_ACK: 12,
+    MessageType.FORWARD: 13,
+    MessageType.FORWARD_REPLY: 14,
+}
+TYPE_NAMES = {code: name for name, code in TYPE_CODES.items()}
+
+# Bits de campos presentes
+F_SENDER = 0x01
+F_VALUE = 0x02
+F_ACCEPTED_PROPOSAL = 0x04
+F_ACCEPTED_VALUE = 0x08
+F_ACCEPTED = 0x10
+F_SNAPSHOT_SLOT = 0x20
+F_CHUNK = 0x40
+F_DECIDED_SLOT = 0x80
+F_PROMISED_PROPOSAL = 0x100
+
+# Etiquetas de valores
+T_NONE, T_TRUE, T_FALSE, T_INT, T_FLOAT, T_STR, T_BYTES, T_LIST, T_DICT = range(9)
+
+HEADER = struct.Struct("!BBBHqq")
+U8 = struct.Struct("!B")
+U32 = struct.Struct("!I")
+I64 = struct.Struct("!q")
+F64 = struct.Struct("!d")
+ENTRY = struct.Struct("!qq")
+CHUNK = struct.Struct("!II")
+
+INT64_MIN, INT64_MAX = -(1 << 63), (1 << 63) - 1
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+# =============================================================================
+# CODIFICACIÓN
+# =============================================================================
+
+
+def _encode_value(value: Any, out: list):
+    """Añade a `out` la representación etiquetada de un valor."""
+    if value is None:
+        out.append(b"\x00")
+    elif value is True:
+        out.append(b"\x01")
+    elif value is False:
+        out.append(b"\x02")
+    elif isinstance(value, int) and INT64_MIN <= value <= INT64_MAX:
+        out.append(U8.pack(T_INT) + I64.pack(value))
+    elif isinstance(value, float):
+        out.append(U8.pack(T_FLOAT) + F64.pack(value))
+    elif isinstance(value, str):
+        data = value.encode("utf-8")
+        out.append(U8.pack(T_STR) + U32.pack(len(data)))
+        out.append(data)
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        out.append(U8.pack(T_BYTES) + U32.pack(len(value)))
+        out.append(bytes(value))
+    elif isinstance(value, (list, tuple)):
+        out.append(U8.pack(T_LIST) + U32.pack(len(value)))
+        for item in value:
+            _encode_value(item, out)
+    elif isinstance(value, dict):
+        out.append(U8.pack(T_DICT) + U32.pack(len(value)))
+        for key, item in value.items():
+            data = str(key).encode("utf-8")
+            out.append(U32.pack(len(data)))
+            out.append(data)
+            _encode_value(item, out)
+    else:
+        # Tipos no soportados (enteros enormes, etc.): representación JSON
+        _encode_value(json.dumps(value, default=str), out)
+
+
+def encode_value(value: Any) -> bytes:
+    """Codifica un valor suelto con el formato etiquetado (usado por el WAL)."""
+    out: list = []
+    _encode_value(value, out)
+    return b"".join(out)
+
+
+def encode_binary(msg: Message) -> bytes:
+    """
+    Codifica un mensaje en formato binario v1.
+
+    Args:
+        msg: Mensaje Paxos
+
+    Returns:
+        Bytes listos para enviar
+    """
+    flags = 0
+    body: list = []
+
+    if msg.sender:
+        flags |= F_SENDER
+        data = msg.sender.encode("utf-8")
+        body.append(U8.pack(len(data)))
+        body.append(data)
+    if msg.value is not None:
+        flags |= F_VALUE
+        _encode_value(msg.value, body)
+    if msg.accepted_proposal is not None:
+        flags |= F_ACCEPTED_PROPOSAL
+        body.append(I64.pack(msg.accepted_proposal))
+    if msg.accepted_value is not None:
+        flags |= F_ACCEPTED_VALUE
+        _encode_value(msg.accepted_value, body)
+    if msg.accepted is not None:
+        flags |= F_ACCEPTED
+        body.append(U32.pack(len(msg.accepted)))
+        for slot, proposal, value in msg.accepted:
+            body.append(ENTRY.pack(slot, proposal))
+            _encode_value(value, body)
+    if msg.snapshot_slot is not None:
+        flags |= F_SNAPSHOT_SLOT
+        body.append(I64.pack(msg.snapshot_slot))
+    if msg.chunk_index is not None:
+        flags |= F_CHUNK
+        body.append(CHUNK.pack(msg.chunk_index, msg.chunk_count or 0))
+    if msg.decided_slot is not None:
+        flags |= F_DECIDED_SLOT
+        body.append(I64.pack(msg.decided_slot))
+    if msg.promised_proposal is not None:
+        flags |= F_PROMISED_PROPOSAL
+        body.append(I64.pack(msg.promised_proposal))
+
+    header = HEADER.pack(MAGIC, VERSION, TYPE_CODES[msg.type], flags,
+                         msg.proposal_num or 0, msg.slot or 0)
+    return header + b"".join(body)
+
+# =============================================================================
+# DECODIFICACIÓN
+# =============================================================================
+
+
+def _decode_value(buf: Buffer, offset: int) -> Tuple[Any, int]:
+    """Lee un valor etiquetado. Retorna (valor, nuevo offset)."""
+    tag = buf[offset]
+    offset += 1
+    if tag == T_NONE:
+        return None, offset
+    if tag == T_TRUE:
+        return True, offset
+    if tag == T_FALSE:
+        return False, offset
+    if tag == T_INT:
+        return I64.unpack_from(buf, offset)[0], offset + 8
+    if tag == T_FLOAT:
+        return F64.unpack_from(buf, offset)[0], offset + 8
+    if tag == T_STR or tag == T_BYTES:
+        (length,) = U32.unpack_from(buf, offset)
+        offset += 4
+        end = offset + length
+        if end > len(buf):
+            raise ValueError("Valor truncado")
+        if tag == T_STR:
+            return str(buf[offset:end], "utf-8"), end
+        return bytes(buf[offset:end]), end
+    if tag == T_LIST:
+        (count,) = U32.unpack_from(buf, offset)
+        offset += 4
+        items = []
+        for _ in range(count):
+            item, offset = _decode_value(buf, offset)
+            items.append(item)
+        return items, offset
+    if tag == T_DICT:
+        (count,) = U32.unpack_from(buf, offset)
+        offset += 4
+        result = {}
+        for _ in range(count):
+            (length,) = U32.unpack_from(buf, offset)
+            offset += 4
+            key = str(buf[offset:offset + length], "utf-8")
+            offset += length
+            result[key], offset = _decode_value(buf, offset)
+        return result, offset
+    raise ValueError(f"Etiqueta de valor desconocida: {tag}")
+
+
+def decode_value(buf: Buffer, offset: int = 0) -> Tuple[Any, int]:
+    """Decodifica un valor etiquetado. Retorna (valor, nuevo offset)."""
+    return _decode_value(buf, offset)
+
+
+def decode_binary(buf: Buffer) -> Message:
+    """
+    Decodifica un mensaje binario v1 directamente a un Message.
+
+    Args:
+        buf: Datos recibidos (bytes o memoryview)
+
+    Returns:
+        Mensaje Paxos
+
+    Raises:
+        ValueError: Si el formato o la versión no son válidos
+    """
+    magic, version, type_code, flags, proposal_num, slot = HEADER.unpack_from(buf, 0)
+    if magic != MAGIC:
+        raise ValueError("No es un mensaje binario Paxos")
+    if version != VERSION:
+        raise ValueError(f"Versión de códec no soportada: {version}")
+    try:
+        msg = Message(TYPE_NAMES[type_code], proposal_num, slot=slot)
+    except KeyError:
+        raise ValueError(f"Tipo de mensaje desconocido: {type_code}") from None
+
+    offset = HEADER.size
+    if flags & F_SENDER:
+        length = buf[offset]
+        offset += 1
+        msg.sender = str(buf[offset:offset + length], "utf-8")
+        offset += length
+    if flags & F_VALUE:
+        msg.value, offset = _decode_value(buf, offset)
+    if flags & F_ACCEPTED_PROPOSAL:
+        (msg.accepted_proposal,) = I64.unpack_from(buf, offset)
+        offset += 8
+    if flags & F_ACCEPTED_VALUE:
+        msg.accepted_value, offset = _decode_value(buf, offset)
+    if flags & F_ACCEPTED:
+        (count,) = U32.unpack_from(buf, offset)
+        offset += 4
+        accepted = []
+        for _ in range(count):
+            entry_slot, proposal = ENTRY.unpack_from(buf, offset)
+            value, offset = _decode_value(buf, offset + ENTRY.size)
+            accepted.append([entry_slot, proposal, value])
+        msg.accepted = accepted
+    if flags & F_SNAPSHOT_SLOT:
+        (msg.snapshot_slot,) = I64.unpack_from(buf, offset)
+        offset += 8
+    if flags & F_CHUNK:
+        msg.chunk_index, msg.chunk_count = CHUNK.unpack_from(buf, offset)
+        offset += CHUNK.size
+    if flags & F_DECIDED_SLOT:
+        (msg.decided_slot,) = I64.unpack_from(buf, offset)
+        offset += 8
+    if flags & F_PROMISED_PROPOSAL:
+        (msg.promised_proposal,) = I64.unpack_from(buf, offset)
+        offset += 8
+
+    return msg
+
+# =============================================================================
+# NEGOCIACIÓN Y DETECCIÓN DE FORMATO
+# =============================================================================
+
+
+def encode_message(msg: Message, codec: str, advertise_binary: bool = False) -> bytes:
+    """
+    Codifica un mensaje con el códec indicado.
+
+    Args:
+        msg: Mensaje Paxos
+        codec: CODEC_BINARY o CODEC_JSON
+        advertise_binary: En JSON, anunciar que este nodo acepta binario
+    """
+    if codec == CODEC_BINARY:
+        return encode_binary(msg)
+    codecs = [CODEC_JSON, CODEC_BINARY] if advertise_binary else None
+    return serialize_message(msg, codecs)
+
+
+def decode_message(data: Buffer) -> Tuple[Message, bool]:
+    """
+    Decodifica un mensaje detectando su formato por el primer byte.
+
+    Returns:
+        (mensaje, el emisor acepta binario)
+    """
+    if data[0] == MAGIC:
+        return decode_binary(data), True
+
+    raw = json.loads(str(data, "utf-8"))
+    return Message.from_dict(raw), CODEC_BINARY in (raw.get("codecs") or ())
@@ -7,8 +7,12 @@ necesarias para el funcionamiento del algoritmo Paxos.
 """
 
 import json
+import threading
 import time
 from datetime import datetime, timezone
+from typing import Any, Optional, TextIO
+
+from logger import LogWriter
 
 # =============================================================================
 # CONFIGURACIÓN DE RED ZEROTIER
@@ -31,20 +35,262 @@ ALL_NODE_IPS = list(NODES.values())
 # Quórum requerido (mayoría simple: 2 de 3)
 QUORUM_SIZE = (len(ALL_NODE_IPS) // 2) + 1  # = 2
 
+# Códec preferido en la red: "binary" (compacto) o "json" (legible en
+# Wireshark). Los nodos negocian: si un par solo habla JSON, se le responde
+# en JSON.
+WIRE_CODEC = "binary"
+
+# Tamaño máximo de un datagrama enviado (bytes). Los mensajes mayores se
+# fragmentan; 1400 deja margen bajo la MTU típica (1500) y la de ZeroTier.
+MAX_DATAGRAM_SIZE = 1400
+
+# Tamaño máximo de un mensaje reensamblado (bytes)
+MAX_MESSAGE_SIZE = 4 * 1024 * 1024
+
+# Búfer de recepción por datagrama y búfer del socket del sistema operativo
+RECV_BUFFER_SIZE = 65535
+SOCKET_BUFFER_SIZE = 4 * 1024 * 1024
+
+# E/S por lotes (motor "thread"): en cada despertar se leen hasta
+# RECV_BATCH_SIZE datagramas, y las respuestas se envían al final del lote
+# agrupando en un paquete los datagramas pequeños para el mismo nodo
+BULK_IO = True
+RECV_BATCH_SIZE = 64
+
+# Memoria máxima para fragmentos pendientes de reensamblar (bytes)
+REASSEMBLY_MAX_BYTES = 16 * 1024 * 1024
+
+# Motor de red: "thread" (hilo de recepción bloqueante) o "asyncio"
+# (event loop con DatagramProtocol, detención inmediata)
+NETWORK_ENGINE = "thread"
+
 # =============================================================================
 # CONFIGURACIÓN DE TIMEOUTS
 # =============================================================================
 
-# Timeout para esperar respuestas (segundos)
+# Timeout máximo para esperar respuestas (segundos). El timeout efectivo
+# de cada fase se deriva del RTT medido (ver rtt.py) y solo usa estos
+# valores como tope
 PREPARE_TIMEOUT = 5.0
 ACCEPT_TIMEOUT = 5.0
 
-# Intervalo de reintento si no se alcanza quórum
-RETRY_INTERVAL = 2.0
+# RTO (intervalo de retransmisión) inicial, antes de medir el RTT, y sus
+# límites. RTO = SRTT + 4 * RTTVAR (RFC 6298)
+RTO_INITIAL = 0.3
+RTO_MIN = 0.02
+RTO_MAX = 2.0
 
-# Timeout del socket UDP
+# Timeout de fase = PHASE_TIMEOUT_RTOS * RTO del quórum, como mínimo
+# PHASE_TIMEOUT_MIN (mientras tanto se retransmite a quien no responde)
+PHASE_TIMEOUT_RTOS = 16
+PHASE_TIMEOUT_MIN = 0.5
+
+# Respuestas recientes que cada nodo recuerda para contestar peticiones
+# retransmitidas sin volver a procesarlas
+REPLY_CACHE_SIZE = 4096
+
+# Intervalo base de reintento si no se alcanza quórum (back-off
+# exponencial aleatorio: se duplica en cada intento hasta RETRY_MAX_INTERVAL)
+RETRY_INTERVAL = 0.2
+RETRY_MAX_INTERVAL = 5.0
+
+# Intentos de Fase 1 antes de rechazar los valores en espera
+MAX_RETRIES = 5
+
+# Timeout del socket UDP (solo acota cuánto tarda el hilo receptor en
+# notar que el nodo se detiene; no interviene en el protocolo)
 SOCKET_TIMEOUT = 1.0
 
+# Tiempo máximo para recibir todos los fragmentos de un mensaje
+REASSEMBLY_TIMEOUT = 2.0
+
+# =============================================================================
+# CONFIGURACIÓN MULTI-PAXOS
+# =============================================================================
+
+# Si es True, un nodo que gana la Fase 1 conserva el liderazgo sobre todos
+# los slots siguientes del log y solo ejecuta la Fase 2 para cada valor.
+MULTI_PAXOS = True
+
+# Máximo de instancias (slots) en Fase 2 simultáneamente por proposer
+PIPELINE_WINDOW = 16
+
+# Cómo se enteran los learners de que un valor fue decidido:
+#   "leader":    el líder envía LEARN por lotes con (slot, propuesta); cada
+#                nodo toma el valor de su propio log de aceptados
+#   "acceptors": cada acceptor envía ACCEPTED a todos los nodos y cada uno
+#                cuenta el quórum (un retardo menos, N² mensajes con valor)
+LEARN_MODE = "leader"
+
+# Tiempo máximo que un aviso LEARN espera para agruparse (milisegundos)
+LEARN_BATCH_DELAY_MS = 1.0
+
+# Hilos que procesan los mensajes recibidos, repartidos por slot (los de un
+# mismo slot, en orden). 0 = los procesa el propio hilo de recepción.
+DISPATCH_WORKERS = 0
+
+# Mensajes pendientes máximos por hilo de trabajo
+DISPATCH_QUEUE_SIZE = 10000
+
+# Franjas de locks del log de aceptados: instancias en slots de franjas
+# distintas se aceptan sin esperarse entre sí
+ACCEPTOR_LOCK_STRIPES = 64
+
+# =============================================================================
+# CONFIGURACIÓN DE ELECCIÓN DE LÍDER
+# =============================================================================
+
+# Si es True, los nodos eligen un líder estable: el líder envía
+# heartbeats, los demás le reenvían sus valores y solo intentan la Fase 1
+# si el detector de fallos lo da por caído (requiere MULTI_PAXOS)
+ELECTION_ENABLED = True
+
+# Intervalo entre HEARTBEAT del líder (también renueva el lease)
+HEARTBEAT_INTERVAL = 0.5
+
+# Umbral phi del detector de fallos phi-accrual (8 ~ 1e-8 de error)
+PHI_THRESHOLD = 8.0
+
+# Intervalos entre heartbeats que recuerda el detector de fallos
+FAILURE_DETECTOR_WINDOW = 100
+
+# =============================================================================
+# CONFIGURACIÓN DE LECTURAS (LEADER LEASES)
+# =============================================================================
+
+# Si es True, el líder mantiene un lease concedido por un quórum y atiende
+# lecturas linealizables desde su estado local, sin mensajes
+LEASES_ENABLED = True
+
+# Duración del lease (segundos). Mientras dura, los acceptors que lo
+# concedieron rechazan el PREPARE de cualquier otro nodo.
+LEASE_DURATION = 2.0
+
+# Margen por deriva de relojes: el líder da su lease por vencido esta
+# fracción antes que los acceptors
+LEASE_CLOCK_DRIFT = 0.1
+
+# =============================================================================
+# CONFIGURACIÓN DE PERSISTENCIA (WAL)
+# =============================================================================
+
+# Directorio del write-ahead log del acceptor (None = solo memoria)
+WAL_DIR = None
+
+# Tamaño preasignado de cada segmento del WAL (bytes)
+WAL_SEGMENT_SIZE = 64 * 1024 * 1024
+
+# Ventana de group commit: registros que llegan en este intervalo
+# comparten un único fsync (milisegundos)
+WAL_GROUP_COMMIT_MS = 1.0
+
+# =============================================================================
+# CONFIGURACIÓN DE SNAPSHOTS
+# =============================================================================
+
+# Directorio de snapshots (None = solo en memoria; el WAL no se trunca)
+SNAPSHOT_DIR = None
+
+# Tomar un snapshot cada este número de slots aplicados
+SNAPSHOT_INTERVAL = 10000
+
+# Tamaño de cada fragmento al transferir un snapshot (bytes)
+SNAPSHOT_CHUNK_SIZE = 64 * 1024
+
+# Tiempo de espera antes de volver a pedir los fragmentos que faltan
+SNAPSHOT_TRANSFER_TIMEOUT = 2.0
+
+# =============================================================================
+# CONFIGURACIÓN DE CATCH-UP (PUESTA AL DÍA DE LEARNERS)
+# =============================================================================
+
+# Máximo de slots por petición de catch-up
+CATCHUP_BATCH_SLOTS = 512
+
+# Tamaño máximo aproximado de una respuesta de catch-up (bytes)
+CATCHUP_MAX_BYTES = 256 * 1024
+
+# Peticiones de rango en curso a la vez (repartidas entre los pares)
+CATCHUP_PARALLEL = 4
+
+# Espera antes de pedir slots que faltan (da tiempo a que lleguen solos)
+CATCHUP_DELAY = 0.05
+
+# Tiempo tras el cual se reintentan las peticiones sin respuesta
+CATCHUP_TIMEOUT = 1.0
+
+# =============================================================================
+# CONFIGURACIÓN DE BATCHING
+# =============================================================================
+
+# Agrupar los valores de los clientes antes de proponerlos
+BATCHING_ENABLED = True
+
+# Tiempo máximo que un valor espera en el lote (milisegundos)
+BATCH_MAX_DELAY_MS = 2.0
+
+# Tamaño máximo acumulado de un lote (bytes). Los lotes que no caben en un
+# datagrama se fragmentan.
+BATCH_MAX_BYTES = 16 * 1024
+
+# =============================================================================
+# CONFIGURACIÓN DE LOGS
+# =============================================================================
+
+# Nivel mínimo que se registra, de menor a mayor: SEND/RECV (cada mensaje),
+# INFO/SUCCESS, WARN, ERROR. Por debajo del nivel, log_message retorna sin
+# dar formato al texto. Para medir rendimiento conviene "WARN".
+LOG_LEVEL = "SEND"
+
+# Formato: "console" (texto con color) o "json" (un objeto JSON por línea)
+LOG_FORMAT = "console"
+
+# Archivo de log (None = salida estándar)
+LOG_FILE = None
+
+# Escribir los logs desde un hilo en segundo plano (la cola descarta
+# registros si se llena, en lugar de frenar al protocolo)
+LOG_ASYNC = True
+LOG_QUEUE_SIZE = 100000
+
+# =============================================================================
+# CONFIGURACIÓN DE RED SIMULADA
+# =============================================================================
+
+# Semilla del azar de la red simulada (pérdidas, jitter) y de los nodos
+SIM_SEED = 0
+
+# Latencia de ida entre dos nodos y jitter (uniforme entre 0 y SIM_JITTER)
+SIM_LATENCY = 0.005  # segundos
+SIM_JITTER = 0.001   # segundos
+
+# Probabilidad de perder un datagrama
+SIM_LOSS = 0.0
+
+# Probabilidad de que un datagrama se retrase hasta SIM_REORDER_DELAY
+# adicionales y llegue después de otros enviados más tarde
+SIM_REORDER = 0.0
+SIM_REORDER_DELAY = 0.02  # segundos
+
+# Hora (epoch) en la que arranca el reloj virtual
+SIM_EPOCH = 1_700_000_000.0
+
+# =============================================================================
+# CONFIGURACIÓN DE MÉTRICAS
+# =============================================================================
+
+# Puerto TCP del endpoint HTTP de métricas (formato Prometheus, GET
+# /metrics). None = sin endpoint; las métricas se siguen contando
+METRICS_PORT = None
+
+# IP en la que escucha el endpoint (por defecto, solo la máquina local)
+METRICS_HOST = "127.0.0.1"
+
+# Límites (segundos) de las cubetas con que se publican los histogramas
+# de latencia; los percentiles exactos se publican aparte
+METRICS_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
 # =============================================================================
 # TIPOS DE MENSAJES PAXOS
 # =============================================================================
@@ -58,17 +304,94 @@ class MessageType:
     ACCEPTED = "ACCEPTED"    # Fase 2b: Acceptor -> Proposer/Learners
     NACK = "NACK"            # Rechazo de propuesta
     LEARN = "LEARN"          # Notificación a learners
+    SNAPSHOT_REQUEST = "SNAPSHOT_REQUEST"  # Nodo rezagado pide un snapshot
+    SNAPSHOT_CHUNK = "SNAPSHOT_CHUNK"      # Fragmento de un snapshot
+    CATCHUP_REQUEST = "CATCHUP_REQUEST"    # Learner rezagado pide slots decididos
+    CATCHUP_REPLY = "CATCHUP_REPLY"        # Rango de slots decididos
+    HEARTBEAT = "HEARTBEAT"                # Líder renueva su lease
+    HEARTBEAT_ACK = "HEARTBEAT_ACK"        # Acceptor concede el lease
+    FORWARD = "FORWARD"                    # Seguidor reenvía un valor al líder
+    FORWARD_REPLY = "FORWARD_REPLY"        # Resultado de un valor reenviado
 
 # =============================================================================
 # FUNCIONES AUXILIARES
 # =============================================================================
 
 
+class Message:
+    """
+    Mensaje Paxos.
+
+    Registro con __slots__ (sin dict por mensaje) que se puede usar como
+    un diccionario: `msg["type"]`, `msg.get("value")`, `msg["sender"] = ip`.
+    """
+
+    FIELDS = ("type", "proposal_num", "value", "sender", "accepted_proposal",
+              "accepted_value", "slot", "accepted", "snapshot_slot",
+              "chunk_index", "chunk_count", "decided_slot", "promised_proposal")
+
+    __slots__ = FIELDS
+
+    def __init__(self, type: str, proposal_num: int, value=None,
+                 sender: str = "", accepted_proposal: int = None,
+                 accepted_value=None, slot: int = 0, accepted: list = None,
+                 snapshot_slot: int = None, chunk_index: int = None,
+                 chunk_count: int = None, decided_slot: int = None,
+                 promised_proposal: int = None):
+        self.type = type
+        self.proposal_num = proposal_num
+        self.value = value
+        self.sender = sender
+        self.accepted_proposal = accepted_proposal
+        self.accepted_value = accepted_value
+        self.slot = slot
+        self.accepted = accepted
+        self.snapshot_slot = snapshot_slot
+        self.chunk_index = chunk_index
+        self.chunk_count = chunk_count
+        self.decided_slot = decided_slot
+        self.promised_proposal = promised_proposal
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key: str, value):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.FIELDS
+
+    def get(self, key: str, default=None):
+        """Equivalente a dict.get."""
+        return getattr(self, key, default) if key in self.FIELDS else default
+
+    def to_dict(self) -> dict:
+        """Retorna el mensaje como diccionario (para JSON)."""
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Message":
+        """Construye un mensaje ignorando claves desconocidas."""
+        return cls(**{k: v for k, v in data.items() if k in cls.FIELDS})
+
+    def __repr__(self) -> str:
+        return f"Message({self.to_dict()!r})"
+
+
 def create_message(msg_type: str, proposal_num: int, value=None,
                    sender: str = "", accepted_proposal: int = None,
-                   accepted_value=None) -> dict:
+                   accepted_value=None, slot: int = 0,
+                   accepted: list = None, snapshot_slot: int = None,
+                   chunk_index: int = None, chunk_count: int = None,
+                   decided_slot: int = None,
+                   promised_proposal: int = None) -> Message:
     """
-    Crea un mensaje Paxos en formato JSON.
+    Crea un mensaje Paxos.
 
     Args:
         msg_type: Tipo de mensaje (PREPARE, PROMISE, ACCEPT, etc.)
@@ -77,32 +400,50 @@ def create_message(msg_type: str, proposal_num: int, value=None,
         sender: IP del nodo emisor
         accepted_proposal: Número de propuesta previamente aceptada
         accepted_value: Valor previamente aceptado
+        slot: Posición del log a la que se refiere el mensaje. En PREPARE
+            y PROMISE es el primer slot cubierto por la promesa.
+        accepted: Lista de [slot, propuesta, valor] aceptados desde `slot`
+            (solo en PROMISE)
+        snapshot_slot: Último slot incluido en el snapshot del emisor
+            (PROMISE y transferencia de snapshots)
+        chunk_index: Índice del fragmento de snapshot
+        chunk_count: Total de fragmentos del snapshot
+        decided_slot: Primer slot sin decidir del emisor (todos los
+            anteriores están decididos); en CATCHUP_REQUEST, fin del rango
+        promised_proposal: Mayor propuesta prometida por el acceptor (en
+            NACK, para que el proposer reintente con una mayor)
 
     Returns:
-        Diccionario con la estructura del mensaje
+        Mensaje con la estructura del protocolo
     """
-    return {
-        "type": msg_type,
-        "proposal_num": proposal_num,
-        "value": value,
-        "sender": sender,
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-        "accepted_proposal": accepted_proposal,
-        "accepted_value": accepted_value
-    }
+    return Message(msg_type, proposal_num, value, sender, accepted_proposal,
+                   accepted_value, slot, accepted, snapshot_slot,
+                   chunk_index, chunk_count, decided_slot, promised_proposal)
 
 
-def serialize_message(msg: dict) -> bytes:
-    """Serializa un mensaje a bytes para envío UDP"""
-    return json.dumps(msg).encode('utf-8')
+def serialize_message(msg: Message, codecs: list = None) -> bytes:
+    """
+    Serializa un mensaje a JSON para envío UDP.
+
+    El timestamp solo se añade en JSON (útil al inspeccionar con Wireshark).
+
+    Args:
+        msg: Mensaje a serializar
+        codecs: Códecs que este nodo acepta recibir (negociación)
+    """
+    data = msg.to_dict() if isinstance(msg, Message) else dict(msg)
+    data["timestamp"] = datetime.now(timezone.utc).isoformat()
+    if codecs:
+        data["codecs"] = codecs
+    return json.dumps(data).encode('utf-8')
 
 
-def deserialize_message(data: bytes) -> dict:
-    """Deserializa bytes recibidos a un mensaje diccionario"""
-    return json.loads(data.decode('utf-8'))
+def deserialize_message(data: bytes) -> Message:
+    """Deserializa bytes JSON recibidos a un mensaje"""
+    return Message.from_dict(json.loads(data.decode('utf-8')))
 
 
-def generate_proposal_number(node_id: int) -> int:
+def generate_proposal_number(node_id: int, now: Optional[float] = None) -> int:
     """
     Genera un número de propuesta único.
 
@@ -110,26 +451,63 @@ def generate_proposal_number(node_id: int) -> int:
     El node_id ocupa los últimos 2 dígitos.
 
     Args:
-        node_id: Identificador único del nodo (0-99)
+        node_id: Identificador único del nodo (0-99, ver get_node_id)
+        now: Hora a usar (segundos desde epoch); por defecto time.time()
 
     Returns:
         Número de propuesta único
     """
-    timestamp_ms = int(time.time() * 1000)
+    timestamp_ms = int((time.time() if now is None else now) * 1000)
     return timestamp_ms * 100 + node_id
 
 
-def get_node_id_from_ip(ip: str) -> int:
+def get_node_id(local_ip: str, members: list[str]) -> int:
     """
-    Obtiene un ID numérico único basado en la IP del nodo.
+    Obtiene el ID numérico de un nodo: su posición en la membresía ordenada.
+
+    Todos los nodos calculan el mismo ID para cada miembro (no depende del
+    orden en que se listen) y los IDs son distintos y caben en los dos
+    dígitos del número de propuesta, aunque el último octeto de la IP o el
+    puerto no lo hagan (p. ej. 10.184.53.242).
 
     Args:
-        ip: Dirección IP del nodo
+        local_ip: Dirección del nodo ("IP" o "IP:puerto")
+        members: Direcciones de todos los nodos del cluster
 
     Returns:
-        ID numérico (último octeto de la IP)
+        ID numérico (0-99)
+
+    Raises:
+        ValueError: Si hay miembros repetidos, más de 100 miembros o
+            `local_ip` no es miembro
+    """
+    ordered = sorted(members)
+    for previous, member in zip(ordered, ordered[1:]):
+        if previous == member:
+            raise ValueError(f"El nodo {member} aparece dos veces en la membresía")
+    if len(ordered) > 100:
+        raise ValueError(f"Un cluster admite hasta 100 nodos ({len(ordered)} dados)")
+    if local_ip not in ordered:
+        raise ValueError(f"El nodo {local_ip} no es miembro del cluster")
+    return ordered.index(local_ip)
+
+
+def parse_address(address: str) -> tuple[str, int]:
     """
-    return int(ip.split('.')[-1])
+    Separa la dirección de un nodo en (IP, puerto).
+
+    Los nodos se identifican por su IP cuando usan PAXOS_PORT (el caso de
+    ZeroTier) y por "IP:puerto" cuando no.
+    """
+    host, separator, port = address.rpartition(":")
+    if not separator:
+        return address, PAXOS_PORT
+    return host, int(port)
+
+
+def format_address(host: str, port: int) -> str:
+    """Dirección de un nodo a partir de su IP y puerto (inversa de parse_address)."""
+    return host if port == PAXOS_PORT else f"{host}:{port}"
 
 
 def format_timestamp() -> str:
@@ -153,27 +531,97 @@ class Colors:
     BOLD = '\033[1m'
 
 
-def log_message(level: str, message: str):
+# =============================================================================
+# LOGS
+# =============================================================================
+
+LOG_LEVELS = {"SEND": 10, "RECV": 10, "INFO": 20, "SUCCESS": 20, "WARN": 30, "ERROR": 40}
+
+LOG_COLORS = {
+    "INFO": Colors.CYAN,
+    "SEND": Colors.BLUE,
+    "RECV": Colors.YELLOW,
+    "ERROR": Colors.RED,
+    "SUCCESS": Colors.GREEN,
+    "WARN": Colors.YELLOW
+}
+
+_log_threshold = LOG_LEVELS[LOG_LEVEL]
+_log_writer: Optional[LogWriter] = None
+_log_lock = threading.Lock()
+
+
+def configure_logging(level: Optional[str] = None, fmt: Optional[str] = None,
+                      path: Optional[str] = None, asynchronous: Optional[bool] = None,
+                      stream: Optional[TextIO] = None):
     """
-    Imprime un mensaje de log con formato y color.
+    Cambia la configuración de logs en ejecución (por defecto, LOG_*).
+
+    Args:
+        level: Nivel mínimo (SEND, RECV, INFO, SUCCESS, WARN, ERROR)
+        fmt: "console" o "json"
+        path: Archivo de log (None = LOG_FILE)
+        asynchronous: Escribir desde un hilo en segundo plano
+        stream: Flujo de salida sin archivo de log (None = sys.stdout)
+    """
+    global _log_threshold, _log_writer
+    with _log_lock:
+        _log_threshold = LOG_LEVELS[level or LOG_LEVEL]
+        old, _log_writer = _log_writer, _new_log_writer(fmt, path, asynchronous, stream)
+    if old:
+        old.close()
+
+
+def _new_log_writer(fmt: Optional[str] = None, path: Optional[str] = None,
+                    asynchronous: Optional[bool] = None,
+                    stream: Optional[TextIO] = None) -> LogWriter:
+    """Crea el escritor de logs (los parámetros None toman LOG_*)."""
+    return LogWriter(
+        stream=stream,
+        path=path or LOG_FILE,
+        json_lines=(fmt or LOG_FORMAT) == "json",
+        colors=LOG_COLORS,
+        reset=Colors.RESET,
+        asynchronous=LOG_ASYNC if asynchronous is None else asynchronous,
+        queue_size=LOG_QUEUE_SIZE
+    )
+
+
+def log_enabled(level: str) -> bool:
+    """Indica si los registros de `level` se escriben."""
+    return LOG_LEVELS.get(level, 20) >= _log_threshold
+
+
+def log_message(level: str, message: str, *args: Any):
+    """
+    Registra un mensaje de log con formato y color.
+
+    Solo encola el registro: la hora y el texto se formatean al escribirlo.
+    En caminos frecuentes, pasar los valores en `args` (estilo %) en lugar
+    de una f-string, para no construir el texto si el nivel está filtrado.
 
     Args:
-        level: Nivel del log (INFO, SEND, RECV, ERROR, SUCCESS)
-        message: Mensaje a mostrar
+        level: Nivel del log (SEND, RECV, INFO, SUCCESS, WARN, ERROR)
+        message: Mensaje a mostrar (con marcadores % si hay `args`)
+        args: Valores para los marcadores de `message`
     """
-    timestamp = format_timestamp()
+    global _log_writer
+    if LOG_LEVELS.get(level, 20) < _log_threshold:
+        return
+    writer = _log_writer
+    if writer is None:
+        # Primer registro: crear el escritor con la configuración LOG_*
+        with _log_lock:
+            if _log_writer is None:
+                _log_writer = _new_log_writer()
+            writer = _log_writer
+    writer.write(time.time(), level, message, args)
 
-    colors = {
-        "INFO": Colors.CYAN,
-        "SEND": Colors.BLUE,
-        "RECV": Colors.YELLOW,
-        "ERROR": Colors.RED,
-        "SUCCESS": Colors.GREEN,
-        "WARN": Colors.YELLOW
-    }
 
-    color = colors.get(level, Colors.RESET)
-    print(f"{color}[{timestamp}] [{level}] {message}{Colors.RESET}")
+def flush_logs():
+    """Espera a que se escriban los registros pendientes."""
+    if _log_writer:
+        _log_writer.flush()
 
 
 if __name__ == "__main__":
@@ -185,10 +633,10 @@ if __name__ == "__main__":
     print(f"Quórum requerido: {QUORUM_SIZE} de {len(ALL_NODE_IPS)} nodos")
     print(f"\nNodos configurados:")
     for name, ip in NODES.items():
-        node_id = get_node_id_from_ip(ip)
+        node_id = get_node_id(ip, ALL_NODE_IPS)
         print(f"  - {name.capitalize()}: {ip} (Node ID: {node_id})")
 
-    print(f"\nEjemplo de número de propuesta: {generate_proposal_number(33)}")
+    print(f"\nEjemplo de número de propuesta: {generate_proposal_number(0)}")
     print(f"\nMensaje PREPARE de ejemplo:")
     msg = create_message(MessageType.PREPARE, 123456789, sender="10.184.53.33")
-    print(json.dumps(msg, indent=2))
+    print(json.dumps(msg.to_dict(), indent=2))
@@ -0,0 +1,82 @@
+"""
+Despacho de Mensajes por Slot a Hilos de Trabajo
+Grupo 7 - Sistemas Distribuidos UTPL
+
+Por defecto el hilo de recepción ejecuta el handler de cada mensaje, así
+que un handler lento (por ejemplo, uno que espera al disco) detiene la
+recepción de todos los demás. El despachador reparte los mensajes entre
+varios hilos de trabajo según su slot: los mensajes de un mismo slot van
+siempre al mismo hilo y se procesan en orden de llegada, y los de slots
+distintos avanzan en paralelo.
+"""
+
+import queue
+import threading
+from typing import Callable, Optional
+
+from config import DISPATCH_QUEUE_SIZE, Message, log_message
+
+_STOP = None  # Marca de fin para los hilos de trabajo
+
+
+class ShardedDispatcher:
+    """
+    Reparte mensajes entre `workers` hilos según `slot % workers`.
+
+    Cada hilo tiene su propia cola acotada: si un hilo se atrasa, el hilo
+    de recepción se bloquea al llenarse esa cola y el socket del sistema
+    operativo absorbe (o descarta) el exceso, como sin despachador.
+    """
+
+    def __init__(self, handler: Callable[[Message, str], None], workers: int,
+                 queue_size: int = DISPATCH_QUEUE_SIZE):
+        """
+        Inicializa el despachador.
+
+        Args:
+            handler: Función que procesa un mensaje (message, sender)
+            workers: Cantidad de hilos de trabajo (shards)
+            queue_size: Mensajes pendientes máximos por hilo
+        """
+        if workers < 1:
+            raise ValueError("Se necesita al menos un hilo de trabajo")
+        self.handler = handler
+        self.queues = [queue.Queue(maxsize=queue_size) for _ in range(workers)]
+        self.threads: list[threading.Thread] = []
+
+    def start(self):
+        """Inicia los hilos de trabajo."""
+        for index, shard in enumerate(self.queues):
+            thread = threading.Thread(target=self._run, args=(shard,),
+                                      name=f"paxos-shard-{index}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self):
+        """Detiene los hilos tras procesar los mensajes ya encolados."""
+        for shard in self.queues:
+            shard.put(_STOP)
+        for thread in self.threads:
+            thread.join(timeout=2.0)
+        self.threads = []
+
+    def dispatch(self, message: Message, sender: str):
+        """Encola un mensaje en el hilo de su slot."""
+        slot = message.get("slot") or 0
+        self.queues[slot % len(self.queues)].put((message, sender))
+
+    def pending(self) -> int:
+        """Mensajes encolados sin procesar (aproximado)."""
+        return sum(shard.qsize() for shard in self.queues)
+
+    def _run(self, shard: queue.Queue):
+        """Bucle de un hilo de trabajo."""
+        while True:
+            item: Optional[tuple] = shard.get()
+            if item is _STOP:
+                return
+            message, sender = item
+            try:
+                self.handler(message, sender)
+            except Exception as e:
+                log_message("ERROR", f"Error procesando {message['type']} de {sender}: {e}")
@@ -0,0 +1,100 @@
+"""
+Detección de Fallos y Back-off para la Elección de Líder
+Grupo 7 - Sistemas Distribuidos UTPL
+
+El líder envía HEARTBEAT periódicos. Cada seguidor estima con un detector
+phi-accrual cuán probable es que el líder haya caído, en lugar de usar un
+timeout fijo: el umbral se adapta a la latencia y al jitter observados.
+
+Cuando un nodo sospecha del líder (o una Fase 1 es rechazada), espera un
+tiempo aleatorio que crece exponencialmente antes de intentar la Fase 1,
+para que dos candidatos no se adelanten mutuamente de forma indefinida.
+"""
+
+import math
+import random
+import time
+from collections import deque
+from typing import Optional
+
+from config import (
+    HEARTBEAT_INTERVAL, PHI_THRESHOLD, FAILURE_DETECTOR_WINDOW,
+    RETRY_INTERVAL, RETRY_MAX_INTERVAL
+)
+
+# Desviación mínima de los intervalos, para que un jitter casi nulo no
+# vuelva al detector demasiado sensible
+MIN_STD_DEV = 0.05
+
+
+class PhiAccrualDetector:
+    """
+    Detector de fallos phi-accrual (Hayashibara et al.).
+
+    phi = -log10(P(el siguiente heartbeat llega después de `ahora`)),
+    suponiendo intervalos con distribución normal. phi = 8 equivale a una
+    probabilidad de 1e-8 de que el líder siga vivo.
+    """
+
+    def __init__(self, expected_interval: float = HEARTBEAT_INTERVAL,
+                 window: int = FAILURE_DETECTOR_WINDOW,
+                 acceptable_pause: float = HEARTBEAT_INTERVAL):
+        """
+        Inicializa el detector.
+
+        Args:
+            expected_interval: Intervalo nominal entre heartbeats (segundos)
+            window: Cantidad de intervalos recientes que se consideran
+            acceptable_pause: Pausa adicional tolerada (GC, red)
+        """
+        self.expected_interval = expected_interval
+        self.acceptable_pause = acceptable_pause
+        self.intervals: deque = deque(maxlen=window)
+        self.last_heartbeat: Optional[float] = None
+
+    def heartbeat(self, now: Optional[float] = None):
+        """Registra la llegada de un heartbeat."""
+        now = time.monotonic() if now is None else now
+        if self.last_heartbeat is None:
+            # Sin historial: partir del intervalo nominal
+            self.intervals.append(self.expected_interval)
+        else:
+            self.intervals.append(now - self.last_heartbeat)
+        self.last_heartbeat = now
+
+    def phi(self, now: Optional[float] = None) -> float:
+        """Nivel de sospecha actual (infinito si nunca hubo heartbeat)."""
+        if self.last_heartbeat is None:
+            return math.inf
+        now = time.monotonic() if now is None else now
+
+        count = len(self.intervals)
+        mean = sum(self.intervals) / count
+        variance = sum((i - mean) ** 2 for i in self.intervals) / count
+        std_dev = max(math.sqrt(variance), MIN_STD_DEV)
+
+        elapsed = now - self.last_heartbeat
+        # Aproximación logística de la CDF normal (y acotado para no
+        # desbordar exp; con |y| = 10 phi ya supera cualquier umbral útil)
+        y = (elapsed - mean - self.acceptable_pause) / std_dev
+        y = max(-10.0, min(10.0, y))
+        e = math.exp(-y * (1.5976 + 0.070566 * y * y))
+        if y > 0:
+            p_later = e / (1.0 + e)
+        else:
+            p_later = 1.0 - 1.0 / (1.0 + e)
+        return -math.log10(p_later) if p_later > 0 else math.inf
+
+    def is_available(self, now: Optional[float] = None,
+                     threshold: float = PHI_THRESHOLD) -> bool:
+        """Indica si el nodo vigilado se considera vivo."""
+        return self.phi(now) < threshold
+
+
+def backoff_delay(attempt: int, base: float = RETRY_INTERVAL,
+                  cap: float = RETRY_MAX_INTERVAL) -> float:
+    """
+    Espera antes del intento `attempt` (0 = primero): exponencial con tope
+    y aleatoria entre la mitad y el total.
+    """
+    return random.uniform(0.5, 1.0) * min(cap, base * (2 ** attempt))
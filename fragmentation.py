@@ -0,0 +1,170 @@
+"""
+Fragmentación y Reensamblado de Mensajes Paxos
+Grupo 7 - Sistemas Distribuidos UTPL
+
+Un datagrama UDP que supera la MTU del camino (ZeroTier, Wi-Fi, etc.)
+se fragmenta en IP o se pierde. Este módulo divide los mensajes grandes
+en fragmentos de tamaño MTU y los reensambla en el receptor con un búfer
+acotado y timeouts, para poder replicar valores de cientos de KB.
+
+Formato de fragmento (big-endian):
+
+    magic (B) | id de mensaje (I) | índice (H) | total (H) | datos
+"""
+
+import itertools
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from config import (
+    MAX_DATAGRAM_SIZE, MAX_MESSAGE_SIZE, REASSEMBLY_TIMEOUT,
+    REASSEMBLY_MAX_BYTES, log_message
+)
+
+FRAGMENT_MAGIC = 0xF7  # Distinto del magic binario (0xB7) y de '{' (0x7B)
+
+FRAGMENT_HEADER = struct.Struct("!BIHH")
+FRAGMENT_PAYLOAD = MAX_DATAGRAM_SIZE - FRAGMENT_HEADER.size
+
+
+def is_fragment(data) -> bool:
+    """Indica si un datagrama es un fragmento."""
+    return len(data) >= FRAGMENT_HEADER.size and data[0] == FRAGMENT_MAGIC
+
+
+class Fragmenter:
+    """Divide mensajes grandes en fragmentos que caben en un datagrama."""
+
+    def __init__(self):
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def split(self, data: bytes) -> list[bytes]:
+        """
+        Divide un mensaje en datagramas.
+
+        Args:
+            data: Mensaje serializado
+
+        Returns:
+            Lista de datagramas (el propio mensaje si ya cabe en uno)
+
+        Raises:
+            ValueError: Si el mensaje supera MAX_MESSAGE_SIZE
+        """
+        if len(data) <= MAX_DATAGRAM_SIZE:
+            return [data]
+        if len(data) > MAX_MESSAGE_SIZE:
+            raise ValueError(
+                f"Mensaje de {len(data)} bytes supera el máximo ({MAX_MESSAGE_SIZE})")
+
+        with self._lock:
+            msg_id = next(self._ids) & 0xFFFFFFFF
+
+        view = memoryview(data)
+        count = (len(data) + FRAGMENT_PAYLOAD - 1) // FRAGMENT_PAYLOAD
+        return [
+            FRAGMENT_HEADER.pack(FRAGMENT_MAGIC, msg_id, index, count)
+            + view[index * FRAGMENT_PAYLOAD:(index + 1) * FRAGMENT_PAYLOAD]
+            for index in range(count)
+        ]
+
+
+class _Partial:
+    """Mensaje parcialmente recibido."""
+
+    __slots__ = ("parts", "received", "size", "deadline")
+
+    def __init__(self, count: int, deadline: float):
+        self.parts: list = [None] * count
+        self.received = 0
+        self.size = 0
+        self.deadline = deadline
+
+
+class Reassembler:
+    """
+    Reensambla fragmentos en mensajes completos.
+
+    El búfer está acotado en bytes (`max_bytes`): si se supera, se
+    descartan primero los mensajes más antiguos. Los mensajes incompletos
+    se descartan al vencer `timeout`. Se usa solo desde el hilo de
+    recepción, por lo que no necesita lock.
+    """
+
+    def __init__(self, timeout: float = REASSEMBLY_TIMEOUT,
+                 max_bytes: int = REASSEMBLY_MAX_BYTES):
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self._partials: "OrderedDict[Tuple[str, int], _Partial]" = OrderedDict()
+        self._bytes = 0
+        self.dropped = 0  # Mensajes descartados por timeout o falta de espacio
+
+    def add(self, sender: str, data) -> Optional[bytes]:
+        """
+        Procesa un fragmento recibido.
+
+        Args:
+            sender: IP del emisor
+            data: Datagrama con cabecera de fragmento
+
+        Returns:
+            El mensaje completo si este fragmento lo completa, si no None
+        """
+        now = time.monotonic()
+        self._expire(now)
+
+        _, msg_id, index, count = FRAGMENT_HEADER.unpack_from(data, 0)
+        if count == 0 or index >= count or (count - 1) * FRAGMENT_PAYLOAD >= MAX_MESSAGE_SIZE:
+            return None
+
+        key = (sender, msg_id)
+        partial = self._partials.get(key)
+        if partial is None:
+            partial = _Partial(count, now + self.timeout)
+            self._partials[key] = partial
+        elif len(partial.parts) != count:
+            return None
+
+        if partial.parts[index] is not None:
+            return None  # Fragmento duplicado
+
+        payload = bytes(data[FRAGMENT_HEADER.size:])
+        partial.parts[index] = payload
+        partial.received += 1
+        partial.size += len(payload)
+        self._bytes += len(payload)
+
+        if partial.received == count:
+            del self._partials[key]
+            self._bytes -= partial.size
+            return b"".join(partial.parts)
+
+        self._evict()
+        return None
+
+    def pending(self) -> int:
+        """Cantidad de mensajes incompletos en el búfer."""
+        return len(self._partials)
+
+    def _expire(self, now: float):
+        """Descarta los mensajes incompletos cuyo timeout venció."""
+        while self._partials:
+            key, partial = next(iter(self._partials.items()))
+            if partial.deadline > now:
+                break
+            self._drop(key, "timeout")
+
+    def _evict(self):
+        """Descarta los mensajes más antiguos mientras se supere max_bytes."""
+        while self._bytes > self.max_bytes and self._partials:
+            self._drop(next(iter(self._partials)), "búfer lleno")
+
+    def _drop(self, key: Tuple[str, int], reason: str):
+        partial = self._partials.pop(key)
+        self._bytes -= partial.size
+        self.dropped += 1
+        log_message("WARN", f"Descartando mensaje fragmentado de {key[0]} ({reason})")
@@ -0,0 +1,142 @@
+"""
+Histogramas de Latencia
+Grupo 7 - Sistemas Distribuidos UTPL
+
+Histograma de rango dinámico alto al estilo HdrHistogram: las latencias se
+guardan en microsegundos en cubetas log-lineales. Los valores menores que
+2^SUB_BUCKET_BITS µs son exactos; por encima, cada potencia de dos se
+divide en 2^(SUB_BUCKET_BITS - 1) cubetas iguales, así que el error
+relativo es menor que 1 / 2^(SUB_BUCKET_BITS - 1) (< 1 % con 8 bits) desde
+microsegundos hasta horas, con unas pocas miles de cubetas.
+
+Registrar un valor es O(1) y no depende de cuántos se hayan registrado;
+los percentiles se calculan recorriendo las cubetas.
+"""
+
+import threading
+from typing import Optional
+
+SUB_BUCKET_BITS = 8
+SUB_BUCKET_HALF = 1 << (SUB_BUCKET_BITS - 1)
+
+# Percentiles que se reportan en los resúmenes
+SUMMARY_PERCENTILES = (50.0, 90.0, 95.0, 99.0, 99.9)
+
+
+def bucket_index(value_us: int) -> int:
+    """Cubeta de un valor en microsegundos."""
+    exponent = value_us.bit_length() - SUB_BUCKET_BITS
+    if exponent <= 0:
+        return value_us
+    return exponent * SUB_BUCKET_HALF + (value_us >> exponent)
+
+
+def bucket_bounds(index: int) -> tuple[int, int]:
+    """Rango de valores [menor, mayor] (µs) de una cubeta."""
+    if index < 2 * SUB_BUCKET_HALF:
+        return index, index
+    exponent = index // SUB_BUCKET_HALF - 1
+    mantissa = index - exponent * SUB_BUCKET_HALF
+    return mantissa << exponent, ((mantissa + 1) << exponent) - 1
+
+
+class LatencyHistogram:
+    """Histograma de latencias (thread-safe)."""
+
+    def __init__(self):
+        self.counts: list[int] = []
+        self.count = 0
+        self.total_us = 0
+        self.min_us: Optional[int] = None
+        self.max_us = 0
+        self.lock = threading.Lock()
+
+    def record(self, seconds: float):
+        """Registra una latencia en segundos."""
+        self.record_us(int(seconds * 1_000_000))
+
+    def record_us(self, value_us: int):
+        """Registra una latencia en microsegundos."""
+        value_us = max(value_us, 0)
+        index = bucket_index(value_us)
+        with self.lock:
+            if index >= len(self.counts):
+                self.counts.extend([0] * (index + 1 - len(self.counts)))
+            self.counts[index] += 1
+            self.count += 1
+            self.total_us += value_us
+            if self.min_us is None or value_us < self.min_us:
+                self.min_us = value_us
+            if value_us > self.max_us:
+                self.max_us = value_us
+
+    def merge(self, other: "LatencyHistogram"):
+        """Suma los valores de otro histograma a este."""
+        with other.lock:
+            counts = list(other.counts)
+            count, total, low, high = other.count, other.total_us, other.min_us, other.max_us
+        with self.lock:
+            if len(counts) > len(self.counts):
+                self.counts.extend([0] * (len(counts) - len(self.counts)))
+            for index, n in enumerate(counts):
+                self.counts[index] += n
+            self.count += count
+            self.total_us += total
+            if low is not None and (self.min_us is None or low < self.min_us):
+                self.min_us = low
+            self.max_us = max(self.max_us, high)
+
+    def copy(self) -> "LatencyHistogram":
+        """Copia del histograma, para leerla sin bloquear a quien registra."""
+        clone = LatencyHistogram()
+        clone.merge(self)
+        return clone
+
+    def reset(self):
+        """Descarta todos los valores registrados."""
+        with self.lock:
+            self.counts = []
+            self.count = 0
+            self.total_us = 0
+            self.min_us = None
+            self.max_us = 0
+
+    def percentile(self, percentile: float) -> float:
+        """
+        Latencia (segundos) bajo la cual está el `percentile` % de los
+        valores (el mayor valor de su cubeta, sin pasar del máximo visto).
+        """
+        with self.lock:
+            if not self.count:
+                return 0.0
+            rank = max(1, -(-self.count * percentile // 100))  # ceil
+            seen = 0
+            for index, n in enumerate(self.counts):
+                seen += n
+                if seen >= rank:
+                    return min(bucket_bounds(index)[1], self.max_us) / 1_000_000
+            return self.max_us / 1_000_000
+
+    def mean(self) -> float:
+        """Latencia media en segundos."""
+        with self.lock:
+            return self.total_us / self.count / 1_000_000 if self.count else 0.0
+
+    def buckets(self) -> list[tuple[float, int]]:
+        """Cubetas no vacías como (límite superior en segundos, cantidad)."""
+        with self.lock:
+            return [(bucket_bounds(index)[1] / 1_000_000, n)
+                    for index, n in enumerate(self.counts) if n]
+
+    def summary(self) -> dict:
+        """Cantidad, media, mínimo, percentiles y máximo, en milisegundos."""
+        result = {
+            "count": self.count,
+            "mean_ms": round(self.mean() * 1000, 3),
+            "min_ms": round((self.min_us or 0) / 1000, 3),
+        }
+        for percentile in SUMMARY_PERCENTILES:
+            key = f"p{percentile:g}".replace(".", "")
+            result[f"{key}_ms"] = round(self.percentile(percentile) * 1000, 3)
+        result["max_ms"] = round(self.max_us / 1000, 3)
+        return result
@@ -0,0 +1,190 @@
+"""
+Log de Instancias Paxos Indexado por Slot
+Grupo 7 - Sistemas Distribuidos UTPL
+
+Este módulo contiene la estructura compacta que guarda, para cada slot
+del log replicado, el número de propuesta y el valor asociados. Se usa
+tanto para el estado del Acceptor (valores aceptados) como para el del
+Learner (valores decididos). También contiene los locks por franjas
+con los que se modifican slots distintos en paralelo.
+"""
+
+import threading
+from array import array
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+
+class Instance:
+    """Vista de un slot del log (registro con __slots__, sin dict)."""
+
+    __slots__ = ("slot", "proposal", "value")
+
+    def __init__(self, slot: int, proposal: int, value: Any):
+        self.slot = slot
+        self.proposal = proposal
+        self.value = value
+
+    def __repr__(self) -> str:
+        return f"Instance(slot={self.slot}, proposal={self.proposal}, value={self.value!r})"
+
+
+class InstanceLog:
+    """
+    Log de instancias indexado por slot con acceso O(1).
+
+    Los números de propuesta se guardan en un `array('q')` (8 bytes por
+    slot) y los valores en una lista paralela, de modo que cada slot cuesta
+    unas decenas de bytes en lugar de un dict completo. Un número de
+    propuesta 0 indica que el slot está vacío.
+
+    No es thread-safe en general: el llamador debe proteger el acceso con
+    su lock. La excepción es `set` sobre slots distintos, que puede
+    llamarse en paralelo (por ejemplo, bajo `SlotLocks`): el crecimiento
+    del log se hace con un lock propio.
+    """
+
+    def __init__(self):
+        self.base = 0  # Primer slot almacenado
+        self._proposals = array('q')
+        self._values: list = []
+        self._grow_lock = threading.Lock()
+
+    @property
+    def end(self) -> int:
+        """Slot siguiente al último almacenado."""
+        return self.base + len(self._proposals)
+
+    def __len__(self) -> int:
+        return len(self._proposals)
+
+    def __contains__(self, slot: int) -> bool:
+        return self.proposal(slot) != 0
+
+    def proposal(self, slot: int) -> int:
+        """Retorna el número de propuesta del slot (0 si está vacío)."""
+        index = slot - self.base
+        if 0 <= index < len(self._proposals):
+            return self._proposals[index]
+        return 0
+
+    def value(self, slot: int) -> Any:
+        """Retorna el valor del slot (None si está vacío)."""
+        index = slot - self.base
+        if 0 <= index < len(self._values):
+            return self._values[index]
+        return None
+
+    def get(self, slot: int) -> Optional[Instance]:
+        """Retorna la instancia del slot, o None si está vacío."""
+        proposal = self.proposal(slot)
+        if proposal == 0:
+            return None
+        return Instance(slot, proposal, self._values[slot - self.base])
+
+    def set(self, slot: int, proposal: int, value: Any):
+        """
+        Guarda número de propuesta y valor para un slot.
+
+        Args:
+            slot: Slot del log (debe ser >= base)
+            proposal: Número de propuesta (distinto de 0)
+            value: Valor asociado
+        """
+        index = slot - self.base
+        if index < 0:
+            raise IndexError(f"Slot {slot} anterior al inicio del log ({self.base})")
+
+        # `_values` crece antes que `_proposals`: quien ve un slot dentro de
+        # `_proposals` (sin tomar el lock) ya puede escribir en ambos
+        if index >= len(self._proposals):
+            with self._grow_lock:
+                missing = index + 1 - len(self._proposals)
+                if missing > 0:
+                    self._values.extend([None] * missing)
+                    self._proposals.frombytes(bytes(missing * self._proposals.itemsize))
+
+        self._values[index] = value
+        self._proposals[index] = proposal
+
+    def entries_from(self, slot: int) -> Iterator[Instance]:
+        """Itera en orden sobre los slots no vacíos a partir de `slot`."""
+        start = max(slot - self.base, 0)
+        proposals = self._proposals
+        values = self._values
+        for index in range(start, len(proposals)):
+            if proposals[index] != 0:
+                yield Instance(self.base + index, proposals[index], values[index])
+
+    def truncate(self, slot: int):
+        """
+        Descarta todos los slots anteriores a `slot` (compactación tras un
+        snapshot). Los slots descartados quedan como vacíos.
+        """
+        drop = min(slot - self.base, len(self._proposals))
+        if drop > 0:
+            del self._proposals[:drop]
+            del self._values[:drop]
+        if slot > self.base:
+            self.base = slot
+
+
+class SlotLocks:
+    """
+    Locks por franjas de slots (lock striping).
+
+    `slot(s)` protege solo la franja del slot `s`, de modo que las
+    instancias en slots distintos no se serializan. `all()` toma todas las
+    franjas, siempre en el mismo orden, para operaciones sobre todo el log
+    (Fase 1, compactación).
+    """
+
+    def __init__(self, stripes: int):
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def slot(self, slot: int) -> threading.Lock:
+        """Lock de la franja de `slot`."""
+        return self._locks[slot % len(self._locks)]
+
+    @contextmanager
+    def all(self):
+        """Toma todas las franjas (exclusión total sobre el log)."""
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
+
+
+if __name__ == "__main__":
+    # Prueba de escrituras concurrentes: varios hilos con slots vecinos,
+    # como las Fases 2 de franjas distintas bajo SlotLocks
+    import sys
+
+    THREADS, SLOTS, ROUNDS = 8, 2000, 200
+    sys.setswitchinterval(1e-6)  # Cambios de hilo frecuentes, dentro de `set`
+    failures = 0
+    for _ in range(ROUNDS):
+        log = InstanceLog()
+        errors: list = []
+
+        def writer(first: int):
+            try:
+                for slot in range(first, SLOTS, THREADS):
+                    log.set(slot, slot + 1, slot)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors or any(log.proposal(slot) != slot + 1 or log.value(slot) != slot
+                         for slot in range(SLOTS)):
+            failures += 1
+
+    print(f"Escrituras concurrentes: {ROUNDS - failures}/{ROUNDS} rondas correctas")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,142 @@
+"""
+Escritura de Logs en Segundo Plano
+Grupo 7 - Sistemas Distribuidos UTPL
+
+`log_message` (config.py) solo filtra por nivel y encola el registro: dar
+formato a la hora y al texto y escribir en la consola o en un archivo se
+hace en un hilo aparte, de modo que los handlers de mensajes no esperan a
+la terminal. Si la cola se llena, los registros nuevos se descartan (y se
+avisa cuántos) en lugar de frenar al protocolo.
+
+Formatos de salida:
+    "console": [2025-01-01 12:00:00.000 UTC] [INFO] texto   (con color)
+    "json":    {"ts": "...", "level": "INFO", "msg": "texto"}   (JSON lines)
+"""
+
+import atexit
+import json
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Optional, TextIO
+
+# Registros que el hilo escritor junta en una sola escritura
+WRITE_BATCH = 256
+
+_STOP = None  # Marca de fin para el hilo escritor
+
+
+def format_time(ts: float) -> str:
+    """Hora UTC de un registro (time.time()) con milisegundos."""
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3] + " UTC"
+
+
+class LogWriter:
+    """
+    Escritor de registros de log, síncrono o con hilo propio.
+
+    Los argumentos de cada registro se formatean (`texto % args`) recién
+    en el hilo escritor, así que deben ser valores que ya no cambien.
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None, path: Optional[str] = None,
+                 json_lines: bool = False, colors: Optional[dict] = None,
+                 reset: str = "", asynchronous: bool = True, queue_size: int = 100000):
+        """
+        Inicializa el escritor.
+
+        Args:
+            stream: Flujo de salida (por defecto sys.stdout)
+            path: Archivo al que se añaden los registros (en lugar de stream)
+            json_lines: Escribir un objeto JSON por línea en lugar de texto
+            colors: Código de color por nivel (solo formato de consola)
+            reset: Código que restablece el color tras cada línea
+            asynchronous: Escribir desde un hilo en segundo plano
+            queue_size: Registros pendientes máximos antes de descartar
+        """
+        self.file = open(path, "a", encoding="utf-8") if path else None
+        self.stream = self.file or stream or sys.stdout
+        self.json_lines = json_lines
+        self.colors = {} if json_lines or self.file else (colors or {})
+        self.reset = reset if self.colors else ""
+        self.dropped = 0
+
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()  # Escritura síncrona
+        if asynchronous:
+            self._queue = queue.Queue(maxsize=queue_size)
+            self._thread = threading.Thread(target=self._run, name="paxos-log", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def write(self, ts: float, level: str, message: str, args: tuple = ()):
+        """Encola (o escribe, si es síncrono) un registro."""
+        record = (ts, level, message, args)
+        if self._queue is None:
+            with self._lock:
+                self._emit([record])
+            return
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """Espera a que se escriban los registros encolados."""
+        if self._queue is not None:
+            self._queue.join()
+
+    def close(self):
+        """Escribe lo pendiente y detiene el hilo escritor."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout=2.0)
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def _format(self, ts: float, level: str, message: str, args: tuple) -> str:
+        """Da formato a un registro."""
+        if args:
+            try:
+                message = message % args
+            except (TypeError, ValueError) as e:
+                message = f"{message} {args!r} (error de formato: {e})"
+        if self.json_lines:
+            return json.dumps({"ts": format_time(ts), "level": level, "msg": message},
+                              ensure_ascii=False, default=str)
+        color = self.colors.get(level, self.reset)
+        return f"{color}[{format_time(ts)}] [{level}] {message}{self.reset}"
+
+    def _emit(self, records: list):
+        """Escribe un grupo de registros de una vez."""
+        lines = [self._format(*record) for record in records]
+        try:
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+        except (OSError, ValueError):
+            pass  # Salida cerrada (p. ej. al terminar el proceso)
+
+    def _run(self):
+        """Bucle del hilo escritor."""
+        while True:
+            taken = [self._queue.get()]
+            while len(taken) < WRITE_BATCH:
+                try:
+                    taken.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            records = [record for record in taken if record is not _STOP]
+            if self.dropped:
+                dropped, self.dropped = self.dropped, 0
+                ts = records[-1][0] if records else 0.0
+                records.append((ts, "WARN", "%d registros de log descartados (cola llena)", (dropped,)))
+            if records:
+                self._emit(records)
+            for _ in taken:
+                self._queue.task_done()
+            if _STOP in taken:
+                return
@@ -0,0 +1,252 @@
+"""
+Métricas del Nodo Paxos
+Grupo 7 - Sistemas Distribuidos UTPL
+
+Contadores, histogramas de latencia e indicadores (gauges) de un nodo, y
+un endpoint HTTP local que los publica en el formato de texto de
+Prometheus (GET /metrics).
+
+Para no frenar el camino crítico:
+    - Cada hilo incrementa su propia celda de un contador, sin locks; la
+      lectura suma las celdas (puede ir un incremento por detrás)
+    - Los histogramas (ver histogram.py) registran en O(1); al publicar se
+      copian y se leen fuera de su lock
+    - Los gauges (profundidad de colas, estado del nodo) son funciones
+      que solo se evalúan al publicar
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional, Union
+
+from config import METRICS_HOST, METRICS_LATENCY_BUCKETS, log_message
+from histogram import SUMMARY_PERCENTILES, LatencyHistogram
+
+GaugeValue = Union[float, dict[str, float]]
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Counter:
+    """
+    Contador monótono con una celda por hilo.
+
+    Solo el hilo dueño escribe su celda, así que `inc` no necesita lock
+    ni pierde incrementos aunque lo llamen varios hilos a la vez.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._cells: list[list[int]] = []
+        self._lock = threading.Lock()  # Solo al registrar la celda de un hilo
+
+    def inc(self, amount: int = 1):
+        """Suma `amount` al contador."""
+        try:
+            self._local.cell[0] += amount
+        except AttributeError:
+            cell = [amount]
+            with self._lock:
+                self._cells.append(cell)
+            self._local.cell = cell
+
+    @property
+    def value(self) -> int:
+        """Valor actual (suma de las celdas de todos los hilos)."""
+        return sum(cell[0] for cell in list(self._cells))
+
+
+class LabeledCounter:
+    """Contadores separados por una etiqueta (p. ej. el nodo remoto)."""
+
+    def __init__(self):
+        self.children: dict[str, Counter] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label: str, amount: int = 1):
+        """Suma `amount` al contador de `label`."""
+        counter = self.children.get(label)
+        if counter is None:
+            with self._lock:
+                counter = self.children.setdefault(label, Counter())
+        counter.inc(amount)
+
+    def values(self) -> dict[str, int]:
+        """Valor de cada etiqueta."""
+        return {label: counter.value for label, counter in list(self.children.items())}
+
+    def total(self) -> int:
+        """Suma de todas las etiquetas."""
+        return sum(self.values().values())
+
+
+class MetricsRegistry:
+    """
+    Métricas de un nodo, en el orden en que se publican.
+
+    Cada métrica tiene un nombre de Prometheus (`paxos_..._total` para
+    contadores, `paxos_..._seconds` para latencias) y un texto de ayuda.
+    """
+
+    def __init__(self, latency_buckets: tuple = METRICS_LATENCY_BUCKETS):
+        """
+        Args:
+            latency_buckets: Límites (segundos) de las cubetas `le` con que
+                se publican los histogramas
+        """
+        self.latency_buckets = latency_buckets
+        self.metrics: list[tuple[str, str, str, object, Optional[str]]] = []
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        """Crea y registra un contador."""
+        counter = Counter()
+        self.metrics.append(("counter", name, help_text, counter, None))
+        return counter
+
+    def labeled_counter(self, name: str, help_text: str, label: str,
+                        counter: Optional[LabeledCounter] = None) -> LabeledCounter:
+        """Registra un contador por etiqueta (uno nuevo si no se da `counter`)."""
+        counter = counter or LabeledCounter()
+        self.metrics.append(("counter", name, help_text, counter, label))
+        return counter
+
+    def histogram(self, name: str, help_text: str) -> LatencyHistogram:
+        """Crea y registra un histograma de latencias (en segundos)."""
+        histogram = LatencyHistogram()
+        self.metrics.append(("histogram", name, help_text, histogram, None))
+        return histogram
+
+    def gauge(self, name: str, help_text: str, read: Callable[[], GaugeValue],
+              label: Optional[str] = None):
+        """
+        Registra un gauge: `read()` retorna su valor o, con `label`, un
+        diccionario {etiqueta: valor}. Solo se llama al publicar.
+        """
+        self.metrics.append(("gauge", name, help_text, read, label))
+
+    def render(self) -> str:
+        """Todas las métricas en el formato de texto de Prometheus."""
+        lines: list[str] = []
+        for kind, name, help_text, metric, label in self.metrics:
+            if kind == "histogram":
+                self._render_histogram(lines, name, help_text, metric)
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "counter":
+                value = metric.values() if label else metric.value
+            else:
+                try:
+                    value = metric()
+                except Exception as e:
+                    log_message("ERROR", f"Error leyendo la métrica {name}: {e}")
+                    continue
+            if label:
+                for label_value, sample in sorted(value.items()):
+                    lines.append(f'{name}{{{label}="{_escape(label_value)}"}} {_number(sample)}')
+            else:
+                lines.append(f"{name} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _render_histogram(self, lines: list[str], name: str, help_text: str,
+                          histogram: LatencyHistogram):
+        """
+        Publica un histograma en las cubetas `latency_buckets` y, aparte,
+        sus percentiles exactos (< 1 % de error) como `<name>_quantile`.
+        """
+        snapshot = histogram.copy()
+        buckets = snapshot.buckets()
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        index = cumulative = 0
+        for bound in self.latency_buckets:
+            while index < len(buckets) and buckets[index][0] <= bound:
+                cumulative += buckets[index][1]
+                index += 1
+            lines.append(f'{name}_bucket{{le="{bound:g}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{le="+Inf"}} {snapshot.count}')
+        lines.append(f"{name}_sum {_number(snapshot.total_us / 1_000_000)}")
+        lines.append(f"{name}_count {snapshot.count}")
+
+        lines.append(f"# HELP {name}_quantile {help_text} (percentiles del histograma HDR)")
+        lines.append(f"# TYPE {name}_quantile gauge")
+        for percentile in SUMMARY_PERCENTILES:
+            lines.append(f'{name}_quantile{{quantile="{percentile / 100:g}"}} '
+                         f'{_number(snapshot.percentile(percentile))}')
+
+
+def _number(value: float) -> str:
+    """Valor de una muestra en el formato de Prometheus."""
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    """Escapa el valor de una etiqueta."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsServer:
+    """
+    Endpoint HTTP que publica un `MetricsRegistry` en GET /metrics.
+
+    Corre en sus propios hilos (uno por petición); cada lectura solo
+    toma los locks de los histogramas el tiempo de copiarlos.
+    """
+
+    def __init__(self, registry: MetricsRegistry, port: int, host: str = METRICS_HOST):
+        """
+        Args:
+            registry: Métricas a publicar
+            port: Puerto TCP (0 = uno libre, ver `address`)
+            host: IP en la que escucha (por defecto solo local)
+        """
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.server: Optional[ThreadingHTTPServer] = None
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> tuple[str, int]:
+        """(IP, puerto) en que escucha el servidor."""
+        return self.server.server_address[:2] if self.server else (self.host, self.port)
+
+    def start(self):
+        """Comienza a atender peticiones."""
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Sin una línea por petición en la consola
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        host, port = self.address
+        log_message("INFO", f"Métricas en http://{host}:{port}/metrics")
+
+    def stop(self):
+        """Detiene el servidor."""
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        if self.thread:
+            self.thread.join(timeout=2.0)
+            self.thread = None
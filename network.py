@@ -3,137 +3,601 @@ Capa de Comunicación de Red para Paxos
 Grupo 7 - Sistemas Distribuidos UTPL
 
 Este módulo maneja toda la comunicación UDP entre nodos Paxos,
-incluyendo envío y recepción de mensajes con threading.
+incluyendo envío y recepción de mensajes con threading. El motor
+alternativo basado en asyncio está en `async_network.py`.
+
+Varios datagramas pequeños para el mismo nodo pueden viajar juntos en un
+paquete (bundle), precedidos de su longitud (big-endian):
+
+    magic (B) | longitud (H) | datagrama | longitud (H) | datagrama | ...
 """
 
+import heapq
+import itertools
+from abc import ABC, abstractmethod
+import select
 import socket
+import struct
 import threading
-from typing import Callable, Optional, Tuple
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Hashable, Optional, Tuple
+from codec import CODEC_BINARY, CODEC_JSON, encode_message, decode_message
 from config import (
-    PAXOS_PORT, ALL_NODE_IPS, SOCKET_TIMEOUT,
-    serialize_message, deserialize_message, log_message
+    ALL_NODE_IPS, SOCKET_TIMEOUT, WIRE_CODEC, RECV_BUFFER_SIZE,
+    SOCKET_BUFFER_SIZE, MAX_DATAGRAM_SIZE, BULK_IO, RECV_BATCH_SIZE,
+    Message, log_message, parse_address
 )
+from fragmentation import Fragmenter, Reassembler, is_fragment
+from metrics import LabeledCounter
+
+BUNDLE_MAGIC = 0xBD  # Distinto de los magic binario (0xB7), fragmento (0xF7) y '{'
+BUNDLE_LENGTH = struct.Struct("!H")
+
+
+def is_bundle(data) -> bool:
+    """Indica si un datagrama agrupa varios datagramas."""
+    return len(data) > 0 and data[0] == BUNDLE_MAGIC
+
+
+def pack_bundles(datagrams: list[bytes]) -> list[bytes]:
+    """
+    Agrupa datagramas en paquetes de hasta MAX_DATAGRAM_SIZE bytes.
+
+    Los datagramas que no caben con otros (fragmentos) se envían tal cual,
+    y un grupo de un solo datagrama no lleva cabecera.
+    """
+    packets = []
+    group: list[bytes] = []
+    size = 1
+    for datagram in datagrams:
+        needed = BUNDLE_LENGTH.size + len(datagram)
+        if group and size + needed > MAX_DATAGRAM_SIZE:
+            packets.append(_bundle(group))
+            group, size = [], 1
+        group.append(datagram)
+        size += needed
+    if group:
+        packets.append(_bundle(group))
+    return packets
+
+
+def _bundle(group: list[bytes]) -> bytes:
+    """Serializa un grupo de datagramas (sin cabecera si es uno solo)."""
+    if len(group) == 1:
+        return group[0]
+    parts = [bytes((BUNDLE_MAGIC,))]
+    for datagram in group:
+        parts.append(BUNDLE_LENGTH.pack(len(datagram)))
+        parts.append(datagram)
+    return b"".join(parts)
+
+
+def unpack_bundle(data: bytes) -> list[bytes]:
+    """Separa los datagramas de un paquete agrupado."""
+    datagrams = []
+    offset = 1
+    while offset < len(data):
+        (length,) = BUNDLE_LENGTH.unpack_from(data, offset)
+        offset += BUNDLE_LENGTH.size
+        if offset + length > len(data):
+            raise ValueError("Paquete agrupado truncado")
+        datagrams.append(data[offset:offset + length])
+        offset += length
+    return datagrams
+
+
+class BufferPool:
+    """
+    Búferes de recepción reutilizables.
+
+    Cada búfer es un `memoryview` sobre un `bytearray` preasignado: el
+    datagrama se lee en él con `recv*_into` y se decodifica sin copiarlo.
+    El búfer vuelve al pool (`release`) cuando los handlers terminaron con
+    el datagrama; el códec y el reensamblador copian lo que conservan.
+    """
+
+    def __init__(self, buffer_size: int, count: int):
+        self.buffer_size = buffer_size
+        self.allocated = count
+        self._free: deque = deque(memoryview(bytearray(buffer_size)) for _ in range(count))
+
+    def acquire(self) -> memoryview:
+        """Toma un búfer libre (o crea uno si el pool está vacío)."""
+        try:
+            return self._free.pop()
+        except IndexError:
+            self.allocated += 1
+            return memoryview(bytearray(self.buffer_size))
 
+    def release(self, buffer: memoryview):
+        """Devuelve un búfer al pool."""
+        self._free.append(buffer)
 
-class PaxosNetwork:
+
+class BaseNetwork(ABC):
+    """
+    Lógica común a los motores de red Paxos.
+
+    Se encarga de la negociación de códec, la fragmentación y el
+    reensamblado, y la difusión a los demás nodos. Cada motor (hilos,
+    asyncio, red simulada) implementa `start`, `stop`, `call_later` y
+    `_sendto`; el simulado implementa además su propio reloj
+    (`monotonic`, `time`).
+    """
+
+    def __init__(self, local_ip: str, message_handler: Callable[[Message, str], None],
+                 codec: str = WIRE_CODEC, members: Optional[list[str]] = None):
+        """
+        Inicializa la lógica común de red.
+
+        Args:
+            local_ip: IP local del nodo (IP de ZeroTier)
+            message_handler: Función callback para procesar mensajes recibidos
+            codec: Códec preferido (CODEC_BINARY o CODEC_JSON)
+            members: IPs de todos los nodos del cluster (por defecto
+                ALL_NODE_IPS); "IP:puerto" si no usan PAXOS_PORT
+        """
+        self.local_ip = local_ip
+        self.message_handler = message_handler
+        self.members = list(members or ALL_NODE_IPS)
+        self.running = False
+
+        # Direcciones de socket: cada nodo envía desde el mismo puerto en
+        # el que escucha, así que un emisor listado como "IP:puerto" se
+        # reconoce por su dirección completa y los demás por su IP
+        self.address = parse_address(local_ip)
+        self.addresses: dict[str, Tuple[str, int]] = {}
+        self.member_set = set(self.members)
+        self.members_with_port = any(":" in member for member in self.members)
+
+        # Negociación de códec: cada par recibe binario solo después de
+        # haber anunciado que lo acepta; mientras tanto se usa JSON.
+        self.codec = codec
+        self.peer_codecs: dict[str, str] = {}
+
+        # Fragmentación de mensajes mayores que un datagrama
+        self.fragmenter = Fragmenter()
+        self.reassembler = Reassembler()
+
+        # Mensajes enviados a cada nodo (ver metrics.py)
+        self.messages_sent = LabeledCounter()
+
+    @abstractmethod
+    def start(self):
+        """Comienza a recibir mensajes."""
+
+    @abstractmethod
+    def stop(self):
+        """Detiene la red y libera recursos."""
+
+    @abstractmethod
+    def call_later(self, delay: float, callback: Callable[[], None]) -> "TimerHandle":
+        """
+        Programa `callback` para ejecutarse tras `delay` segundos.
+
+        Returns:
+            Handle que permite cancelar el temporizador
+        """
+
+    @abstractmethod
+    def _sendto(self, datagram: bytes, target_ip: str):
+        """Envía un datagrama ya codificado."""
+
+    def resolve(self, target_ip: str) -> Tuple[str, int]:
+        """Dirección de socket (IP, puerto) de un nodo."""
+        address = self.addresses.get(target_ip)
+        if address is None:
+            address = self.addresses[target_ip] = parse_address(target_ip)
+        return address
+
+    def sender_of(self, addr: tuple) -> str:
+        """Nodo que envió un datagrama desde la dirección de socket `addr`."""
+        if self.members_with_port:
+            node = f"{addr[0]}:{addr[1]}"
+            if node in self.member_set:
+                return node
+        return addr[0]
+
+    def monotonic(self) -> float:
+        """Reloj monótono para timeouts, leases y RTT (segundos)."""
+        return time.monotonic()
+
+    def time(self) -> float:
+        """Hora actual (segundos desde epoch), para los números de propuesta."""
+        return time.time()
+
+    def _process_datagram(self, data, sender_ip: str):
+        """
+        Procesa un datagrama recibido: reensambla, decodifica y llama al handler.
+
+        Args:
+            data: Datagrama recibido (bytes o memoryview de un búfer del pool)
+            sender_ip: IP del emisor
+        """
+        # Ignorar mensajes propios
+        if sender_ip == self.local_ip:
+            return
+
+        # Paquete con varios datagramas: procesar cada uno
+        if is_bundle(data):
+            for datagram in unpack_bundle(data):
+                self._process_datagram(datagram, sender_ip)
+            return
+
+        # Reensamblar mensajes fragmentados
+        if is_fragment(data):
+            data = self.reassembler.add(sender_ip, data)
+            if data is None:
+                return
+
+        # Deserializar y procesar mensaje
+        message, accepts_binary = decode_message(data)
+        self.peer_codecs[sender_ip] = CODEC_BINARY if accepts_binary else CODEC_JSON
+        log_message("RECV", "De %s: %s (prop#%s)", sender_ip, message['type'], message['proposal_num'])
+
+        # Llamar al handler del nodo Paxos
+        self.message_handler(message, sender_ip)
+
+    def codec_for(self, target_ip: str) -> str:
+        """Códec a usar con un par según la negociación."""
+        if self.codec == CODEC_JSON:
+            return CODEC_JSON
+        return self.peer_codecs.get(target_ip, CODEC_JSON)
+
+    def _encode(self, message: Message, codec: str) -> list[bytes]:
+        """Codifica un mensaje y lo divide en datagramas."""
+        data = encode_message(message, codec, advertise_binary=self.codec == CODEC_BINARY)
+        return self.fragmenter.split(data)
+
+    def send_to(self, message: Message, target_ip: str,
+                datagrams: Optional[list[bytes]] = None):
+        """
+        Envía un mensaje a un nodo específico.
+        
+        Args:
+            message: Mensaje Paxos
+            target_ip: IP destino
+            datagrams: Datagramas ya codificados (para reutilizar en difusión)
+        """
+        try:
+            if datagrams is None:
+                datagrams = self._encode(message, self.codec_for(target_ip))
+            for datagram in datagrams:
+                self._sendto(datagram, target_ip)
+            self.messages_sent.inc(target_ip)
+            log_message("SEND", "A %s: %s (prop#%s)", target_ip, message['type'], message['proposal_num'])
+        except Exception as e:
+            log_message("ERROR", f"Error enviando a {target_ip}: {e}")
+    
+    def broadcast(self, message: Message, exclude_self: bool = True):
+        """
+        Envía un mensaje a todos los nodos del cluster.
+
+        El mensaje se codifica una sola vez por códec.
+        
+        Args:
+            message: Mensaje Paxos
+            exclude_self: Si True, no envía al propio nodo
+        """
+        encoded: dict[str, list[bytes]] = {}
+        for ip in self.members:
+            if exclude_self and ip == self.local_ip:
+                continue
+            codec = self.codec_for(ip)
+            try:
+                if codec not in encoded:
+                    encoded[codec] = self._encode(message, codec)
+            except Exception as e:
+                log_message("ERROR", f"Error codificando {message['type']}: {e}")
+                return
+            self.send_to(message, ip, encoded[codec])
+    
+    def send_to_all_acceptors(self, message: Message):
+        """
+        Envía un mensaje a todos los acceptors (todos los nodos excepto yo).
+        En nuestra implementación, todos los nodos son acceptors.
+        """
+        self.broadcast(message, exclude_self=True)
+
+
+class PaxosNetwork(BaseNetwork):
     """
     Maneja la comunicación de red UDP para el protocolo Paxos.
     
-    Utiliza dos sockets:
-    - Uno para envío de mensajes
-    - Uno para recepción con un hilo dedicado
+    Utiliza un único socket, vinculado a la dirección del nodo, para
+    recibir (con un hilo dedicado) y enviar: así los demás nodos ven como
+    origen el puerto en el que este escucha.
+
+    Los datagramas se leen en búferes de un `BufferPool` y se decodifican
+    desde el propio búfer, sin copias intermedias. En modo de E/S por lotes
+    (`bulk_io`), cada vez que el socket tiene datos se leen todos los
+    datagramas disponibles, y lo que el hilo de recepción envía mientras
+    los procesa se encola y se envía al final, agrupado por nodo destino.
     """
     
-    def __init__(self, local_ip: str, message_handler: Callable[[dict, str], None]):
+    def __init__(self, local_ip: str, message_handler: Callable[[Message, str], None],
+                 codec: str = WIRE_CODEC, bulk_io: bool = BULK_IO,
+                 members: Optional[list[str]] = None):
         """
         Inicializa la capa de red.
         
         Args:
             local_ip: IP local del nodo (IP de ZeroTier)
             message_handler: Función callback para procesar mensajes recibidos
+            codec: Códec preferido (CODEC_BINARY o CODEC_JSON)
+            bulk_io: Leer y enviar datagramas por lotes
+            members: IPs de todos los nodos del cluster
         """
-        self.local_ip = local_ip
-        self.message_handler = message_handler
-        self.running = False
-        
-        # Socket para envío
-        self.send_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.send_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        super().__init__(local_ip, message_handler, codec, members)
+        self.bulk_io = bulk_io
         
-        # Socket para recepción
-        self.recv_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.recv_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        self.recv_socket.settimeout(SOCKET_TIMEOUT)
+        # Socket de envío y recepción
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        # No bloqueante: la espera se hace con select y luego se vacía
+        self.sock.setblocking(False)
+        try:
+            # Búfer amplio: un mensaje grande llega como ráfaga de fragmentos
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_SIZE)
+        except OSError:
+            pass
         
         # Hilo de recepción
         self.receiver_thread: Optional[threading.Thread] = None
+
+        # Búferes de recepción reutilizables y, en E/S por lotes, datagramas
+        # salientes del hilo de recepción pendientes por destino
+        self.recv_batch = RECV_BATCH_SIZE if bulk_io else 1
+        self.buffer_pool = BufferPool(RECV_BUFFER_SIZE, self.recv_batch)
+        self.send_queues: dict[str, list[bytes]] = {}
+        self.corked = False
+
+        # Temporizadores (timeouts de las instancias en curso)
+        self.timers = TimerScheduler()
         
-        log_message("INFO", f"Red inicializada en {local_ip}:{PAXOS_PORT}")
+        host, port = self.address
+        log_message("INFO", f"Red inicializada en {host}:{port}")
     
     def start(self):
         """Inicia el hilo de recepción de mensajes."""
+        host, port = self.address
         try:
             # Intentar bind a la IP específica de ZeroTier
-            self.recv_socket.bind((self.local_ip, PAXOS_PORT))
-            log_message("INFO", f"Socket de recepción vinculado a {self.local_ip}:{PAXOS_PORT}")
+            self.sock.bind((host, port))
+            log_message("INFO", f"Socket vinculado a {host}:{port}")
         except OSError as e:
             # Si falla, intentar bind a todas las interfaces
-            log_message("WARN", f"No se pudo vincular a {self.local_ip}, usando 0.0.0.0")
-            self.recv_socket.bind(('0.0.0.0', PAXOS_PORT))
+            log_message("WARN", f"No se pudo vincular a {host}, usando 0.0.0.0")
+            self.sock.bind(('0.0.0.0', port))
         
         self.running = True
         self.receiver_thread = threading.Thread(target=self._receive_loop, daemon=True)
         self.receiver_thread.start()
+        self.timers.start()
         log_message("SUCCESS", "Hilo de recepción iniciado")
     
     def stop(self):
         """Detiene la capa de red y libera recursos."""
         self.running = False
+        self.timers.stop()
         if self.receiver_thread:
             self.receiver_thread.join(timeout=2.0)
-        self.send_socket.close()
-        self.recv_socket.close()
+        self.sock.close()
         log_message("INFO", "Red detenida")
     
     def _receive_loop(self):
         """Bucle principal de recepción de mensajes (ejecuta en hilo separado)."""
         while self.running:
             try:
-                data, addr = self.recv_socket.recvfrom(4096)
-                sender_ip = addr[0]
-                
-                # Ignorar mensajes propios
-                if sender_ip == self.local_ip:
+                readable, _, _ = select.select([self.sock], [], [], SOCKET_TIMEOUT)
+                if not readable:
+                    # Timeout normal, continuar esperando
                     continue
-                
-                # Deserializar y procesar mensaje
-                message = deserialize_message(data)
-                log_message("RECV", f"De {sender_ip}: {message['type']} (prop#{message['proposal_num']})")
-                
-                # Llamar al handler del nodo Paxos
-                self.message_handler(message, sender_ip)
-                
-            except socket.timeout:
-                # Timeout normal, continuar esperando
-                continue
+                self._receive_batch()
             except Exception as e:
                 if self.running:
                     log_message("ERROR", f"Error recibiendo mensaje: {e}")
-    
-    def send_to(self, message: dict, target_ip: str):
+
+    def _recv_into(self, buffer: memoryview) -> Tuple[int, str]:
+        """Lee un datagrama en `buffer`; retorna (bytes leídos, nodo emisor)."""
+        if hasattr(self.sock, "recvmsg_into"):
+            nbytes, _, _, addr = self.sock.recvmsg_into([buffer])
+        else:
+            # Windows no tiene recvmsg_into
+            nbytes, addr = self.sock.recvfrom_into(buffer)
+        return nbytes, self.sender_of(addr)
+
+    def _receive_batch(self):
         """
-        Envía un mensaje a un nodo específico.
-        
-        Args:
-            message: Diccionario con el mensaje Paxos
-            target_ip: IP destino
+        Lee los datagramas disponibles (hasta `recv_batch`) en búferes del
+        pool y los procesa. En E/S por lotes, las respuestas generadas se
+        envían de una vez al final.
         """
+        received = []
+        while len(received) < self.recv_batch:
+            buffer = self.buffer_pool.acquire()
+            try:
+                nbytes, sender_ip = self._recv_into(buffer)
+            except (BlockingIOError, InterruptedError):
+                self.buffer_pool.release(buffer)
+                break
+            except Exception:
+                self.buffer_pool.release(buffer)
+                raise
+            received.append((buffer, nbytes, sender_ip))
+
+        self.corked = self.bulk_io
         try:
-            data = serialize_message(message)
-            self.send_socket.sendto(data, (target_ip, PAXOS_PORT))
-            log_message("SEND", f"A {target_ip}: {message['type']} (prop#{message['proposal_num']})")
-        except Exception as e:
-            log_message("ERROR", f"Error enviando a {target_ip}: {e}")
-    
-    def broadcast(self, message: dict, exclude_self: bool = True):
+            for buffer, nbytes, sender_ip in received:
+                try:
+                    self._process_datagram(buffer[:nbytes], sender_ip)
+                except Exception as e:
+                    log_message("ERROR", f"Error procesando mensaje de {sender_ip}: {e}")
+                finally:
+                    # Los handlers ya terminaron: el búfer puede reutilizarse
+                    self.buffer_pool.release(buffer)
+        finally:
+            self.corked = False
+            self._flush()
+
+    def _sendto(self, datagram: bytes, target_ip: str):
         """
-        Envía un mensaje a todos los nodos del cluster.
-        
-        Args:
-            message: Diccionario con el mensaje Paxos
-            exclude_self: Si True, no envía al propio nodo
+        Envía un datagrama por el socket del nodo. Desde el hilo de
+        recepción, durante un lote, solo lo encola.
         """
-        for ip in ALL_NODE_IPS:
-            if exclude_self and ip == self.local_ip:
+        if self.corked and threading.current_thread() is self.receiver_thread:
+            self.send_queues.setdefault(target_ip, []).append(datagram)
+            return
+        self._send(datagram, target_ip)
+
+    def _send(self, datagram: bytes, target_ip: str):
+        """Envía por el socket no bloqueante, esperando si su búfer está lleno."""
+        address = self.resolve(target_ip)
+        try:
+            self.sock.sendto(datagram, address)
+        except BlockingIOError:
+            select.select([], [self.sock], [], SOCKET_TIMEOUT)
+            self.sock.sendto(datagram, address)
+
+    def _flush(self):
+        """Envía los datagramas encolados, agrupados por destino."""
+        if not self.send_queues:
+            return
+        queues, self.send_queues = self.send_queues, {}
+        for target_ip, datagrams in queues.items():
+            # Solo los nodos que hablan binario entienden los paquetes agrupados
+            if len(datagrams) > 1 and self.peer_codecs.get(target_ip) == CODEC_BINARY:
+                datagrams = pack_bundles(datagrams)
+            for datagram in datagrams:
+                try:
+                    self._send(datagram, target_ip)
+                except OSError as e:
+                    log_message("ERROR", f"Error enviando a {target_ip}: {e}")
+
+    def call_later(self, delay: float, callback: Callable[[], None]) -> "TimerHandle":
+        """Programa un temporizador en el hilo de temporizadores."""
+        return self.timers.call_later(delay, callback)
+
+
+class TimerHandle:
+    """Temporizador programado en un TimerScheduler."""
+
+    __slots__ = ("deadline", "callback", "cancelled")
+
+    def __init__(self, deadline: float, callback: Callable[[], None]):
+        self.deadline = deadline
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        """Cancela el temporizador si aún no se ha ejecutado."""
+        self.cancelled = True
+
+
+class TimerScheduler:
+    """
+    Ejecuta temporizadores en un único hilo usando un heap.
+
+    Permite tener miles de instancias Paxos en curso con su propio
+    timeout sin crear un hilo por cada una.
+    """
+
+    def __init__(self):
+        self._heap: list = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Inicia el hilo de temporizadores."""
+        with self._cond:
+            self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Detiene el hilo descartando los temporizadores pendientes."""
+        with self._cond:
+            self._running = False
+            self._heap.clear()
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+
+    def call_later(self, delay: float, callback: Callable[[], None]) -> TimerHandle:
+        """Programa `callback` para ejecutarse tras `delay` segundos."""
+        handle = TimerHandle(time.monotonic() + delay, callback)
+        with self._cond:
+            heapq.heappush(self._heap, (handle.deadline, next(self._counter), handle))
+            if self._heap[0][2] is handle:
+                self._cond.notify()
+        return handle
+
+    def _run(self):
+        """Bucle del hilo: espera al siguiente vencimiento y lo ejecuta."""
+        while True:
+            with self._cond:
+                while self._running:
+                    if self._heap:
+                        wait = self._heap[0][0] - time.monotonic()
+                        if wait <= 0:
+                            break
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+                if not self._running:
+                    return
+                _, _, handle = heapq.heappop(self._heap)
+
+            if handle.cancelled:
                 continue
-            self.send_to(message, ip)
-    
-    def send_to_all_acceptors(self, message: dict):
+            try:
+                handle.callback()
+            except Exception as e:
+                log_message("ERROR", f"Error en temporizador: {e}")
+
+
+class ReplyCache:
+    """
+    Respuestas recientes por petición, para suprimir duplicados.
+
+    Cuando el proposer retransmite una petición cuya respuesta se perdió,
+    el receptor reenvía la respuesta guardada en lugar de procesarla otra
+    vez (sin otra escritura en el WAL ni otra propuesta). Las entradas más
+    antiguas se descartan al superar `capacity`.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def seen(self, key: Hashable) -> Tuple[bool, Optional[Message]]:
         """
-        Envía un mensaje a todos los acceptors (todos los nodos excepto yo).
-        En nuestra implementación, todos los nodos son acceptors.
+        Registra una petición.
+
+        Returns:
+            (duplicada, respuesta): si la petición ya se había recibido y su
+            respuesta (None si todavía se está procesando)
         """
-        self.broadcast(message, exclude_self=True)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return True, self._entries[key]
+            self._entries[key] = None
+            if len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+            return False, None
+
+    def store(self, key: Hashable, reply: Message):
+        """Guarda la respuesta enviada para una petición."""
+        with self._lock:
+            self._entries[key] = reply
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
 
 
 class ResponseCollector:
@@ -141,9 +605,16 @@ class ResponseCollector:
     Recolecta respuestas de múltiples nodos con timeout.
     
     Utilizado por el Proposer para esperar respuestas PROMISE y ACCEPTED.
+    Se puede esperar de forma bloqueante (`wait_for_quorum`) o registrar
+    un callback `on_done(collector, success)` que se invoca una sola vez al
+    alcanzar quórum, al vencer el timeout (`expire`) o en cuanto los NACK
+    hacen imposible el quórum.
     """
     
-    def __init__(self, expected_type: str, proposal_num: int, quorum_size: int):
+    def __init__(self, expected_type: str, proposal_num: int, quorum_size: int,
+                 slot: int = 0,
+                 on_done: Optional[Callable[["ResponseCollector", bool], None]] = None,
+                 total_nodes: int = len(ALL_NODE_IPS)):
         """
         Inicializa el recolector.
         
@@ -151,17 +622,33 @@ class ResponseCollector:
             expected_type: Tipo de mensaje esperado (PROMISE, ACCEPTED)
             proposal_num: Número de propuesta asociado
             quorum_size: Cantidad de respuestas necesarias para quórum
+            slot: Slot del log al que corresponden las respuestas
+            on_done: Callback invocado al terminar (quórum, timeout o NACKs)
+            total_nodes: Cantidad de acceptors que pueden responder
         """
         self.expected_type = expected_type
         self.proposal_num = proposal_num
+        self.slot = slot
         self.quorum_size = quorum_size
+        self.total_nodes = total_nodes
+        self.on_done = on_done
+        self.timer: Optional[TimerHandle] = None
+
+        # Retransmisión: mensaje enviado, cuándo, y a qué nodos se reenvió
+        # (sus respuestas ya no sirven para medir el RTT)
+        self.request: Optional[Message] = None
+        self.started_at = time.monotonic()
+        self.retransmitted: set[str] = set()
+        self.retransmit_timer: Optional[TimerHandle] = None
         
-        self.responses: list[dict] = []
-        self.nacks: list[dict] = []
+        self.responses: list[Message] = []
+        self.nacks: list[Message] = []
+        self.highest_promised = 0  # Mayor propuesta prometida según los NACK
+        self.done = False
         self.lock = threading.Lock()
         self.quorum_event = threading.Event()
     
-    def add_response(self, message: dict, sender: str):
+    def add_response(self, message: Message, sender: str):
         """
         Añade una respuesta recibida.
         
@@ -169,24 +656,63 @@ class ResponseCollector:
             message: Mensaje recibido
             sender: IP del nodo que envió la respuesta
         """
+        completed = False
+        rejected = False
         with self.lock:
             # Verificar que sea para nuestra propuesta
             if message.get('proposal_num') != self.proposal_num:
                 return
+            if (message.get('slot') or 0) != self.slot:
+                return
             
             if message['type'] == self.expected_type:
                 # Evitar duplicados del mismo sender
                 if not any(r.get('sender') == sender for r in self.responses):
                     message['sender'] = sender
                     self.responses.append(message)
-                    log_message("INFO", f"Respuesta {len(self.responses)}/{self.quorum_size} de {sender}")
+                    log_message("INFO", "Respuesta %d/%d de %s", len(self.responses), self.quorum_size, sender)
                     
                     # Verificar si alcanzamos quórum
-                    if len(self.responses) >= self.quorum_size:
+                    if len(self.responses) >= self.quorum_size and not self.done:
+                        self.done = True
+                        completed = True
                         self.quorum_event.set()
             
             elif message['type'] == 'NACK':
-                self.nacks.append(message)
+                if not any(n.get('sender') == sender for n in self.nacks):
+                    message['sender'] = sender
+                    self.nacks.append(message)
+                    self.highest_promised = max(
+                        self.highest_promised, message.get('promised_proposal') or 0)
+
+                    # Con tantos rechazos ya no hay quórum posible: no
+                    # esperar al timeout
+                    if len(self.nacks) > self.total_nodes - self.quorum_size and not self.done:
+                        self.done = True
+                        rejected = True
+
+        if completed:
+            self._finish(True)
+        elif rejected:
+            log_message("WARN", f"{len(self.nacks)} NACK recibidos, quórum imposible")
+            self._finish(False)
+
+    def expire(self):
+        """Marca el recolector como fallido si aún no alcanzó quórum."""
+        with self.lock:
+            if self.done:
+                return
+            self.done = True
+        self._finish(False)
+
+    def _finish(self, success: bool):
+        """Cancela los timers e invoca el callback (fuera del lock)."""
+        if self.timer:
+            self.timer.cancel()
+        if self.retransmit_timer:
+            self.retransmit_timer.cancel()
+        if self.on_done:
+            self.on_done(self, success)
     
     def wait_for_quorum(self, timeout: float) -> bool:
         """
@@ -200,11 +726,17 @@ class ResponseCollector:
         """
         return self.quorum_event.wait(timeout)
     
-    def get_responses(self) -> list[dict]:
+    def get_responses(self) -> list[Message]:
         """Retorna las respuestas recolectadas."""
         with self.lock:
             return list(self.responses)
     
+    def responders(self) -> set[str]:
+        """Nodos que ya respondieron (con la respuesta esperada o NACK)."""
+        with self.lock:
+            return ({r.get('sender') for r in self.responses}
+                    | {n.get('sender') for n in self.nacks})
+
     def has_quorum(self) -> bool:
         """Verifica si se alcanzó el quórum."""
         with self.lock:
@@ -222,7 +754,7 @@ if __name__ == "__main__":
     
     local_ip = sys.argv[1]
     
-    def test_handler(msg: dict, sender: str):
+    def test_handler(msg: Message, sender: str):
         print(f"\n>>> Mensaje recibido de {sender}:")
         print(f"    Tipo: {msg['type']}")
         print(f"    Propuesta: {msg['proposal_num']}")
@@ -6,15 +6,40 @@ Este módulo implementa un nodo Paxos completo que puede actuar
 como Proposer, Acceptor y Learner simultáneamente.
 """
 
+import asyncio
+import base64
 import threading
 import time
-from typing import Optional, Any
+from collections import deque
+from concurrent.futures import Future
+from typing import Optional, Any, Callable, Union
 from config import (
-    MessageType, QUORUM_SIZE, PREPARE_TIMEOUT, ACCEPT_TIMEOUT,
-    create_message, generate_proposal_number, get_node_id_from_ip,
-    log_message, Colors
+    MessageType, PREPARE_TIMEOUT, ACCEPT_TIMEOUT, MULTI_PAXOS,
+    PIPELINE_WINDOW, LEARN_MODE, LEARN_BATCH_DELAY_MS, LEASES_ENABLED,
+    LEASE_DURATION, LEASE_CLOCK_DRIFT, ELECTION_ENABLED, HEARTBEAT_INTERVAL,
+    MAX_RETRIES, PHASE_TIMEOUT_RTOS, PHASE_TIMEOUT_MIN, RTO_MAX, REPLY_CACHE_SIZE,
+    BATCHING_ENABLED, NETWORK_ENGINE, DISPATCH_WORKERS, ACCEPTOR_LOCK_STRIPES, WAL_DIR, SNAPSHOT_DIR,
+    SNAPSHOT_INTERVAL, SNAPSHOT_TRANSFER_TIMEOUT, CATCHUP_BATCH_SLOTS,
+    CATCHUP_MAX_BYTES, CATCHUP_PARALLEL, CATCHUP_DELAY, CATCHUP_TIMEOUT, METRICS_PORT,
+    ALL_NODE_IPS, Message, create_message, generate_proposal_number,
+    get_node_id, log_message, Colors
 )
-from network import PaxosNetwork, ResponseCollector
+from batching import RequestBatcher, estimate_size, unpack_values
+from codec import CODEC_JSON
+from dispatcher import ShardedDispatcher
+from election import PhiAccrualDetector, backoff_delay
+from instance_log import InstanceLog, SlotLocks
+from metrics import MetricsRegistry, MetricsServer
+from async_network import AsyncPaxosNetwork
+from network import BaseNetwork, PaxosNetwork, ReplyCache, ResponseCollector, TimerHandle
+from rtt import RttTable
+from snapshot import Snapshot, SnapshotAssembler, SnapshotStore
+from state_machine import RegisterStateMachine, StateMachine
+from wal import WriteAheadLog, REC_PROMISE, REC_ACCEPT
+
+
+class NotLeaderError(RuntimeError):
+    """La operación requiere que el nodo sea el líder."""
 
 
 class PaxosNode:
@@ -25,57 +50,310 @@ class PaxosNode:
     - Learner: Aprende el valor acordado
     """
 
-    def __init__(self, local_ip: str):
+    def __init__(self, local_ip: str, multi_paxos: bool = MULTI_PAXOS,
+                 pipeline_window: int = PIPELINE_WINDOW,
+                 learn_mode: str = LEARN_MODE,
+                 leases: bool = LEASES_ENABLED,
+                 election: bool = ELECTION_ENABLED,
+                 batching: bool = BATCHING_ENABLED,
+                 engine: Union[str, Callable[..., BaseNetwork]] = NETWORK_ENGINE,
+                 dispatch_workers: int = DISPATCH_WORKERS,
+                 members: Optional[list[str]] = None,
+                 wal_dir: Optional[str] = WAL_DIR,
+                 state_machine: Optional[StateMachine] = None,
+                 snapshot_dir: Optional[str] = SNAPSHOT_DIR,
+                 snapshot_interval: int = SNAPSHOT_INTERVAL,
+                 metrics_port: Optional[int] = METRICS_PORT):
         """
         Inicializa el nodo Paxos.
 
         Args:
             local_ip: Dirección IP del nodo en la red ZeroTier
+            multi_paxos: Si es True, conserva el liderazgo tras la Fase 1
+                y solo ejecuta la Fase 2 para los valores siguientes
+            pipeline_window: Máximo de instancias en curso a la vez
+            learn_mode: "leader" (el líder avisa con LEARN por lotes) o
+                "acceptors" (los acceptors envían ACCEPTED a todos)
+            leases: Si es True (y multi_paxos), el líder mantiene un lease
+                para atender lecturas locales (ver `read`)
+            election: Si es True (y multi_paxos), hay un líder estable:
+                los demás nodos le reenvían sus valores y solo inician la
+                Fase 1 cuando el detector de fallos lo da por caído
+            batching: Si es True, agrupa los valores de `submit`/`propose`
+                en lotes antes de proponerlos
+            engine: Motor de red: "thread" (PaxosNetwork), "asyncio"
+                (AsyncPaxosNetwork) o una función con la firma de sus
+                constructores, `(local_ip, handler, members=...)`, que cree
+                otro `BaseNetwork` (p. ej. `SimulatedNetwork.attach`)
+            dispatch_workers: Hilos que procesan los mensajes recibidos,
+                repartidos por slot (0 = el propio hilo de recepción)
+            members: IPs de todos los nodos del cluster, incluido este
+                (por defecto ALL_NODE_IPS); el quórum es su mayoría
+            wal_dir: Directorio del write-ahead log del acceptor. Si es
+                None, el estado del acceptor solo vive en memoria.
+            state_machine: Máquina de estados a la que se aplican los
+                valores decididos (por defecto, RegisterStateMachine)
+            snapshot_dir: Directorio de snapshots. Si es None, los
+                snapshots solo viven en memoria y el WAL no se trunca.
+            snapshot_interval: Slots aplicados entre snapshots (0 = nunca)
+            metrics_port: Puerto del endpoint HTTP de métricas (formato
+                Prometheus); None = sin endpoint
+
+        Raises:
+            ValueError: Si la membresía repite un nodo, tiene más de 100 o
+                no incluye a `local_ip`
         """
         self.local_ip = local_ip
-        self.node_id = get_node_id_from_ip(local_ip)
+        self.multi_paxos = multi_paxos
+        self.pipeline_window = pipeline_window
+        self.learn_mode = learn_mode
+        # Sin Multi-Paxos no hay un líder estable que sostenga el lease
+        self.leases = leases and multi_paxos
+        self.election = election and multi_paxos
+        self.members = list(members or ALL_NODE_IPS)
+        self.node_id = get_node_id(local_ip, self.members)
+        self.quorum_size = len(self.members) // 2 + 1
+        self.peers = [ip for ip in self.members if ip != self.local_ip]
+
+        # === Red ===
+        # Se crea antes que el estado porque su reloj (real o simulado) es
+        # el de todo el nodo; empieza a recibir en `start`
+        self.dispatcher: Optional[ShardedDispatcher] = None
+        handler = self._handle_message
+        if dispatch_workers > 0:
+            self.dispatcher = ShardedDispatcher(self._handle_message, dispatch_workers)
+            handler = self.dispatcher.dispatch
+        if callable(engine):
+            self.network = engine(local_ip, handler, members=self.members)
+        elif engine == "asyncio":
+            self.network = AsyncPaxosNetwork(local_ip, handler, members=self.members)
+        else:
+            self.network = PaxosNetwork(local_ip, handler, members=self.members)
 
         # === Estado del Acceptor ===
-        self.promised_proposal: int = 0  # Mayor propuesta prometida
-        self.accepted_proposal: int = 0  # Propuesta aceptada
-        self.accepted_value: Any = None  # Valor aceptado
+        self.promised_proposal: int = 0  # Mayor propuesta prometida (todos los slots)
+        self.accepted_log = InstanceLog()  # slot -> (propuesta, valor) aceptados
+        self.last_accepted_slot: int = -1
+        # Cada slot de accepted_log se protege con el lock de su franja; la
+        # Fase 1 toma todas. acceptor_lock solo cubre los campos globales
+        # (promesa, lease, último slot) y se toma después de las franjas.
+        self.slot_locks = SlotLocks(ACCEPTOR_LOCK_STRIPES)
         self.acceptor_lock = threading.Lock()
+        # Lease concedido: hasta `lease_granted_until` se rechaza el PREPARE
+        # de cualquier nodo distinto de `lease_holder`
+        self.lease_holder: Optional[str] = None
+        self.lease_granted_until: float = 0.0
+        self.wal: Optional[WriteAheadLog] = WriteAheadLog(wal_dir) if wal_dir else None
+        # Respuestas ya enviadas, para contestar retransmisiones
+        self.reply_cache = ReplyCache(REPLY_CACHE_SIZE)
 
         # === Estado del Learner ===
-        self.learned_value: Any = None   # Valor aprendido (consenso alcanzado)
+        self.learned_value: Any = None   # Último valor aprendido (consenso alcanzado)
         self.learned_proposal: int = 0
+        self.learned_slot: int = -1
+        self.learned_log = InstanceLog()  # slot -> (propuesta, valor) decididos
+        self.first_unchosen_slot: int = 0  # Primer slot sin valor decidido
         self.learner_lock = threading.Lock()
+        # Catch-up: slots decididos por otros nodos que aún faltan aquí
+        self.catchup_target: int = 0  # Hay un par con todo decidido antes de este slot
+        self.catchup_peer: Optional[str] = None
+        self.catchup_outstanding: int = 0  # Peticiones de rango sin respuesta
+        self.catchup_timer: Optional[TimerHandle] = None
+        # Modo "acceptors": slot -> [propuesta, acceptors que la aceptaron]
+        self.accepted_tally: dict[int, list] = {}
 
         # === Estado del Proposer ===
         self.current_proposal: int = 0
+        self.ballot_floor: int = 0   # Mayor propuesta ajena conocida (por NACK)
+        self.leader_ballot: int = 0  # Propuesta con Fase 1 ganada (0 = no líder)
+        self.next_slot: int = 0      # Siguiente slot libre para proponer
+        self.phase1_in_progress = False
+        self.in_flight: int = 0      # Instancias en Fase 2 sin terminar
+        self.pending_values: deque = deque()  # (valor, future) en espera
+        self.collectors: dict[tuple[int, int], ResponseCollector] = {}
+        self.rtt = RttTable()  # RTT medido de cada acceptor remoto
+        self.learn_buffer: list = []  # [slot, propuesta, None] por anunciar
+        self.lease_expiry: float = 0.0  # Fin del lease del líder (reloj de la red)
+        self.heartbeat_timer: Optional[TimerHandle] = None
+        self.heartbeat_seq: int = 0
+        # Elección: líder conocido (por sus heartbeats) y detector de fallos
+        self.known_leader: Optional[str] = None
+        self.known_leader_ballot: int = 0
+        self.leader_detector = PhiAccrualDetector()
+        self.election_timer: Optional[TimerHandle] = None
+        self.phase1_attempts: int = 0  # Fases 1 fallidas seguidas
+        # Valores reenviados al líder: id -> [future, envío, retransmitido]
+        self.forwarded: dict[int, list] = {}
+        self.forward_rtt = RttTable()  # Ida y vuelta de un FORWARD (con Fase 2)
+        # Los ids parten del reloj para no repetir los de una ejecución
+        # anterior que el líder aún recuerde (supresión de duplicados)
+        self.forward_seq: int = int(self.network.time() * 1_000_000)
+        self.pending_reads: list = []  # Lecturas sin lease esperando confirmación
         self.proposer_lock = threading.Lock()
-        self.response_collector: Optional[ResponseCollector] = None
 
-        # === Red ===
-        self.network = PaxosNetwork(local_ip, self._handle_message)
-
-        # === Estadísticas ===
-        self.stats = {
-            "proposals_initiated": 0,
-            "proposals_accepted": 0,
-            "proposals_rejected": 0,
-            "messages_sent": 0,
-            "messages_received": 0
-        }
+        # === Máquina de estados y snapshots ===
+        self.state_machine = state_machine or RegisterStateMachine()
+        self.last_applied: int = -1  # Último slot aplicado a la máquina de estados
+        self.snapshot: Optional[Snapshot] = None
+        self.snapshot_interval = snapshot_interval
+        self.snapshot_store = SnapshotStore(snapshot_dir) if snapshot_dir else None
+        self.apply_lock = threading.Lock()
+        self.read_waiters: list = []  # (índice de lectura, consulta, future)
+        # Snapshot en transferencia desde otro nodo
+        self.snapshot_source: Optional[str] = None
+        self.snapshot_assembler: Optional[SnapshotAssembler] = None
+        self.snapshot_timer: Optional[TimerHandle] = None
+        self.transfer_lock = threading.Lock()
+
+        # === Recuperación tras reinicio ===
+        if self.snapshot_store:
+            snapshot = self.snapshot_store.load_latest()
+            if snapshot:
+                self.install_snapshot(snapshot, persist=False)
+        if self.wal:
+            self._recover_from_wal()
+
+        # === Batching de peticiones de clientes ===
+        self.batcher: Optional[RequestBatcher] = None
+        if batching:
+            self.batcher = RequestBatcher(self.propose_async, self.network.call_later)
+
+        # === Métricas (ver `stats` y metrics.py) ===
+        self.metrics = MetricsRegistry()
+        self._init_metrics()
+        self.metrics_server = MetricsServer(self.metrics, metrics_port) \
+            if metrics_port is not None else None
+        # Observadores de la duración de cada fase completada con éxito:
+        # listener(fase, segundos), con fase "phase1", "phase2" (una
+        # instancia) o "forward" (ida y vuelta de un valor reenviado)
+        self.phase_listeners: list[Callable[[str, float], None]] = []
 
         log_message(
             "SUCCESS", f"Nodo Paxos inicializado: {local_ip} (ID: {self.node_id})")
 
     def start(self):
         """Inicia el nodo y comienza a escuchar mensajes."""
+        if self.wal:
+            self.wal.start()
+        if self.dispatcher:
+            self.dispatcher.start()
         self.network.start()
+        if self.metrics_server:
+            self.metrics_server.start()
+        # Recuperar lo que se decidió mientras el nodo estaba caído
+        self.catch_up()
+        if self.election:
+            self.election_timer = self.network.call_later(HEARTBEAT_INTERVAL, self._election_tick)
         log_message("SUCCESS", "Nodo Paxos en funcionamiento")
 
     def stop(self):
         """Detiene el nodo y libera recursos."""
+        for timer in (self.election_timer, self.heartbeat_timer):
+            if timer:
+                timer.cancel()
         self.network.stop()
+        if self.metrics_server:
+            self.metrics_server.stop()
+        if self.dispatcher:
+            self.dispatcher.stop()
+        if self.wal:
+            self.wal.stop()
         log_message("INFO", "Nodo Paxos detenido")
 
+    def _recover_from_wal(self):
+        """Reconstruye el estado del acceptor a partir del WAL."""
+        records = 0
+        for kind, slot, proposal_num, value in self.wal.replay():
+            records += 1
+            self.promised_proposal = max(self.promised_proposal, proposal_num)
+            if slot < self.accepted_log.base:
+                continue  # Slot ya incluido en el snapshot
+            if kind == REC_ACCEPT and proposal_num >= self.accepted_log.proposal(slot):
+                self.accepted_log.set(slot, proposal_num, value)
+                self.last_accepted_slot = max(self.last_accepted_slot, slot)
+        if records:
+            log_message(
+                "SUCCESS", f"Estado del acceptor recuperado del WAL: {records} registros "
+                f"(promesa #{self.promised_proposal}, {len(self.accepted_log)} slots)")
+            if self.leases:
+                # Los leases concedidos antes de caer no se guardan: no
+                # prometer nada hasta que cualquiera de ellos haya vencido
+                self.lease_granted_until = self.network.monotonic() + LEASE_DURATION
+
+    def _init_metrics(self):
+        """
+        Registra las métricas del nodo: contadores (por hilo, sin locks),
+        latencias de cada fase y de compromiso, contadores por nodo remoto
+        y gauges de estado y de colas, que solo se leen al publicarlas.
+        """
+        metrics = self.metrics
+        self.counters = {
+            "proposals_initiated": metrics.counter(
+                "paxos_proposals_initiated_total", "Valores propuestos por este nodo"),
+            "proposals_accepted": metrics.counter(
+                "paxos_proposals_accepted_total", "Valores propuestos por este nodo y decididos"),
+            "proposals_rejected": metrics.counter(
+                "paxos_proposals_rejected_total", "Valores propuestos por este nodo y rechazados"),
+            "proposals_forwarded": metrics.counter(
+                "paxos_proposals_forwarded_total", "Valores reenviados al líder"),
+            "duplicates_suppressed": metrics.counter(
+                "paxos_duplicates_suppressed_total", "Peticiones retransmitidas ya atendidas"),
+        }
+        # Latencias: Fase 1, Fase 2 (una instancia), ida y vuelta de un
+        # valor reenviado, y de submit/propose hasta la decisión
+        self.phase_latency = {
+            "phase1": metrics.histogram("paxos_phase1_seconds", "Duración de la Fase 1"),
+            "phase2": metrics.histogram(
+                "paxos_phase2_seconds", "Duración de la Fase 2 de una instancia"),
+            "forward": metrics.histogram(
+                "paxos_forward_seconds", "Ida y vuelta de un valor reenviado al líder"),
+        }
+        self.commit_latency = metrics.histogram(
+            "paxos_commit_seconds", "Latencia de un valor de cliente hasta ser decidido")
+
+        # Por nodo remoto
+        metrics.labeled_counter("paxos_peer_messages_sent_total", "Mensajes enviados",
+                                "peer", self.network.messages_sent)
+        self.peer_counters = {
+            "messages_received": metrics.labeled_counter(
+                "paxos_peer_messages_received_total", "Mensajes recibidos", "peer"),
+            "retransmissions": metrics.labeled_counter(
+                "paxos_peer_retransmissions_total",
+                "Peticiones reenviadas por falta de respuesta (pérdidas)", "peer"),
+            "nacks": metrics.labeled_counter("paxos_peer_nacks_total", "NACK recibidos", "peer"),
+        }
+        for field, description in (("srtt", "RTT suavizado"), ("rttvar", "Variación del RTT"),
+                                   ("rto", "Timeout de retransmisión")):
+            metrics.gauge(f"paxos_peer_{field}_seconds", description,
+                          lambda key=f"{field}_ms": {
+                              peer: rtt[key] / 1000 for peer, rtt in self.rtt.stats().items()
+                              if rtt[key] is not None},
+                          label="peer")
+
+        # Estado del nodo y profundidad de las colas (lecturas sueltas, sin locks)
+        metrics.gauge("paxos_leader", "1 si este nodo es el líder",
+                      lambda: 1 if self.leader_ballot else 0)
+        metrics.gauge("paxos_next_slot", "Siguiente slot libre para proponer",
+                      lambda: self.next_slot)
+        metrics.gauge("paxos_first_unchosen_slot", "Primer slot sin valor decidido",
+                      lambda: self.first_unchosen_slot)
+        metrics.gauge("paxos_last_applied_slot", "Último slot aplicado a la máquina de estados",
+                      lambda: self.last_applied)
+        metrics.gauge("paxos_in_flight", "Instancias en Fase 2 sin terminar",
+                      lambda: self.in_flight)
+        metrics.gauge("paxos_pending_values", "Valores en espera de un slot",
+                      lambda: len(self.pending_values))
+        metrics.gauge("paxos_collectors", "Fases esperando respuestas",
+                      lambda: len(self.collectors))
+        metrics.gauge("paxos_forwarded_pending", "Valores reenviados sin respuesta del líder",
+                      lambda: len(self.forwarded))
+        metrics.gauge("paxos_batch_pending_values", "Valores en el lote en formación",
+                      lambda: len(self.batcher.values) if self.batcher else 0)
+        metrics.gauge("paxos_dispatch_queue_depth", "Mensajes recibidos sin procesar",
+                      lambda: self.dispatcher.pending() if self.dispatcher else 0)
+        metrics.gauge("paxos_wal_queue_depth", "Registros del WAL sin escribir a disco",
+                      lambda: self.wal.pending() if self.wal else 0)
+
     # =========================================================================
     # PROPOSER - Propone valores para consenso
     # =========================================================================
@@ -85,7 +363,8 @@ class PaxosNode:
         Inicia el protocolo Paxos para proponer un valor.
 
         Este es el método principal que un cliente llamaría para
-        lograr consenso sobre un valor.
+        lograr consenso sobre un valor. Bloquea hasta que la instancia
+        termina; ver `submit` para la versión no bloqueante.
 
         Args:
             value: Valor a proponer para consenso
@@ -93,84 +372,201 @@ class PaxosNode:
         Returns:
             True si el consenso fue alcanzado, False en caso contrario
         """
-        with self.proposer_lock:
-            self.stats["proposals_initiated"] += 1
-            proposal_num = generate_proposal_number(self.node_id)
-            self.current_proposal = proposal_num
+        return self.submit(value).result()
 
-        log_message("INFO", f"{'='*50}")
-        log_message("INFO", f"INICIANDO PROPUESTA #{proposal_num}")
-        log_message("INFO", f"Valor propuesto: {value}")
-        log_message("INFO", f"{'='*50}")
+    async def apropose(self, value: Any) -> bool:
+        """
+        Versión asíncrona de `propose` para usar desde código asyncio.
 
-        # === FASE 1: PREPARE ===
-        log_message("INFO", "\n>>> FASE 1: PREPARE")
+        No bloquea el event loop del llamador ni necesita un hilo por
+        propuesta: miles de corrutinas pueden esperar a la vez.
 
-        phase1_result = self._phase1_prepare(proposal_num)
+        Returns:
+            True si el consenso fue alcanzado, False en caso contrario
+        """
+        return await asyncio.wrap_future(self.submit(value))
 
-        if not phase1_result["success"]:
-            log_message(
-                "ERROR", "Fase 1 falló: no se alcanzó quórum de promesas")
-            self.stats["proposals_rejected"] += 1
-            return False
-
-        # Determinar qué valor usar
-        # Si algún acceptor ya había aceptado un valor, debemos usar ese
-        final_value = value
-        if phase1_result["highest_accepted_value"] is not None:
-            final_value = phase1_result["highest_accepted_value"]
-            log_message(
-                "WARN", f"Usando valor previamente aceptado: {final_value}")
+    def submit(self, value: Any) -> Future:
+        """
+        Envía un valor de cliente sin bloquear.
 
-        # === FASE 2: ACCEPT ===
-        log_message("INFO", "\n>>> FASE 2: ACCEPT")
+        Si el batching está activo, el valor se agrupa con otros antes de
+        proponerse; si no, se propone directamente con `propose_async`.
 
-        phase2_result = self._phase2_accept(proposal_num, final_value)
+        Returns:
+            Future que se completa con True si el valor fue decidido
+        """
+        started_at = self.network.monotonic()
+        future = self.batcher.submit(value) if self.batcher else self.propose_async(value)
+        future.add_done_callback(lambda f: self._observe_commit(f, started_at))
+        return future
 
-        if not phase2_result["success"]:
-            log_message(
-                "ERROR", "Fase 2 falló: no se alcanzó quórum de aceptaciones")
-            self.stats["proposals_rejected"] += 1
-            return False
+    def propose_async(self, value: Any,
+                      callback: Optional[Callable[[bool], None]] = None) -> Future:
+        """
+        Encola un valor para proponerlo sin bloquear al llamador.
 
-        # === CONSENSO ALCANZADO ===
-        self.stats["proposals_accepted"] += 1
+        El valor se coloca en el siguiente slot libre del log. Hasta
+        `pipeline_window` instancias pueden estar en curso a la vez; el
+        resto espera en cola. En modo Multi-Paxos, si el nodo ya es líder
+        se omite la Fase 1 y solo se ejecuta la Fase 2.
 
-        with self.learner_lock:
-            self.learned_value = final_value
-            self.learned_proposal = proposal_num
+        Args:
+            value: Valor a proponer para consenso
+            callback: Función opcional invocada con el resultado (bool)
 
-        log_message("SUCCESS", f"\n{'='*50}")
-        log_message("SUCCESS", f"¡CONSENSO ALCANZADO!")
-        log_message("SUCCESS", f"Valor acordado: {final_value}")
-        log_message("SUCCESS", f"Propuesta #: {proposal_num}")
-        log_message("SUCCESS", f"{'='*50}\n")
+        Returns:
+            Future que se completa con True si el valor fue decidido
+        """
+        future: Future = Future()
+        if callback:
+            future.add_done_callback(lambda f: callback(f.result()))
+
+        with self.proposer_lock:
+            self.counters["proposals_initiated"].inc()
+            self.pending_values.append((value, future))
 
-        return True
+        log_message("INFO", "Propuesta encolada: %s", value)
+        self._pump()
+        return future
 
-    def _phase1_prepare(self, proposal_num: int) -> dict:
+    def _pump(self):
         """
-        Ejecuta la Fase 1 del protocolo Paxos (Prepare/Promise).
+        Arranca instancias pendientes mientras haya hueco en la ventana.
 
-        Args:
-            proposal_num: Número de propuesta único
+        Si el nodo no es líder, reenvía los valores al líder conocido o, si
+        no hay uno vivo, inicia la Fase 1 (una sola a la vez).
+        """
+        to_start = []
+        to_forward = []
+        start_phase1 = False
 
-        Returns:
-            Diccionario con resultado de la fase
+        with self.proposer_lock:
+            leader = None if self.leader_ballot else self._live_leader()
+            if leader:
+                to_forward = list(self.pending_values)
+                self.pending_values.clear()
+            elif not self.leader_ballot:
+                # En Paxos clásico no se inicia otra Fase 1 con instancias
+                # en curso: la nueva propuesta las invalidaría.
+                if (self.pending_values and not self.phase1_in_progress
+                        and (self.multi_paxos or self.in_flight == 0)):
+                    self.phase1_in_progress = True
+                    start_phase1 = True
+            else:
+                while self.pending_values and self.in_flight < self.pipeline_window:
+                    value, future = self.pending_values.popleft()
+                    to_start.append((self.leader_ballot, self.next_slot, value, future))
+                    self.next_slot += 1
+                    self.in_flight += 1
+                    if not self.multi_paxos:
+                        # Paxos clásico: cada valor requiere su propia Fase 1
+                        self.leader_ballot = 0
+                        break
+
+        if start_phase1:
+            self._start_phase1()
+        for value, future in to_forward:
+            self._forward(leader, value, future)
+        for proposal_num, slot, value, future in to_start:
+            self._start_instance(proposal_num, slot, value, future)
+
+    def _new_collector(self, expected_type: str, proposal_num: int, slot: int,
+                       timeout: float, on_done,
+                       request: Optional[Message] = None) -> ResponseCollector:
+        """
+        Crea y registra un recolector con clave (slot, propuesta).
+
+        Si se indica `request`, el timeout se deriva del RTT medido (con
+        `timeout` como tope) y el mensaje se reenvía a los acceptors que no
+        respondan dentro de su RTO.
         """
-        # Crear recolector de respuestas
-        self.response_collector = ResponseCollector(
-            expected_type=MessageType.PROMISE,
+        collector = ResponseCollector(
+            expected_type=expected_type,
             proposal_num=proposal_num,
-            quorum_size=QUORUM_SIZE
+            quorum_size=self.quorum_size,
+            slot=slot,
+            on_done=on_done,
+            total_nodes=len(self.members)
         )
+        collector.started_at = self.network.monotonic()
+        with self.proposer_lock:
+            self.collectors[(slot, proposal_num)] = collector
+        if request is not None:
+            collector.request = request
+            # Respuestas remotas necesarias: el propio nodo aporta una
+            rto = self.rtt.quorum_rto(self.peers, self.quorum_size - 1)
+            timeout = min(timeout, max(PHASE_TIMEOUT_MIN, PHASE_TIMEOUT_RTOS * rto))
+            collector.retransmit_timer = self.network.call_later(
+                rto, lambda: self._retransmit(collector, rto))
+        collector.timer = self.network.call_later(timeout, collector.expire)
+        return collector
+
+    def _retransmit(self, collector: ResponseCollector, interval: float):
+        """
+        Reenvía la petición de un recolector a los acceptors que aún no
+        respondieron, con back-off exponencial del intervalo.
+        """
+        if collector.done:
+            return
+        responders = collector.responders()
+        missing = [ip for ip in self.peers if ip not in responders]
+        for ip in missing:
+            self.network.send_to(collector.request, ip)
+            self.peer_counters["retransmissions"].inc(ip)
+        collector.retransmitted.update(missing)
+        log_message("WARN", "Retransmitiendo %s (slot %d) a %d nodos",
+                    collector.request['type'], collector.slot, len(missing))
+
+        interval = min(interval * 2, RTO_MAX)
+        collector.retransmit_timer = self.network.call_later(
+            interval, lambda: self._retransmit(collector, interval))
+
+    def _observe_phase(self, phase: str, started_at: float):
+        """Registra la duración de una fase e informa a los `phase_listeners`."""
+        elapsed = self.network.monotonic() - started_at
+        self.phase_latency[phase].record(elapsed)
+        for listener in self.phase_listeners:
+            listener(phase, elapsed)
+
+    def _observe_commit(self, future: Future, started_at: float):
+        """Registra la latencia de un valor de cliente decidido."""
+        if not future.cancelled() and future.exception() is None and future.result():
+            self.commit_latency.record(self.network.monotonic() - started_at)
+
+    def _drop_collector(self, collector: ResponseCollector):
+        """Elimina un recolector terminado."""
+        with self.proposer_lock:
+            self.collectors.pop((collector.slot, collector.proposal_num), None)
+
+    def _start_phase1(self):
+        """
+        Ejecuta la Fase 1 (Prepare/Promise) sobre todos los slots no
+        decididos. La promesa cubre todos los slots a partir del primer
+        slot sin decidir.
+        """
+        with self.proposer_lock:
+            # Dos Fases 1 en el mismo milisegundo generarían el mismo número,
+            # y una propuesta menor que una ya prometida sería rechazada
+            proposal_num = max(generate_proposal_number(self.node_id, self.network.time()),
+                               self.current_proposal + 100,
+                               (self.ballot_floor // 100 + 1) * 100 + self.node_id)
+            self.current_proposal = proposal_num
+        with self.learner_lock:
+            from_slot = self.first_unchosen_slot
+
+        log_message("INFO", f"\n>>> FASE 1: PREPARE #{proposal_num} (desde slot {from_slot})")
 
-        # Enviar PREPARE a todos los acceptors
         prepare_msg = create_message(
             msg_type=MessageType.PREPARE,
             proposal_num=proposal_num,
-            sender=self.local_ip
+            sender=self.local_ip,
+            slot=from_slot
         )
+        self._new_collector(MessageType.PROMISE, proposal_num, from_slot,
+                            PREPARE_TIMEOUT, self._on_phase1_done, prepare_msg)
+
+        # Enviar PREPARE a todos los acceptors
 
         log_message(
             "SEND", f"Enviando PREPARE({proposal_num}) a todos los acceptors")
@@ -179,136 +575,610 @@ class PaxosNode:
         # También procesamos localmente como acceptor
         self._handle_prepare(prepare_msg, self.local_ip)
 
-        # Esperar respuestas
-        log_message("INFO", f"Esperando promesas (quórum: {QUORUM_SIZE})...")
-        quorum_reached = self.response_collector.wait_for_quorum(
-            PREPARE_TIMEOUT)
-
-        if not quorum_reached:
-            return {"success": False}
+    def _on_phase1_done(self, collector: ResponseCollector, success: bool):
+        """
+        Completa la Fase 1: toma el liderazgo y vuelve a proponer los
+        valores que los acceptors ya habían aceptado.
 
-        # Analizar respuestas para encontrar el valor más alto aceptado
-        responses = self.response_collector.get_responses()
-        highest_accepted_proposal = 0
-        highest_accepted_value = None
+        Si algún acceptor ya había aceptado un valor en un slot, debemos
+        volver a proponer ese valor en el mismo slot. Los huecos se rellenan
+        con None (no-op) para que el log quede contiguo.
+        """
+        self._drop_collector(collector)
+        proposal_num = collector.proposal_num
+        from_slot = collector.slot
+        if success:
+            self._observe_phase("phase1", collector.started_at)
+
+        if not success:
+            with self.proposer_lock:
+                self.ballot_floor = max(self.ballot_floor, collector.highest_promised)
+                self.phase1_attempts += 1
+                give_up = self.phase1_attempts > MAX_RETRIES
+                failed = []
+                if give_up:
+                    self.phase1_attempts = 0
+                    self.phase1_in_progress = False
+                    failed = list(self.pending_values)
+                    self.pending_values.clear()
+                    self.counters["proposals_rejected"].inc(len(failed))
+                if collector.nacks and self.phase1_attempts == 1:
+                    # Rechazo por una propuesta mayor: el primer reintento,
+                    # ya con una propuesta superior, es inmediato
+                    delay = 0.0
+                else:
+                    delay = backoff_delay(self.phase1_attempts)
 
+            if give_up:
+                log_message(
+                    "ERROR", "Fase 1 falló: no se alcanzó quórum de promesas")
+                for _, future in failed:
+                    future.set_result(False)
+            else:
+                # Esperar un tiempo aleatorio creciente para no competir
+                # con otro proposer en cada intento
+                log_message(
+                    "WARN", f"Fase 1 sin quórum, reintentando en {delay:.2f} s")
+                self.network.call_later(delay, self._start_election)
+            return
+
+        # Analizar respuestas para encontrar, por slot, el valor aceptado
+        # con la propuesta más alta
+        responses = collector.get_responses()
+        highest: dict[int, tuple[int, Any]] = {}
+        snapshot_slot, snapshot_source = -1, None
         for resp in responses:
-            acc_prop = resp.get("accepted_proposal", 0) or 0
-            if acc_prop > highest_accepted_proposal:
-                highest_accepted_proposal = acc_prop
-                highest_accepted_value = resp.get("accepted_value")
+            self._note_decided(resp.get("decided_slot"), resp["sender"])
+            if (resp.get("snapshot_slot") or -1) > snapshot_slot:
+                snapshot_slot, snapshot_source = resp["snapshot_slot"], resp["sender"]
+            for slot, acc_prop, acc_value in resp.get("accepted") or []:
+                if slot not in highest or acc_prop > highest[slot][0]:
+                    highest[slot] = (acc_prop, acc_value)
 
         log_message(
             "SUCCESS", f"Fase 1 completada: {len(responses)} promesas recibidas")
 
-        return {
-            "success": True,
-            "promises": responses,
-            "highest_accepted_value": highest_accepted_value
-        }
+        # Los slots compactados por algún acceptor ya están decididos: no se
+        # recuperan, y si este nodo no los conoce pide el snapshot
+        if snapshot_slot >= from_slot:
+            from_slot = snapshot_slot + 1
+            highest = {slot: entry for slot, entry in highest.items() if slot >= from_slot}
+            with self.learner_lock:
+                behind = self.first_unchosen_slot <= snapshot_slot
+            if behind and snapshot_source != self.local_ip:
+                self.request_snapshot(snapshot_source)
+
+        last_slot = max(highest, default=from_slot - 1)
+        recovered = []
+        with self.learner_lock:
+            for slot in range(from_slot, last_slot + 1):
+                if slot not in self.learned_log:
+                    recovered.append((slot, highest.get(slot, (0, None))[1]))
+
+        with self.proposer_lock:
+            self.next_slot = max(self.next_slot, last_slot + 1)
+            self.leader_ballot = proposal_num
+            self.phase1_in_progress = False
+            self.phase1_attempts = 0
+            self.in_flight += len(recovered)
+            self.known_leader = self.local_ip
+            self.known_leader_ballot = max(self.known_leader_ballot, proposal_num)
+
+        for slot, value in recovered:
+            log_message(
+                "WARN", f"Recuperando slot {slot} con valor previamente aceptado: {value}")
+            self._start_instance(proposal_num, slot, value, None)
+
+        if self.leases or self.election:
+            self._heartbeat_loop()
+        self._pump()
 
-    def _phase2_accept(self, proposal_num: int, value: Any) -> dict:
+    def _start_instance(self, proposal_num: int, slot: int, value: Any,
+                        future: Optional[Future]):
         """
-        Ejecuta la Fase 2 del protocolo Paxos (Accept/Accepted).
+        Ejecuta la Fase 2 (Accept/Accepted) de una instancia.
 
         Args:
-            proposal_num: Número de propuesta
+            proposal_num: Número de propuesta (del líder)
+            slot: Slot del log en el que se propone el valor
             value: Valor a aceptar
-
-        Returns:
-            Diccionario con resultado de la fase
+            future: Future del cliente (None para slots recuperados)
         """
-        # Crear recolector para respuestas ACCEPTED
-        self.response_collector = ResponseCollector(
-            expected_type=MessageType.ACCEPTED,
-            proposal_num=proposal_num,
-            quorum_size=QUORUM_SIZE
-        )
+        log_message("INFO", "\n>>> FASE 2: ACCEPT (slot %d)", slot)
 
-        # Enviar ACCEPT a todos los acceptors
         accept_msg = create_message(
             msg_type=MessageType.ACCEPT,
             proposal_num=proposal_num,
             value=value,
-            sender=self.local_ip
+            sender=self.local_ip,
+            slot=slot,
+            decided_slot=self.first_unchosen_slot
         )
+        self._new_collector(
+            MessageType.ACCEPTED, proposal_num, slot, ACCEPT_TIMEOUT,
+            lambda collector, success: self._on_instance_done(
+                collector, success, value, future),
+            accept_msg)
 
-        log_message(
-            "SEND", f"Enviando ACCEPT({proposal_num}, {value}) a todos los acceptors")
+        # Enviar ACCEPT a todos los acceptors
+
+        log_message("SEND", "Enviando ACCEPT(%d, slot %d, %s) a todos los acceptors",
+                    proposal_num, slot, value)
         self.network.send_to_all_acceptors(accept_msg)
 
         # También procesamos localmente como acceptor
         self._handle_accept(accept_msg, self.local_ip)
 
-        # Esperar respuestas
-        log_message(
-            "INFO", f"Esperando aceptaciones (quórum: {QUORUM_SIZE})...")
-        quorum_reached = self.response_collector.wait_for_quorum(
-            ACCEPT_TIMEOUT)
+    def _on_instance_done(self, collector: ResponseCollector, success: bool,
+                          value: Any, future: Optional[Future]):
+        """Completa una instancia: aprende el valor y resuelve el future."""
+        self._drop_collector(collector)
+        proposal_num = collector.proposal_num
+        slot = collector.slot
 
-        if not quorum_reached:
-            return {"success": False}
+        with self.proposer_lock:
+            self.in_flight -= 1
+
+        if success:
+            self._observe_phase("phase2", collector.started_at)
+            self._learn(slot, proposal_num, value)
+            if self.learn_mode == "leader":
+                self._announce_decided(slot, proposal_num)
+            log_message("SUCCESS", "¡CONSENSO ALCANZADO! Slot %d: %s (propuesta #%d)",
+                        slot, value, proposal_num)
+            if future:
+                self.counters["proposals_accepted"].inc()
+                future.set_result(True)
+        else:
+            log_message(
+                "ERROR", f"Fase 2 falló en slot {slot}: no se alcanzó quórum de aceptaciones")
+            self._lose_leadership(proposal_num, collector.highest_promised)
+            # No se reencola: un acceptor que no respondió (o cuyo ACCEPTED
+            # se perdió) puede haberlo aceptado, y el nuevo líder lo
+            # decidiría en este slot; reintentarlo en otro lo duplicaría.
+            # El cliente reintenta con su id de petición (ver ReplyCache)
+            if future:
+                self.counters["proposals_rejected"].inc()
+                future.set_result(False)
+
+        self._pump()
+
+    def _announce_decided(self, slot: int, proposal_num: int):
+        """
+        Anuncia a los learners un slot decidido. Los avisos que llegan
+        dentro de LEARN_BATCH_DELAY_MS se envían juntos en un solo LEARN.
+        """
+        with self.proposer_lock:
+            self.learn_buffer.append([slot, proposal_num, None])
+            if len(self.learn_buffer) > 1:
+                return  # El envío ya está programado
+        self.network.call_later(LEARN_BATCH_DELAY_MS / 1000.0, self._flush_learns)
 
-        responses = self.response_collector.get_responses()
-        log_message(
-            "SUCCESS", f"Fase 2 completada: {len(responses)} aceptaciones recibidas")
+    def _flush_learns(self):
+        """Envía los avisos LEARN acumulados."""
+        with self.proposer_lock:
+            entries, self.learn_buffer = self.learn_buffer, []
+        if not entries:
+            return
+        # Solo viajan (slot, propuesta): cada nodo tiene el valor en su log
+        # de aceptados, o lo pide con catch-up si le falta
+        self.network.send_to_all_acceptors(create_message(
+            msg_type=MessageType.LEARN,
+            proposal_num=entries[-1][1],
+            sender=self.local_ip,
+            accepted=entries,
+            decided_slot=self.first_unchosen_slot
+        ))
+
+    def _lose_leadership(self, proposal_num: int, promised_hint: int = 0):
+        """
+        Abandona el liderazgo si seguía asociado a la propuesta dada.
 
-        return {
-            "success": True,
-            "accepted": responses
-        }
+        Args:
+            proposal_num: Propuesta con la que se era líder
+            promised_hint: Mayor propuesta prometida según los NACK
+        """
+        with self.proposer_lock:
+            self.ballot_floor = max(self.ballot_floor, promised_hint)
+            if self.leader_ballot == proposal_num:
+                self.leader_ballot = 0
+                self.lease_expiry = 0.0
+
+    # =========================================================================
+    # ELECCIÓN DE LÍDER - Heartbeats, detector de fallos y reenvío
+    # =========================================================================
+
+    def _live_leader(self) -> Optional[str]:
+        """
+        Retorna el líder conocido si es otro nodo y el detector de fallos
+        lo considera vivo (con proposer_lock).
+        """
+        if (self.election and self.known_leader
+                and self.known_leader != self.local_ip
+                and self.leader_detector.is_available(self.network.monotonic())):
+            return self.known_leader
+        return None
+
+    def _observe_leader(self, leader_ip: str, ballot: int):
+        """Registra un heartbeat del líder `leader_ip` con propuesta `ballot`."""
+        step_down = False
+        with self.proposer_lock:
+            if ballot < self.known_leader_ballot:
+                return  # Heartbeat de un líder anterior
+            if leader_ip != self.known_leader:
+                self.leader_detector = PhiAccrualDetector()
+                log_message("INFO", f"Nuevo líder: {leader_ip} (propuesta #{ballot})")
+            self.known_leader = leader_ip
+            self.known_leader_ballot = ballot
+            self.leader_detector.heartbeat(self.network.monotonic())
+            if self.election and leader_ip != self.local_ip:
+                # Los valores en espera se reenviarán a este líder: sus
+                # Fases 1 fallidas ya no cuentan. Sin elección no se
+                # reenvía, y los reintentos deben agotarse (MAX_RETRIES)
+                self.phase1_attempts = 0
+            if self.leader_ballot and self.leader_ballot < ballot:
+                # Otro nodo ganó una Fase 1 posterior a la nuestra
+                step_down = True
+                old_ballot = self.leader_ballot
+
+        if step_down:
+            log_message("WARN", f"Cediendo el liderazgo a {leader_ip}")
+            self._lose_leadership(old_ballot)
+            self._pump()
+
+    def _election_tick(self):
+        """
+        Revisa periódicamente el liderazgo. Si no hay un líder vivo, se
+        presenta como candidato tras una espera aleatoria.
+        """
+        with self.proposer_lock:
+            self.election_timer = self.network.call_later(HEARTBEAT_INTERVAL, self._election_tick)
+            if self.leader_ballot or self.phase1_in_progress or self._live_leader():
+                return
+            self.phase1_in_progress = True
+            delay = backoff_delay(self.phase1_attempts)
+        self.network.call_later(delay, self._start_election)
+
+    def _start_election(self):
+        """
+        Inicia la Fase 1 tras la espera de back-off, salvo que entretanto
+        haya aparecido un líder o ya no haga falta.
+        """
+        with self.proposer_lock:
+            needed = self.election or bool(self.pending_values)
+            if self.leader_ballot or self._live_leader() or not needed:
+                self.phase1_in_progress = False
+                start = False
+            else:
+                start = True
+
+        if start:
+            self._start_phase1()
+        else:
+            self._pump()
+
+    def _forward(self, leader_ip: str, value: Any, future: Future):
+        """Reenvía un valor al líder y espera su resultado."""
+        with self.proposer_lock:
+            self.forward_seq += 1
+            request_id = self.forward_seq
+            self.forwarded[request_id] = [future, self.network.monotonic(), False]
+            self.counters["proposals_forwarded"].inc()
+
+        # Si el líder no responde, el valor se da por rechazado
+        timer = self.network.call_later(
+            PREPARE_TIMEOUT + ACCEPT_TIMEOUT,
+            lambda: self._on_forward_reply(request_id, False))
+        future.add_done_callback(lambda _: timer.cancel())
+
+        log_message("SEND", "Reenviando valor al líder %s: %s", leader_ip, value)
+        forward = create_message(
+            msg_type=MessageType.FORWARD,
+            proposal_num=0,
+            value=value,
+            sender=self.local_ip,
+            slot=request_id
+        )
+        self.network.send_to(forward, leader_ip)
+        self._retransmit_forward(forward, leader_ip, None)
+
+    def _retransmit_forward(self, forward: Message, leader_ip: str,
+                            interval: Optional[float]):
+        """
+        Reenvía un FORWARD sin respuesta (el líder suprime los duplicados,
+        así que el valor no se propone dos veces).
+        """
+        request_id = forward["slot"]
+        if interval is None:
+            # Primera llamada: solo programar
+            interval = self.forward_rtt.rto(leader_ip)
+        else:
+            with self.proposer_lock:
+                entry = self.forwarded.get(request_id)
+                if entry is None:
+                    return
+                entry[2] = True
+            self.network.send_to(forward, leader_ip)
+            self.peer_counters["retransmissions"].inc(leader_ip)
+            interval = min(interval * 2, RTO_MAX)
+        self.network.call_later(
+            interval, lambda: self._retransmit_forward(forward, leader_ip, interval))
+
+    def _handle_forward(self, message: Message, sender: str):
+        """Propone un valor reenviado por otro nodo y le responde el resultado."""
+        request_id = message.get("slot") or 0
+
+        def reply(success: bool):
+            response = create_message(
+                msg_type=MessageType.FORWARD_REPLY,
+                proposal_num=0,
+                value=success,
+                sender=self.local_ip,
+                slot=request_id
+            )
+            self.reply_cache.store(self._request_key(message, sender), response)
+            self.network.send_to(response, sender)
+
+        self.propose_async(message.get("value"), callback=reply)
+
+    def _on_forward_reply(self, request_id: int, success: bool,
+                          sender: Optional[str] = None):
+        """Resuelve el future de un valor reenviado."""
+        with self.proposer_lock:
+            entry = self.forwarded.pop(request_id, None)
+        if entry:
+            future, sent_at, retransmitted = entry
+            if sender and not retransmitted:
+                self.forward_rtt.sample(sender, self.network.monotonic() - sent_at)
+            if success:
+                self._observe_phase("forward", sent_at)
+            future.set_result(bool(success))
+
+    # =========================================================================
+    # LECTURAS - Leader leases y read index
+    # =========================================================================
+
+    def read(self, query: Any = None, timeout: float = ACCEPT_TIMEOUT) -> Any:
+        """
+        Lectura linealizable del estado replicado.
+
+        Solo el líder de Multi-Paxos puede atenderla. Con un lease vigente
+        se responde desde el estado local sin enviar mensajes; si no, se
+        confirma el liderazgo con un quórum (read index) antes de responder.
+
+        Args:
+            query: Consulta para `StateMachine.read`
+            timeout: Tiempo máximo de espera en segundos
+
+        Returns:
+            Resultado de la consulta
+
+        Raises:
+            NotLeaderError: Si el nodo no es el líder (o no usa Multi-Paxos)
+                o perdió el quórum
+        """
+        return self.read_async(query).result(timeout)
+
+    async def aread(self, query: Any = None) -> Any:
+        """Versión asíncrona de `read` para usar desde código asyncio."""
+        return await asyncio.wrap_future(self.read_async(query))
+
+    def read_async(self, query: Any = None) -> Future:
+        """
+        Inicia una lectura linealizable sin bloquear.
+
+        El índice de lectura es el último slot que el líder pudo haber
+        decidido; la respuesta se da cuando el estado local lo ha aplicado.
+
+        Returns:
+            Future con el resultado de la consulta
+        """
+        future: Future = Future()
+        with self.proposer_lock:
+            if not self.multi_paxos:
+                # En Paxos clásico cada valor tiene su propia Fase 1: nadie
+                # conserva el liderazgo para confirmar un read index
+                future.set_exception(NotLeaderError("Las lecturas requieren Multi-Paxos"))
+                return future
+            if not self.leader_ballot:
+                future.set_exception(NotLeaderError(f"{self.local_ip} no es el líder"))
+                return future
+            read_index = self.next_slot - 1
+            leased = self.network.monotonic() < self.lease_expiry
+            if not leased:
+                self.pending_reads.append((read_index, query, future))
+                start_round = len(self.pending_reads) == 1
+
+        if leased:
+            self._serve_read(read_index, query, future)
+        elif start_round:
+            self._send_heartbeat()
+        return future
+
+    def _serve_read(self, read_index: int, query: Any, future: Future):
+        """Responde la lectura cuando el estado aplicado llega a `read_index`."""
+        with self.apply_lock:
+            if self.last_applied < read_index:
+                self.read_waiters.append((read_index, query, future))
+                return
+            result = self.state_machine.read(query)
+        future.set_result(result)
+
+    def _ready_reads(self) -> list:
+        """Resuelve las lecturas que ya pueden responderse (con apply_lock)."""
+        if not self.read_waiters:
+            return []
+        ready, waiting = [], []
+        for read_index, query, future in self.read_waiters:
+            if read_index <= self.last_applied:
+                ready.append((future, self.state_machine.read(query)))
+            else:
+                waiting.append((read_index, query, future))
+        self.read_waiters = waiting
+        return ready
+
+    def _heartbeat_loop(self):
+        """
+        Envía un HEARTBEAT cada HEARTBEAT_INTERVAL mientras el nodo sea
+        líder: mantiene vivo su liderazgo ante los detectores de fallos de
+        los demás y renueva el lease.
+        """
+        with self.proposer_lock:
+            if self.heartbeat_timer:
+                self.heartbeat_timer.cancel()
+                self.heartbeat_timer = None
+            if not self.leader_ballot:
+                return
+            self.heartbeat_timer = self.network.call_later(HEARTBEAT_INTERVAL, self._heartbeat_loop)
+        self._send_heartbeat()
+
+    def _send_heartbeat(self):
+        """
+        Envía un HEARTBEAT a los acceptors. Con un quórum de respuestas se
+        renueva el lease y se confirman las lecturas pendientes.
+
+        Cada ronda usa un slot negativo para no chocar con los del log.
+        """
+        with self.proposer_lock:
+            proposal_num = self.leader_ballot
+            reads, self.pending_reads = self.pending_reads, []
+            self.heartbeat_seq += 1
+            round_slot = -self.heartbeat_seq
+        if not proposal_num:
+            for _, _, future in reads:
+                future.set_exception(NotLeaderError(f"{self.local_ip} no es el líder"))
+            return
+
+        sent_at = self.network.monotonic()
+        self._new_collector(
+            MessageType.HEARTBEAT_ACK, proposal_num, round_slot, LEASE_DURATION,
+            lambda collector, success: self._on_heartbeat_done(
+                collector, success, sent_at, reads))
+
+        heartbeat = create_message(
+            msg_type=MessageType.HEARTBEAT,
+            proposal_num=proposal_num,
+            sender=self.local_ip,
+            slot=round_slot,
+            decided_slot=self.first_unchosen_slot
+        )
+        self.network.send_to_all_acceptors(heartbeat)
+        self._handle_heartbeat(heartbeat, self.local_ip)
+
+    def _on_heartbeat_done(self, collector: ResponseCollector, success: bool,
+                           sent_at: float, reads: list):
+        """Extiende el lease y atiende (o rechaza) las lecturas de la ronda."""
+        self._drop_collector(collector)
+        if collector.highest_promised > collector.proposal_num:
+            # Otro nodo ganó una Fase 1 posterior
+            self._lose_leadership(collector.proposal_num, collector.highest_promised)
+        with self.proposer_lock:
+            success = success and self.leader_ballot == collector.proposal_num
+            if success and self.leases:
+                # El lease cuenta desde el envío: los acceptors lo
+                # concedieron más tarde, así que vence antes aquí
+                self.lease_expiry = max(
+                    self.lease_expiry, sent_at + LEASE_DURATION * (1 - LEASE_CLOCK_DRIFT))
+
+        for read_index, query, future in reads:
+            if success:
+                self._serve_read(read_index, query, future)
+            else:
+                future.set_exception(NotLeaderError(
+                    f"{self.local_ip} no pudo confirmar el liderazgo"))
+
+    def _deliver_response(self, message: Message, sender: str):
+        """Entrega una respuesta al recolector de su (slot, propuesta)."""
+        key = (message.get("slot") or 0, message.get("proposal_num"))
+        with self.proposer_lock:
+            collector = self.collectors.get(key)
+        if collector:
+            # Medir el RTT solo con la primera respuesta a un envío único
+            # (algoritmo de Karn: tras reenviar no se sabe a cuál responde)
+            if (sender != self.local_ip and sender not in collector.retransmitted
+                    and message["type"] == collector.expected_type
+                    and sender not in collector.responders()):
+                self.rtt.sample(sender, self.network.monotonic() - collector.started_at)
+            collector.add_response(message, sender)
 
     # =========================================================================
     # ACCEPTOR - Acepta/rechaza propuestas
     # =========================================================================
 
-    def _handle_prepare(self, message: dict, sender: str):
+    def _handle_prepare(self, message: Message, sender: str):
         """
         Maneja un mensaje PREPARE como Acceptor.
 
+        La promesa se aplica a todos los slots desde `message["slot"]`, y
+        la respuesta incluye todos los valores aceptados en esos slots.
+
         Args:
             message: Mensaje PREPARE recibido
             sender: IP del proposer
         """
         proposal_num = message["proposal_num"]
-
-        with self.acceptor_lock:
-            if proposal_num > self.promised_proposal:
+        from_slot = message.get("slot") or 0
+
+        # La promesa cubre todos los slots: excluir a todas las Fases 2
+        with self.slot_locks.all(), self.acceptor_lock:
+            lease_holder = self.lease_holder
+            leased_to_other = (sender != lease_holder
+                               and self.network.monotonic() < self.lease_granted_until)
+            # Un PREPARE retransmitido repite la propuesta ya prometida:
+            # volver a prometerla es seguro
+            promised = proposal_num >= self.promised_proposal and not leased_to_other
+            if promised:
                 # Prometer no aceptar propuestas menores
                 self.promised_proposal = proposal_num
-
-                # Responder con PROMISE, incluyendo cualquier valor ya aceptado
-                promise_msg = create_message(
-                    msg_type=MessageType.PROMISE,
-                    proposal_num=proposal_num,
-                    sender=self.local_ip,
-                    accepted_proposal=self.accepted_proposal,
-                    accepted_value=self.accepted_value
-                )
-
-                log_message("INFO", f"Prometiendo propuesta #{proposal_num}")
-
-                # Si es mensaje propio, agregar directamente al collector
-                if sender == self.local_ip:
-                    if self.response_collector:
-                        self.response_collector.add_response(
-                            promise_msg, self.local_ip)
-                else:
-                    self.network.send_to(promise_msg, sender)
+                # Valores ya aceptados, para incluirlos en el PROMISE
+                accepted = [
+                    [inst.slot, inst.proposal, inst.value]
+                    for inst in self.accepted_log.entries_from(from_slot)
+                ]
+                base = self.accepted_log.base
+            current_promise = self.promised_proposal
+
+        if promised:
+            first = accepted[0] if accepted and accepted[0][0] == from_slot else None
+            reply = create_message(
+                msg_type=MessageType.PROMISE,
+                proposal_num=proposal_num,
+                sender=self.local_ip,
+                accepted_proposal=first[1] if first else 0,
+                accepted_value=first[2] if first else None,
+                slot=from_slot,
+                accepted=accepted,
+                snapshot_slot=base - 1 if base else None,
+                decided_slot=self.first_unchosen_slot
+            )
+
+            log_message("INFO", "Prometiendo propuesta #%d", proposal_num)
+
+            if self.wal:
+                # Responder solo cuando la promesa sea durable
+                self.wal.append(REC_PROMISE, from_slot, proposal_num,
+                                callback=lambda durable: self._reply_durable(
+                                    durable, reply, sender, message))
+                return
+        else:
+            # Rechazar con NACK
+            reply = create_message(
+                msg_type=MessageType.NACK,
+                proposal_num=proposal_num,
+                sender=self.local_ip,
+                slot=from_slot,
+                promised_proposal=current_promise
+            )
+            if leased_to_other:
+                log_message(
+                    "WARN", f"Rechazando propuesta #{proposal_num} (lease concedido a {lease_holder})")
             else:
-                # Rechazar con NACK
-                nack_msg = create_message(
-                    msg_type=MessageType.NACK,
-                    proposal_num=proposal_num,
-                    sender=self.local_ip
-                )
                 log_message(
-                    "WARN", f"Rechazando propuesta #{proposal_num} (ya prometí #{self.promised_proposal})")
+                    "WARN", f"Rechazando propuesta #{proposal_num} (ya prometí #{current_promise})")
 
-                if sender != self.local_ip:
-                    self.network.send_to(nack_msg, sender)
+        self._reply(reply, sender, message)
 
-    def _handle_accept(self, message: dict, sender: str):
+    def _handle_accept(self, message: Message, sender: str):
         """
         Maneja un mensaje ACCEPT como Acceptor.
 
@@ -318,49 +1188,493 @@ class PaxosNode:
         """
         proposal_num = message["proposal_num"]
         value = message["value"]
+        slot = message.get("slot") or 0
+
+        # Solo la franja del slot: las Fases 2 de otros slots no esperan
+        with self.slot_locks.slot(slot):
+            with self.acceptor_lock:
+                accepted = proposal_num >= self.promised_proposal
+                if accepted:
+                    self.promised_proposal = proposal_num
+                    compacted = slot < self.accepted_log.base
+                    if not compacted:
+                        self.last_accepted_slot = max(self.last_accepted_slot, slot)
+                current_promise = self.promised_proposal
+            if accepted and not compacted:
+                self.accepted_log.set(slot, proposal_num, value)
+
+        # El líder informa hasta dónde tiene el log decidido (antes de
+        # responder: con WAL, la respuesta sale después desde el escritor)
+        self._note_decided(message.get("decided_slot"), sender)
+
+        if accepted:
+            # Responder con ACCEPTED
+            reply = create_message(
+                msg_type=MessageType.ACCEPTED,
+                proposal_num=proposal_num,
+                value=value,
+                sender=self.local_ip,
+                slot=slot
+            )
+
+            log_message("SUCCESS", "Aceptando propuesta #%d en slot %d con valor: %s",
+                        proposal_num, slot, value)
+
+            if self.wal and not compacted:
+                # Responder solo cuando la aceptación sea durable
+                self.wal.append(REC_ACCEPT, slot, proposal_num, value,
+                                callback=lambda durable: self._reply_durable(
+                                    durable, reply, sender, message))
+                return
+        else:
+            # Rechazar
+            reply = create_message(
+                msg_type=MessageType.NACK,
+                proposal_num=proposal_num,
+                sender=self.local_ip,
+                slot=slot,
+                promised_proposal=current_promise
+            )
+            log_message("WARN", "Rechazando ACCEPT #%d", proposal_num)
+
+        self._reply(reply, sender, message)
+
+    def _handle_heartbeat(self, message: Message, sender: str):
+        """
+        Maneja un HEARTBEAT: registra al líder para el detector de fallos
+        y, como Acceptor, si no prometió una propuesta mayor, le concede el
+        lease por LEASE_DURATION.
+        """
+        proposal_num = message["proposal_num"]
+        if sender != self.local_ip:
+            self._observe_leader(sender, proposal_num)
 
         with self.acceptor_lock:
             if proposal_num >= self.promised_proposal:
-                # Aceptar la propuesta
-                self.promised_proposal = proposal_num
-                self.accepted_proposal = proposal_num
-                self.accepted_value = value
+                if self.leases:
+                    self.lease_holder = sender
+                    self.lease_granted_until = self.network.monotonic() + LEASE_DURATION
+                msg_type = MessageType.HEARTBEAT_ACK
+            else:
+                msg_type = MessageType.NACK
+            promised = self.promised_proposal
 
-                # Responder con ACCEPTED
-                accepted_msg = create_message(
-                    msg_type=MessageType.ACCEPTED,
-                    proposal_num=proposal_num,
-                    value=value,
-                    sender=self.local_ip
-                )
+        self._reply(create_message(
+            msg_type=msg_type,
+            proposal_num=proposal_num,
+            sender=self.local_ip,
+            slot=message.get("slot"),
+            promised_proposal=promised if msg_type == MessageType.NACK else None
+        ), sender)
+        self._note_decided(message.get("decided_slot"), sender)
+
+    def _reply(self, reply: Message, sender: str,
+               request: Optional[Message] = None):
+        """
+        Envía la respuesta del acceptor al proposer.
 
-                log_message(
-                    "SUCCESS", f"Aceptando propuesta #{proposal_num} con valor: {value}")
+        Se llama fuera de `acceptor_lock`: si la respuesta es para este
+        mismo nodo, completar el quórum puede arrancar nuevas instancias
+        que vuelven a entrar como acceptor. Si se indica `request`, la
+        respuesta se guarda para contestar sus retransmisiones.
+        """
+        if request is not None and sender != self.local_ip:
+            self.reply_cache.store(self._request_key(request, sender), reply)
+        if reply["type"] == MessageType.ACCEPTED and self.learn_mode == "acceptors":
+            # Todos los learners (incluido el proposer) reciben el ACCEPTED
+            self.network.broadcast(reply)
+            self._count_accepted(reply, self.local_ip)
+            if sender == self.local_ip:
+                self._deliver_response(reply, self.local_ip)
+        elif sender == self.local_ip:
+            # Si es mensaje propio, agregar directamente al collector
+            self._deliver_response(reply, self.local_ip)
+        else:
+            self.network.send_to(reply, sender)
 
-                # Si es mensaje propio, agregar al collector
-                if sender == self.local_ip:
-                    if self.response_collector:
-                        self.response_collector.add_response(
-                            accepted_msg, self.local_ip)
-                else:
-                    self.network.send_to(accepted_msg, sender)
-            else:
-                # Rechazar
-                nack_msg = create_message(
-                    msg_type=MessageType.NACK,
-                    proposal_num=proposal_num,
-                    sender=self.local_ip
-                )
-                log_message("WARN", f"Rechazando ACCEPT #{proposal_num}")
+    def _reply_durable(self, durable: bool, reply: Message, sender: str,
+                       request: Message):
+        """
+        Callback del WAL: responde solo si el registro llegó a disco. Si el
+        WAL falló, el acceptor calla (el proposer lo ve como caído).
+        """
+        if durable:
+            self._reply(reply, sender, request)
 
-                if sender != self.local_ip:
-                    self.network.send_to(nack_msg, sender)
+    # =========================================================================
+    # LEARNER - Registra los valores decididos
+    # =========================================================================
+
+    def _learn(self, slot: int, proposal_num: int, value: Any):
+        """
+        Registra un valor decidido en el log del learner.
+
+        Args:
+            slot: Slot decidido
+            proposal_num: Propuesta con la que se decidió
+            value: Valor decidido (None = no-op, dict de lote = varios valores)
+        """
+        with self.learner_lock:
+            self._record_learned(slot, proposal_num, value)
+        self._apply_committed()
+
+    def _handle_learn(self, message: Message, sender: str):
+        """
+        Procesa un aviso LEARN.
+
+        Un LEARN por lotes lista [slot, propuesta, None]: el valor se toma
+        del log de aceptados si este acceptor aceptó esa misma propuesta.
+        Los slots sin valor local se recuperan con catch-up.
+        """
+        entries = message.get("accepted")
+        if entries is None:
+            # Aviso de un solo slot con el valor incluido
+            self._learn(message.get("slot") or 0,
+                        message.get("proposal_num"), message.get("value"))
+            log_message("INFO", "Valor aprendido: %s", message.get('value'))
+            return
+
+        found = []
+        for slot, proposal_num, _ in entries:
+            with self.slot_locks.slot(slot):
+                if self.accepted_log.proposal(slot) == proposal_num:
+                    found.append((slot, proposal_num, self.accepted_log.value(slot)))
+        with self.learner_lock:
+            for slot, proposal_num, value in found:
+                self._record_learned(slot, proposal_num, value)
+        self._apply_committed()
+        self._note_decided(message.get("decided_slot"), sender)
+
+    def _count_accepted(self, message: Message, sender: str):
+        """
+        Modo "acceptors": cuenta un ACCEPTED y aprende el valor al reunir
+        un quórum de acceptors con la misma propuesta.
+        """
+        slot = message.get("slot") or 0
+        proposal_num = message["proposal_num"]
+        with self.learner_lock:
+            if slot < self.first_unchosen_slot or slot in self.learned_log:
+                return
+            tally = self.accepted_tally.get(slot)
+            if tally is None or tally[0] < proposal_num:
+                tally = self.accepted_tally[slot] = [proposal_num, set()]
+            elif tally[0] > proposal_num:
+                return
+            tally[1].add(sender)
+            if len(tally[1]) < self.quorum_size:
+                return
+            self._record_learned(slot, proposal_num, message.get("value"))
+        self._apply_committed()
+
+    def _record_learned(self, slot: int, proposal_num: int, value: Any):
+        """Guarda un valor decidido en el log del learner (con learner_lock)."""
+        self.accepted_tally.pop(slot, None)
+        if slot < self.learned_log.base:
+            return  # Ya incluido en el snapshot
+        values = unpack_values(value)
+        self.learned_log.set(slot, proposal_num, value)
+        while self.first_unchosen_slot in self.learned_log:
+            self.first_unchosen_slot += 1
+        if slot >= self.learned_slot and values:
+            self.learned_slot = slot
+            self.learned_value = values[-1]
+            self.learned_proposal = proposal_num
+
+    # =========================================================================
+    # CATCH-UP - Puesta al día de learners rezagados
+    # =========================================================================
+
+    def catch_up(self):
+        """
+        Pregunta a todos los pares por los slots decididos que falten aquí.
+
+        Se llama al arrancar; las respuestas indican hasta qué slot tiene
+        cada par el log decidido y, si este nodo va por detrás, se piden
+        los rangos que faltan.
+        """
+        with self.learner_lock:
+            from_slot = self.first_unchosen_slot
+        self.network.send_to_all_acceptors(create_message(
+            msg_type=MessageType.CATCHUP_REQUEST,
+            proposal_num=0,
+            sender=self.local_ip,
+            slot=from_slot,
+            decided_slot=from_slot + CATCHUP_BATCH_SLOTS
+        ))
+
+    def _note_decided(self, decided_slot: Optional[int], peer_ip: str):
+        """
+        Registra que `peer_ip` tiene decididos todos los slots anteriores a
+        `decided_slot`. Si este nodo va por detrás, programa el catch-up tras
+        CATCHUP_DELAY, por si los valores que faltan están en camino.
+        """
+        if not decided_slot or peer_ip == self.local_ip:
+            return
+        with self.learner_lock:
+            if decided_slot <= self.first_unchosen_slot:
+                return
+            if decided_slot > self.catchup_target:
+                self.catchup_target = decided_slot
+                self.catchup_peer = peer_ip
+            if self.catchup_timer is None:
+                self.catchup_timer = self.network.call_later(CATCHUP_DELAY, self._request_catchup)
+
+    def _request_catchup(self):
+        """
+        Pide en paralelo los rangos de slots que faltan hasta
+        `catchup_target`. El primer rango va al par que informó del
+        objetivo; el resto se reparte entre los demás.
+        """
+        requests = []
+        with self.learner_lock:
+            if self.catchup_timer:
+                self.catchup_timer.cancel()
+                self.catchup_timer = None
+            start, target = self.first_unchosen_slot, self.catchup_target
+            if start >= target:
+                self.catchup_outstanding = 0
+                return
+
+            peers = [self.catchup_peer] + [
+                ip for ip in self.peers if ip != self.catchup_peer]
+            while start < target and len(requests) < CATCHUP_PARALLEL:
+                end = min(start + CATCHUP_BATCH_SLOTS, target)
+                requests.append((start, end, peers[len(requests) % len(peers)]))
+                start = end
+            self.catchup_outstanding = len(requests)
+            # Si alguna respuesta se pierde, reintentar
+            self.catchup_timer = self.network.call_later(CATCHUP_TIMEOUT, self._request_catchup)
+
+        log_message("INFO", f"Catch-up: pidiendo slots {requests[0][0]}-{requests[-1][1] - 1}")
+        for start, end, peer_ip in requests:
+            self.network.send_to(create_message(
+                msg_type=MessageType.CATCHUP_REQUEST,
+                proposal_num=0,
+                sender=self.local_ip,
+                slot=start,
+                decided_slot=end
+            ), peer_ip)
+
+    def _handle_catchup_request(self, message: Message, sender: str):
+        """Responde con los slots decididos del rango pedido."""
+        from_slot = message.get("slot") or 0
+        end_slot = min(message.get("decided_slot") or from_slot + CATCHUP_BATCH_SLOTS,
+                       from_slot + CATCHUP_BATCH_SLOTS)
+
+        entries, size = [], 0
+        with self.learner_lock:
+            base = self.learned_log.base
+            for slot in range(max(from_slot, base), min(end_slot, self.learned_log.end)):
+                inst = self.learned_log.get(slot)
+                if inst is None:
+                    continue
+                entries.append([slot, inst.proposal, inst.value])
+                size += estimate_size(inst.value)
+                if size >= CATCHUP_MAX_BYTES:
+                    break
+            decided_slot = self.first_unchosen_slot
+
+        self.network.send_to(create_message(
+            msg_type=MessageType.CATCHUP_REPLY,
+            proposal_num=0,
+            sender=self.local_ip,
+            slot=from_slot,
+            accepted=entries,
+            # Si parte del rango ya se compactó, el que pide necesita el snapshot
+            snapshot_slot=base - 1 if from_slot < base else None,
+            decided_slot=decided_slot
+        ), sender)
+
+    def _handle_catchup_reply(self, message: Message, sender: str):
+        """Aprende los slots recibidos y pide la siguiente tanda si falta."""
+        entries = message.get("accepted") or []
+        with self.learner_lock:
+            for slot, proposal_num, value in entries:
+                self._record_learned(slot, proposal_num, value)
+            needs_snapshot = (message.get("snapshot_slot") is not None
+                              and message["snapshot_slot"] >= self.first_unchosen_slot)
+            self.catchup_outstanding = max(self.catchup_outstanding - 1, 0)
+            round_done = self.catchup_outstanding == 0
+
+        if entries:
+            log_message("INFO", f"Catch-up: {len(entries)} slots recibidos de {sender}")
+            self._apply_committed()
+        if needs_snapshot:
+            self.request_snapshot(sender)
+        self._note_decided(message.get("decided_slot"), sender)
+        if round_done:
+            self._request_catchup()
+
+    # =========================================================================
+    # MÁQUINA DE ESTADOS Y SNAPSHOTS
+    # =========================================================================
+
+    def _apply_committed(self):
+        """
+        Aplica en orden los slots decididos que aún no se aplicaron y toma
+        un snapshot cada `snapshot_interval` slots.
+        """
+        with self.apply_lock:
+            with self.learner_lock:
+                start, end = self.last_applied + 1, self.first_unchosen_slot
+                values = [self.learned_log.value(slot) for slot in range(start, end)]
+            if not values:
+                return
+
+            snapshot_slot = self.snapshot.slot if self.snapshot else -1
+            for slot, value in enumerate(values, start):
+                for client_value in unpack_values(value):
+                    self.state_machine.apply(client_value)
+                self.last_applied = slot
+                if self.snapshot_interval and slot - snapshot_slot >= self.snapshot_interval:
+                    self._take_snapshot()
+                    snapshot_slot = slot
+            ready = self._ready_reads()
+
+        for future, result in ready:
+            future.set_result(result)
+
+    def _take_snapshot(self):
+        """Toma un snapshot hasta `last_applied` y compacta los logs (con apply_lock)."""
+        snapshot = Snapshot.from_state(self.last_applied, self.state_machine.snapshot())
+        if self.snapshot_store:
+            self.snapshot_store.save(snapshot)
+        self.snapshot = snapshot
+        self._compact(snapshot.slot)
+        log_message("INFO", f"Snapshot tomado en slot {snapshot.slot} ({len(snapshot.data)} bytes)")
+
+    def _compact(self, slot: int):
+        """Descarta de los logs (y del WAL) los slots hasta `slot` inclusive."""
+        with self.learner_lock:
+            self.learned_log.truncate(slot + 1)
+        with self.slot_locks.all(), self.acceptor_lock:
+            self.accepted_log.truncate(slot + 1)
+            promised = self.promised_proposal
+        # Sin snapshot en disco, el WAL es la única copia durable del estado
+        if self.wal and self.snapshot_store:
+            self.wal.truncate_before(slot + 1, promised)
+
+    def install_snapshot(self, snapshot: Snapshot, persist: bool = True):
+        """
+        Instala un snapshot (propio al reiniciar o recibido de otro nodo):
+        restaura la máquina de estados y salta los slots que cubre.
+
+        Args:
+            snapshot: Snapshot a instalar
+            persist: Si es True, lo guarda en disco (False al cargarlo de él)
+        """
+        with self.apply_lock:
+            if snapshot.slot <= self.last_applied:
+                return
+            self.state_machine.restore(snapshot.state())
+            self.last_applied = snapshot.slot
+            if self.snapshot_store and persist:
+                self.snapshot_store.save(snapshot)
+            self.snapshot = snapshot
+
+            with self.learner_lock:
+                self.first_unchosen_slot = max(self.first_unchosen_slot, snapshot.slot + 1)
+                while self.first_unchosen_slot in self.learned_log:
+                    self.first_unchosen_slot += 1
+            with self.acceptor_lock:
+                self.last_accepted_slot = max(self.last_accepted_slot, snapshot.slot)
+            with self.proposer_lock:
+                self.next_slot = max(self.next_slot, snapshot.slot + 1)
+            self._compact(snapshot.slot)
+            ready = self._ready_reads()
+
+        for future, result in ready:
+            future.set_result(result)
+
+        log_message("SUCCESS", f"Snapshot instalado hasta el slot {snapshot.slot}")
+        # Aplicar los slots posteriores que ya se habían aprendido
+        self._apply_committed()
+
+    def request_snapshot(self, peer_ip: str):
+        """Pide a otro nodo su último snapshot."""
+        with self.transfer_lock:
+            if self.snapshot_source == peer_ip:
+                return  # Ya hay una transferencia en curso con ese nodo
+            self.snapshot_source = peer_ip
+            self.snapshot_assembler = None
+        log_message("INFO", f"Pidiendo snapshot a {peer_ip}")
+        self._send_snapshot_request()
+
+    def _send_snapshot_request(self):
+        """Pide los chunks que faltan y programa el reintento."""
+        with self.transfer_lock:
+            if not self.snapshot_source:
+                return
+            peer_ip = self.snapshot_source
+            first_missing = self.snapshot_assembler.first_missing() if self.snapshot_assembler else 0
+            if self.snapshot_timer:
+                self.snapshot_timer.cancel()
+            self.snapshot_timer = self.network.call_later(
+                SNAPSHOT_TRANSFER_TIMEOUT, self._send_snapshot_request)
+
+        self.network.send_to(create_message(
+            msg_type=MessageType.SNAPSHOT_REQUEST,
+            proposal_num=0,
+            sender=self.local_ip,
+            chunk_index=first_missing
+        ), peer_ip)
+
+    def _handle_snapshot_request(self, message: Message, sender: str):
+        """Envía los chunks del último snapshot desde el índice pedido."""
+        snapshot = self.snapshot
+        if snapshot is None:
+            log_message("WARN", f"{sender} pidió un snapshot, pero no hay ninguno")
+            return
+
+        as_text = self.network.codec_for(sender) == CODEC_JSON
+        count = snapshot.chunk_count()
+        for index in range(message.get("chunk_index") or 0, count):
+            data = snapshot.chunk(index)
+            self.network.send_to(create_message(
+                msg_type=MessageType.SNAPSHOT_CHUNK,
+                proposal_num=0,
+                # JSON no admite bytes
+                value=base64.b64encode(data).decode("ascii") if as_text else data,
+                sender=self.local_ip,
+                snapshot_slot=snapshot.slot,
+                chunk_index=index,
+                chunk_count=count
+            ), sender)
+
+    def _handle_snapshot_chunk(self, message: Message, sender: str):
+        """Reúne un chunk recibido e instala el snapshot al completarlo."""
+        data = message.get("value")
+        if isinstance(data, str):
+            data = base64.b64decode(data)
+
+        with self.transfer_lock:
+            if sender != self.snapshot_source:
+                return
+            assembler = self.snapshot_assembler
+            if assembler is None or assembler.slot != message["snapshot_slot"]:
+                # Primer chunk, o el emisor tomó un snapshot más nuevo
+                assembler = SnapshotAssembler(message["snapshot_slot"], message["chunk_count"])
+                self.snapshot_assembler = assembler
+            if not assembler.add(message["chunk_index"], data):
+                return
+            self.snapshot_source = None
+            self.snapshot_assembler = None
+            if self.snapshot_timer:
+                self.snapshot_timer.cancel()
+                self.snapshot_timer = None
+
+        self.install_snapshot(assembler.snapshot())
 
     # =========================================================================
     # MANEJADOR DE MENSAJES
     # =========================================================================
 
-    def _handle_message(self, message: dict, sender: str):
+    @staticmethod
+    def _request_key(message: Message, sender: str) -> tuple:
+        """Identifica una petición para la supresión de duplicados."""
+        return (sender, message["type"], message.get("slot") or 0, message["proposal_num"])
+
+    def _handle_message(self, message: Message, sender: str):
         """
         Callback para procesar mensajes entrantes.
 
@@ -368,8 +1682,18 @@ class PaxosNode:
             message: Mensaje recibido
             sender: IP del remitente
         """
-        self.stats["messages_received"] += 1
         msg_type = message["type"]
+        self.peer_counters["messages_received"].inc(sender)
+
+        if msg_type in (MessageType.PREPARE, MessageType.ACCEPT, MessageType.FORWARD):
+            # Petición retransmitida: reenviar la respuesta guardada (o
+            # ignorarla si todavía se está procesando)
+            duplicate, reply = self.reply_cache.seen(self._request_key(message, sender))
+            if duplicate:
+                self.counters["duplicates_suppressed"].inc()
+                if reply is not None:
+                    self.network.send_to(reply, sender)
+                return
 
         if msg_type == MessageType.PREPARE:
             self._handle_prepare(message, sender)
@@ -377,35 +1701,99 @@ class PaxosNode:
         elif msg_type == MessageType.ACCEPT:
             self._handle_accept(message, sender)
 
-        elif msg_type in [MessageType.PROMISE, MessageType.ACCEPTED, MessageType.NACK]:
+        elif msg_type == MessageType.HEARTBEAT:
+            self._handle_heartbeat(message, sender)
+
+        elif msg_type == MessageType.FORWARD:
+            self._handle_forward(message, sender)
+
+        elif msg_type == MessageType.FORWARD_REPLY:
+            self._on_forward_reply(message.get("slot") or 0, message.get("value"), sender)
+
+        elif msg_type in [MessageType.PROMISE, MessageType.ACCEPTED, MessageType.NACK,
+                          MessageType.HEARTBEAT_ACK]:
             # Respuestas para el proposer
-            if self.response_collector:
-                self.response_collector.add_response(message, sender)
+            if msg_type == MessageType.NACK:
+                self.peer_counters["nacks"].inc(sender)
+            self._deliver_response(message, sender)
+            if msg_type == MessageType.ACCEPTED and self.learn_mode == "acceptors":
+                self._count_accepted(message, sender)
 
         elif msg_type == MessageType.LEARN:
-            # Notificación de valor aprendido
-            with self.learner_lock:
-                self.learned_value = message.get("value")
-                self.learned_proposal = message.get("proposal_num")
-            log_message("INFO", f"Valor aprendido: {self.learned_value}")
+            # Notificación de valores decididos
+            self._handle_learn(message, sender)
+
+        elif msg_type == MessageType.SNAPSHOT_REQUEST:
+            self._handle_snapshot_request(message, sender)
+
+        elif msg_type == MessageType.SNAPSHOT_CHUNK:
+            self._handle_snapshot_chunk(message, sender)
+
+        elif msg_type == MessageType.CATCHUP_REQUEST:
+            self._handle_catchup_request(message, sender)
+
+        elif msg_type == MessageType.CATCHUP_REPLY:
+            self._handle_catchup_reply(message, sender)
 
     # =========================================================================
     # MÉTODOS DE CONSULTA
     # =========================================================================
 
-    def get_status(self) -> dict:
-        """Retorna el estado actual del nodo."""
-        with self.acceptor_lock:
-            acceptor_state = {
-                "promised_proposal": self.promised_proposal,
-                "accepted_proposal": self.accepted_proposal,
-                "accepted_value": self.accepted_value
-            }
+    @property
+    def stats(self) -> dict:
+        """Totales de los contadores del nodo."""
+        stats = {name: counter.value for name, counter in self.counters.items()}
+        stats["retransmissions"] = self.peer_counters["retransmissions"].total()
+        stats["nacks_received"] = self.peer_counters["nacks"].total()
+        stats["messages_sent"] = self.network.messages_sent.total()
+        stats["messages_received"] = self.peer_counters["messages_received"].total()
+        return stats
+
+    def get_status(self, slot: Optional[int] = None) -> dict:
+        """
+        Retorna el estado actual del nodo.
+
+        Args:
+            slot: Slot del log a consultar. Por defecto, el último slot
+                aceptado por este acceptor.
+        """
+        # Lecturas sueltas de campos enteros: no hace falta acceptor_lock
+        if slot is None:
+            slot = self.last_accepted_slot
+        with self.slot_locks.slot(slot):
+            accepted_proposal = self.accepted_log.proposal(slot)
+            accepted_value = self.accepted_log.value(slot)
+        acceptor_state = {
+            "promised_proposal": self.promised_proposal,
+            "slot": slot,
+            "accepted_proposal": accepted_proposal,
+            "accepted_value": accepted_value,
+            "log_size": len(self.accepted_log)
+        }
 
         with self.learner_lock:
             learner_state = {
                 "learned_value": self.learned_value,
-                "learned_proposal": self.learned_proposal
+                "learned_proposal": self.learned_proposal,
+                "learned_slot": self.learned_slot,
+                "first_unchosen_slot": self.first_unchosen_slot,
+                "learn_mode": self.learn_mode,
+                "slot_decided": slot in self.learned_log,
+                "slot_value": self.learned_log.value(slot),
+                "last_applied": self.last_applied,
+                "snapshot_slot": self.snapshot.slot if self.snapshot else None
+            }
+
+        with self.proposer_lock:
+            proposer_state = {
+                "multi_paxos": self.multi_paxos,
+                "leader_ballot": self.leader_ballot,
+                "next_slot": self.next_slot,
+                "in_flight": self.in_flight,
+                "pending": len(self.pending_values),
+                "pipeline_window": self.pipeline_window,
+                "known_leader": self.known_leader,
+                "lease_remaining": max(self.lease_expiry - self.network.monotonic(), 0.0)
             }
 
         return {
@@ -413,12 +1801,14 @@ class PaxosNode:
             "node_id": self.node_id,
             "acceptor": acceptor_state,
             "learner": learner_state,
-            "stats": self.stats.copy()
+            "proposer": proposer_state,
+            "stats": self.stats,
+            "rtt": self.rtt.stats()
         }
 
-    def print_status(self):
+    def print_status(self, slot: Optional[int] = None):
         """Imprime el estado actual del nodo de forma legible."""
-        status = self.get_status()
+        status = self.get_status(slot)
 
         print(f"\n{Colors.HEADER}{'='*60}{Colors.RESET}")
         print(f"{Colors.HEADER}ESTADO DEL NODO PAXOS{Colors.RESET}")
@@ -431,9 +1821,11 @@ class PaxosNode:
         print(f"\n{Colors.BOLD}Estado Acceptor:{Colors.RESET}")
         print(
             f"  Propuesta prometida: {status['acceptor']['promised_proposal']}")
+        print(f"  Slot consultado:     {status['acceptor']['slot']}")
         print(
             f"  Propuesta aceptada:  {status['acceptor']['accepted_proposal']}")
         print(f"  Valor aceptado:      {status['acceptor']['accepted_value']}")
+        print(f"  Slots en el log:     {status['acceptor']['log_size']}")
 
         print(f"\n{Colors.BOLD}Estado Learner:{Colors.RESET}")
         if status['learner']['learned_value']:
@@ -441,8 +1833,30 @@ class PaxosNode:
                 f"  {Colors.GREEN}Valor aprendido: {status['learner']['learned_value']}{Colors.RESET}")
             print(
                 f"  Propuesta #:     {status['learner']['learned_proposal']}")
+            print(f"  Slot:            {status['learner']['learned_slot']}")
         else:
             print(f"  {Colors.YELLOW}Aún no hay consenso{Colors.RESET}")
+        print(
+            f"  Primer slot sin decidir: {status['learner']['first_unchosen_slot']}")
+        print(f"  Último slot aplicado:    {status['learner']['last_applied']}")
+        print(f"  Aviso de decisiones:     {status['learner']['learn_mode']}")
+        snapshot_slot = status['learner']['snapshot_slot']
+        print(f"  Slot del snapshot:       {'-' if snapshot_slot is None else snapshot_slot}")
+
+        print(f"\n{Colors.BOLD}Estado Proposer:{Colors.RESET}")
+        print(f"  Multi-Paxos:     {status['proposer']['multi_paxos']}")
+        print(f"  Líder (prop #):  {status['proposer']['leader_ballot'] or '-'}")
+        print(f"  Líder conocido:  {status['proposer']['known_leader'] or '-'}")
+        print(f"  Siguiente slot:  {status['proposer']['next_slot']}")
+        print(
+            f"  En curso:        {status['proposer']['in_flight']}/{status['proposer']['pipeline_window']}"
+            f" (en cola: {status['proposer']['pending']})")
+        print(f"  Lease restante:  {status['proposer']['lease_remaining']:.2f} s")
+
+        print(f"\n{Colors.BOLD}RTT por nodo:{Colors.RESET}")
+        for peer, rtt in sorted(status['rtt'].items()):
+            srtt = '-' if rtt['srtt_ms'] is None else f"{rtt['srtt_ms']} ms"
+            print(f"  {peer}: SRTT {srtt}, RTTVAR {rtt['rttvar_ms']} ms, RTO {rtt['rto_ms']} ms")
 
         print(f"\n{Colors.BOLD}Estadísticas:{Colors.RESET}")
         for key, value in status['stats'].items():
@@ -0,0 +1,93 @@
+"""
+Estimación de RTT por Nodo
+Grupo 7 - Sistemas Distribuidos UTPL
+
+Los caminos de ZeroTier varían de 5 ms (directo) a 300 ms (retransmitido
+por un relay), así que un timeout fijo es a la vez demasiado largo para
+unos y demasiado corto para otros. Este módulo mide el RTT de cada nodo a
+partir de las respuestas PROMISE/ACCEPTED y deriva de él el intervalo de
+retransmisión (RTO) con el algoritmo de Jacobson/Karels (RFC 6298):
+
+    SRTT   <- (1 - 1/8) * SRTT + 1/8 * R
+    RTTVAR <- (1 - 1/4) * RTTVAR + 1/4 * |SRTT - R|
+    RTO    <- SRTT + 4 * RTTVAR
+"""
+
+import threading
+from typing import Iterable, Optional
+
+from config import RTO_INITIAL, RTO_MIN, RTO_MAX
+
+ALPHA = 1 / 8
+BETA = 1 / 4
+
+
+class RttEstimator:
+    """RTT suavizado, varianza y RTO de un nodo."""
+
+    __slots__ = ("srtt", "rttvar", "rto", "samples")
+
+    def __init__(self):
+        self.srtt: Optional[float] = None
+        self.rttvar: float = 0.0
+        self.rto: float = RTO_INITIAL
+        self.samples = 0
+
+    def sample(self, rtt: float):
+        """Incorpora una medición de RTT (segundos)."""
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = (1 - BETA) * self.rttvar + BETA * abs(self.srtt - rtt)
+            self.srtt = (1 - ALPHA) * self.srtt + ALPHA * rtt
+        self.rto = min(max(self.srtt + 4 * self.rttvar, RTO_MIN), RTO_MAX)
+        self.samples += 1
+
+
+class RttTable:
+    """Estimadores de RTT de todos los nodos (thread-safe)."""
+
+    def __init__(self):
+        self._peers: dict[str, RttEstimator] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, peer: str) -> RttEstimator:
+        estimator = self._peers.get(peer)
+        if estimator is None:
+            estimator = self._peers[peer] = RttEstimator()
+        return estimator
+
+    def sample(self, peer: str, rtt: float):
+        """Registra una medición de RTT de `peer`."""
+        with self._lock:
+            self._get(peer).sample(rtt)
+
+    def rto(self, peer: str) -> float:
+        """Intervalo de retransmisión actual para `peer`."""
+        with self._lock:
+            return self._get(peer).rto
+
+    def quorum_rto(self, peers: Iterable[str], count: int) -> float:
+        """
+        RTO del `count`-ésimo nodo más rápido: lo que tarda, en el caso
+        normal, reunir `count` respuestas de `peers`.
+        """
+        with self._lock:
+            rtos = sorted(self._get(peer).rto for peer in peers)
+        if not rtos:
+            return RTO_INITIAL
+        return rtos[min(max(count, 1), len(rtos)) - 1]
+
+    def stats(self) -> dict:
+        """SRTT, RTTVAR y RTO de cada nodo en milisegundos."""
+        with self._lock:
+            return {
+                peer: {
+                    "srtt_ms": round(e.srtt * 1000, 2) if e.srtt is not None else None,
+                    "rttvar_ms": round(e.rttvar * 1000, 2),
+                    "rto_ms": round(e.rto * 1000, 2),
+                    "samples": e.samples,
+                }
+                for peer, e in self._peers.items()
+            }
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+run_cluster.py - Lanza un cluster Paxos local, un proceso por nodo
+Grupo 7 - Sistemas Distribuidos UTPL
+
+Genera la membresía de N nodos en una IP (por defecto 127.0.0.1) con
+puertos consecutivos, la guarda en un archivo de cluster y arranca cada
+nodo con `run_paxos.py --cluster <archivo> --headless`. Permite medir con
+sockets UDP reales en una sola máquina, sin ZeroTier.
+
+Uso:
+    python run_cluster.py <N> [opciones]
+
+Ejemplos:
+    python run_cluster.py 5                          # puertos 5001-5005
+    python run_cluster.py 3 --interactive            # el nodo 1 con el menú
+    python run_cluster.py 7 --set batching=false --log-dir logs
+    python run_cluster.py 5 --duration 60 --cluster-file cluster5.json
+    python run_cluster.py 3 --metrics-base-port 9001   # métricas en 9001-9003
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Optional
+
+from config import METRICS_HOST, Colors, format_address
+
+RUN_PAXOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "run_paxos.py")
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_BASE_PORT = 5001
+STOP_TIMEOUT = 5.0  # Segundos de espera tras SIGTERM antes de matar un nodo
+
+
+def generate_members(count: int, host: str = DEFAULT_HOST,
+                     base_port: int = DEFAULT_BASE_PORT) -> list[str]:
+    """
+    Direcciones "IP:puerto" de `count` nodos con puertos consecutivos.
+
+    Cada nodo toma como node_id su posición en la membresía (ver
+    config.get_node_id).
+    """
+    if not 1 <= count <= 99:
+        raise ValueError("El cluster local admite de 1 a 99 nodos")
+    if base_port < 1 or base_port + count - 1 > 65535:
+        raise ValueError(f"Puertos fuera de rango: {base_port}-{base_port + count - 1}")
+    return [format_address(host, base_port + i) for i in range(count)]
+
+
+def write_cluster_file(path: str, members: list[str], options: Optional[dict] = None,
+                       log_level: Optional[str] = None):
+    """Guarda la membresía y las opciones de los nodos (ver run_paxos.load_cluster_file)."""
+    cluster = {"members": members, "options": options or {}, "log_level": log_level}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(cluster, f, indent=2)
+
+
+def parse_option(text: str) -> tuple[str, Any]:
+    """
+    Convierte "clave=valor" en una opción de PaxosNode. El valor se lee
+    como JSON (números, true/false, null) y, si no lo es, como texto.
+    """
+    key, separator, raw = text.partition("=")
+    if not separator or not key:
+        raise argparse.ArgumentTypeError(f"Opción inválida '{text}' (se espera clave=valor)")
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        value = raw
+    return key, value
+
+
+def launch_node(member: str, cluster_path: str, log_dir: Optional[str] = None,
+                interactive: bool = False, metrics_port: Optional[int] = None) -> subprocess.Popen:
+    """
+    Inicia un nodo en su propio proceso.
+
+    Un nodo interactivo comparte la terminal; los demás escriben en
+    `<log_dir>/<puerto>.log` (o en ninguna parte, sin log_dir). Con
+    `metrics_port`, el nodo publica sus métricas en ese puerto.
+    """
+    command = [sys.executable, RUN_PAXOS, member, "--cluster", cluster_path]
+    if metrics_port is not None:
+        command += ["--metrics-port", str(metrics_port)]
+    if interactive:
+        return subprocess.Popen(command)
+    command.append("--headless")
+    if log_dir:
+        port = member.rpartition(":")[2]
+        output = open(os.path.join(log_dir, f"{port}.log"), "w", encoding="utf-8")
+    else:
+        output = subprocess.DEVNULL
+    process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=output,
+                               stderr=subprocess.STDOUT)
+    if output is not subprocess.DEVNULL:
+        output.close()  # El proceso hijo conserva su copia
+    return process
+
+
+def launch_cluster(members: list[str], cluster_path: str, log_dir: Optional[str] = None,
+                   interactive: bool = False,
+                   metrics_base_port: Optional[int] = None) -> list[subprocess.Popen]:
+    """
+    Inicia todos los nodos; con `interactive`, el primero tiene el menú.
+    Con `metrics_base_port`, el nodo i publica sus métricas en ese puerto + i.
+    """
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+    metrics_ports = [None if metrics_base_port is None else metrics_base_port + i
+                     for i in range(len(members))]
+    # Los nodos sin menú primero, para que el interactivo los encuentre
+    first = 1 if interactive else 0
+    processes = [launch_node(member, cluster_path, log_dir, metrics_port=port)
+                 for member, port in zip(members[first:], metrics_ports[first:])]
+    if interactive:
+        processes.insert(0, launch_node(members[0], cluster_path, interactive=True,
+                                        metrics_port=metrics_ports[0]))
+    return processes
+
+
+def stop_cluster(processes: list[subprocess.Popen]):
+    """Detiene los nodos con SIGTERM y mata los que no terminen a tiempo."""
+    for process in processes:
+        if process.poll() is None:
+            process.terminate()
+    deadline = time.monotonic() + STOP_TIMEOUT
+    for process in processes:
+        try:
+            process.wait(timeout=max(deadline - time.monotonic(), 0.1))
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def main():
+    """Función principal."""
+    parser = argparse.ArgumentParser(
+        description="Lanza un cluster Paxos local con un proceso por nodo")
+    parser.add_argument("nodes", type=int, help="Cantidad de nodos (1-99)")
+    parser.add_argument("--host", default=DEFAULT_HOST,
+                        help=f"IP en la que escuchan los nodos (por defecto {DEFAULT_HOST})")
+    parser.add_argument("--base-port", type=int, default=DEFAULT_BASE_PORT,
+                        help=f"Puerto del primer nodo (por defecto {DEFAULT_BASE_PORT})")
+    parser.add_argument("--cluster-file",
+                        help="Dónde guardar la membresía generada (por defecto, un temporal)")
+    parser.add_argument("--set", dest="options", action="append", type=parse_option,
+                        default=[], metavar="CLAVE=VALOR",
+                        help="Opción de PaxosNode para todos los nodos (repetible)")
+    parser.add_argument("--log-level", default="WARN",
+                        help="Nivel mínimo de log de los nodos (por defecto WARN)")
+    parser.add_argument("--log-dir", help="Directorio para la salida de cada nodo")
+    parser.add_argument("--duration", type=float,
+                        help="Segundos que corre el cluster (por defecto, hasta Ctrl+C)")
+    parser.add_argument("--interactive", action="store_true",
+                        help="Ejecutar el primer nodo con el menú de run_paxos.py")
+    parser.add_argument("--metrics-base-port", type=int,
+                        help="Publicar las métricas de cada nodo desde este puerto TCP")
+    args = parser.parse_args()
+
+    try:
+        members = generate_members(args.nodes, args.host, args.base_port)
+    except ValueError as e:
+        parser.error(str(e))
+
+    cluster_path = args.cluster_file
+    if not cluster_path:
+        handle, cluster_path = tempfile.mkstemp(prefix="paxos-cluster-", suffix=".json")
+        os.close(handle)
+    write_cluster_file(cluster_path, members, dict(args.options), args.log_level)
+
+    print(f"{Colors.CYAN}Cluster local de {len(members)} nodos "
+          f"(quórum {len(members) // 2 + 1}){Colors.RESET}")
+    for index, member in enumerate(members):
+        metrics = "" if args.metrics_base_port is None else \
+            f"  (métricas: http://{METRICS_HOST}:{args.metrics_base_port + index}/metrics)"
+        print(f"  • {member}{metrics}")
+    print(f"Membresía: {cluster_path}")
+
+    processes = launch_cluster(members, cluster_path, args.log_dir, args.interactive,
+                               args.metrics_base_port)
+    try:
+        if args.interactive:
+            processes[0].wait()
+        else:
+            print(f"{Colors.GREEN}Nodos en ejecución. Ctrl+C para detenerlos.{Colors.RESET}")
+            deadline = time.monotonic() + args.duration if args.duration else None
+            while deadline is None or time.monotonic() < deadline:
+                time.sleep(0.5)
+                failed = [(member, process.returncode)
+                          for member, process in zip(members, processes)
+                          if process.poll() is not None]
+                if failed:
+                    for member, code in failed:
+                        print(f"{Colors.RED}El nodo {member} terminó (código {code}){Colors.RESET}")
+                    break
+    except KeyboardInterrupt:
+        print()
+    finally:
+        print(f"{Colors.CYAN}Deteniendo nodos...{Colors.RESET}")
+        stop_cluster(processes)
+        if not args.cluster_file:
+            os.remove(cluster_path)
+        print(f"{Colors.GREEN}✓ Cluster detenido{Colors.RESET}")
+
+
+if __name__ == "__main__":
+    main()
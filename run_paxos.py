@@ -5,18 +5,28 @@ Grupo 7 - Sistemas Distribuidos UTPL
 
 Uso:
     python run_paxos.py <ip_zerotier>
+    python run_paxos.py <ip[:puerto]> --cluster <archivo.json> [--headless]
+    python run_paxos.py <ip[:puerto]> ... --metrics-port <puerto>
     
 Ejemplos:
     python run_paxos.py 10.184.53.33   # Francisco
     python run_paxos.py 10.184.53.27   # Pablo
     python run_paxos.py 10.184.53.242  # Farith
+
+Con --cluster, la membresía (y opciones del nodo) se leen de un archivo
+generado por run_cluster.py en lugar de config.NODES; con --headless el
+nodo corre sin menú hasta recibir SIGTERM o Ctrl+C. Con --metrics-port,
+el nodo publica sus métricas en http://127.0.0.1:<puerto>/metrics.
 """
 
+import json
+import signal
 import sys
+import threading
 import time
 from datetime import datetime, timezone
 
-from config import NODES, Colors, log_message
+from config import NODES, Colors, configure_logging, log_message, parse_address
 from paxos_node import PaxosNode
 
 
@@ -58,11 +68,15 @@ def run_interactive(node: PaxosNode):
     """Ejecuta el modo interactivo del nodo Paxos."""
 
     print(f"\n{Colors.GREEN}✓ Nodo Paxos iniciado correctamente{Colors.RESET}")
+    port = parse_address(node.local_ip)[1]
     print(f"  IP Local: {node.local_ip}")
     print(f"  Node ID:  {node.node_id}")
-    print(f"  Puerto:   5000 (UDP)")
+    print(f"  Puerto:   {port} (UDP)")
+    if node.metrics_server:
+        host, metrics_port = node.metrics_server.address
+        print(f"  Métricas: http://{host}:{metrics_port}/metrics")
     print(f"\n{Colors.YELLOW}⚡ IMPORTANTE: Asegúrate de que Wireshark esté capturando{Colors.RESET}")
-    print(f"   Filtro recomendado: udp.port == 5000")
+    print(f"   Filtro recomendado: udp.port == {port}")
     print()
 
     while True:
@@ -84,7 +98,7 @@ def run_interactive(node: PaxosNode):
                 print(
                     f"\n{Colors.CYAN}[{get_utc_timestamp()}] Iniciando propuesta...{Colors.RESET}")
                 print(f"  Valor: '{value}'")
-                print(f"  Quórum requerido: 2/3 nodos")
+                print(f"  Quórum requerido: {node.quorum_size}/{len(node.members)} nodos")
                 print()
 
                 # Ejecutar propuesta
@@ -102,7 +116,8 @@ def run_interactive(node: PaxosNode):
                     print(
                         f"  {Colors.RED}✗ NO SE ALCANZÓ CONSENSO{Colors.RESET}")
                     print(f"  Posibles causas:")
-                    print(f"    - No hay suficientes nodos activos (necesita 2/3)")
+                    print(f"    - No hay suficientes nodos activos "
+                          f"(necesita {node.quorum_size}/{len(node.members)})")
                     print(f"    - Timeout en la comunicación")
                     print(f"    - Conflicto con otra propuesta")
 
@@ -166,42 +181,110 @@ def run_interactive(node: PaxosNode):
             print(f"{Colors.RED}Error: {e}{Colors.RESET}")
 
 
+def load_cluster_file(path: str) -> dict:
+    """
+    Lee un archivo de cluster generado por run_cluster.py:
+    {"members": [...], "options": {...}, "log_level": "..."}
+    """
+    with open(path, encoding="utf-8") as f:
+        cluster = json.load(f)
+    if not cluster.get("members"):
+        raise ValueError(f"El archivo {path} no define 'members'")
+    return cluster
+
+
+def run_headless(node: PaxosNode):
+    """Mantiene el nodo en ejecución, sin menú, hasta SIGTERM o Ctrl+C."""
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    print(f"Nodo {node.local_ip} en ejecución (ID: {node.node_id})", flush=True)
+    try:
+        while not stop.wait(1.0):
+            pass
+    except KeyboardInterrupt:
+        pass
+    # Contadores finales, en una línea JSON, para quien lanzó el nodo
+    print(json.dumps({"node": node.local_ip, "stats": node.stats}), flush=True)
+
+
 def main():
     """Función principal."""
-    print_banner()
+    args = sys.argv[1:]
+    headless = "--headless" in args
+    if headless:
+        args.remove("--headless")
+    cluster_path = None
+    if "--cluster" in args:
+        index = args.index("--cluster")
+        cluster_path = args[index + 1] if index + 1 < len(args) else None
+        del args[index:index + 2]
+    metrics_port = None
+    if "--metrics-port" in args:
+        index = args.index("--metrics-port")
+        value = args[index + 1] if index + 1 < len(args) else ""
+        del args[index:index + 2]
+        if not value.isdigit():
+            print(f"{Colors.RED}Error: --metrics-port requiere un puerto{Colors.RESET}")
+            sys.exit(1)
+        metrics_port = int(value)
+
+    if not headless:
+        print_banner()
 
     # Verificar argumentos
-    if len(sys.argv) != 2:
+    if len(args) != 1 or ("--cluster" in sys.argv and not cluster_path):
         print(f"{Colors.RED}Error: Debes especificar tu IP de ZeroTier{Colors.RESET}")
         print(f"\nUso: python run_paxos.py <ip_zerotier>")
+        print(f"     python run_paxos.py <ip[:puerto]> --cluster <archivo.json> [--headless]")
+        print(f"     python run_paxos.py <ip[:puerto]> ... --metrics-port <puerto>")
         print_nodes_info()
         print("Ejemplo:")
         print("  python run_paxos.py 10.184.53.33")
         sys.exit(1)
 
-    local_ip = sys.argv[1]
+    local_ip = args[0]
+
+    # Membresía: config.NODES o el archivo de cluster
+    options = {}
+    if cluster_path:
+        cluster = load_cluster_file(cluster_path)
+        members = cluster["members"]
+        options = cluster.get("options", {})
+        if cluster.get("log_level"):
+            configure_logging(level=cluster["log_level"])
+        node_name = f"nodo {members.index(local_ip) + 1}" if local_ip in members else None
+    else:
+        members = list(NODES.values())
+        node_name = next((name for name, ip in NODES.items()
+                         if ip == local_ip), None)
 
     # Validar IP
-    valid_ips = list(NODES.values())
-    if local_ip not in valid_ips:
+    if local_ip not in members:
         print(
             f"{Colors.RED}Error: IP '{local_ip}' no está en la configuración{Colors.RESET}")
-        print_nodes_info()
+        if not cluster_path:
+            print_nodes_info()
         sys.exit(1)
 
     # Identificar nodo
-    node_name = next((name for name, ip in NODES.items()
-                     if ip == local_ip), "unknown")
-    print(
-        f"Iniciando como: {Colors.GREEN}{node_name.capitalize()}{Colors.RESET} ({local_ip})")
-    print()
+    if not headless:
+        print(
+            f"Iniciando como: {Colors.GREEN}{node_name.capitalize()}{Colors.RESET} ({local_ip})")
+        print()
 
     # Crear e iniciar nodo Paxos
     try:
-        print(f"{Colors.CYAN}Inicializando nodo Paxos...{Colors.RESET}")
-        node = PaxosNode(local_ip)
+        if not headless:
+            print(f"{Colors.CYAN}Inicializando nodo Paxos...{Colors.RESET}")
+        if metrics_port is not None:
+            options["metrics_port"] = metrics_port
+        node = PaxosNode(local_ip, members=members, **options)
         node.start()
 
+        if headless:
+            run_headless(node)
+            return
+
         # Dar tiempo para que el socket se estabilice
         time.sleep(0.5)
 
@@ -216,9 +299,11 @@ def main():
     finally:
         # Asegurar cierre limpio
         if 'node' in locals():
-            print(f"{Colors.CYAN}Deteniendo nodo...{Colors.RESET}")
+            if not headless:
+                print(f"{Colors.CYAN}Deteniendo nodo...{Colors.RESET}")
             node.stop()
-            print(f"{Colors.GREEN}✓ Nodo detenido correctamente{Colors.RESET}")
+            if not headless:
+                print(f"{Colors.GREEN}✓ Nodo detenido correctamente{Colors.RESET}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,362 @@
+"""
+Red Simulada en Memoria para Paxos
+Grupo 7 - Sistemas Distribuidos UTPL
+
+`SimulatedNetwork` reemplaza a los sockets UDP por una red en memoria con
+latencia, jitter, pérdidas, reordenamiento y particiones configurables.
+Los nodos se conectan a ella con `attach` (que se pasa a `PaxosNode` como
+`engine`) y comparten un reloj virtual: los datagramas en vuelo y los
+temporizadores de todos los nodos son eventos de un único heap, que se
+ejecutan en orden en el hilo que llama a `run`/`run_until`.
+
+El tiempo solo avanza de evento en evento, así que una prueba de varios
+segundos virtuales termina en lo que tarda en procesarse, y con la misma
+semilla se repite exactamente: la red usa su propio `random.Random` y
+siembra el módulo `random` que usan los nodos (back-off de elección).
+
+Como todo ocurre en un hilo, desde fuera de la simulación se deben usar
+las operaciones no bloqueantes del nodo (`submit`, `propose_async`,
+`read_async`) y luego avanzar el reloj hasta que terminen.
+"""
+
+import heapq
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Iterable, Optional
+
+from config import (
+    SIM_SEED, SIM_LATENCY, SIM_JITTER, SIM_LOSS, SIM_REORDER, SIM_REORDER_DELAY,
+    SIM_EPOCH, WIRE_CODEC, Message, configure_logging, log_message
+)
+from network import BaseNetwork, TimerHandle
+
+
+class LinkProfile:
+    """Comportamiento de un enlace (de un nodo a otro) de la red simulada."""
+
+    __slots__ = ("latency", "jitter", "loss", "reorder", "reorder_delay")
+
+    def __init__(self, latency: float = SIM_LATENCY, jitter: float = SIM_JITTER,
+                 loss: float = SIM_LOSS, reorder: float = SIM_REORDER,
+                 reorder_delay: float = SIM_REORDER_DELAY):
+        """
+        Args:
+            latency: Latencia de ida (segundos)
+            jitter: Retraso adicional máximo, uniforme (segundos)
+            loss: Probabilidad de perder un datagrama
+            reorder: Probabilidad de retrasar un datagrama hasta
+                `reorder_delay` más, de modo que lo adelanten otros
+            reorder_delay: Retraso adicional máximo al reordenar (segundos)
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.reorder = reorder
+        self.reorder_delay = reorder_delay
+
+
+class SimulatedNetwork:
+    """
+    Red en memoria con reloj virtual compartida por varios nodos.
+
+    Los eventos (entregas y temporizadores) se ejecutan en orden de
+    vencimiento; a igual vencimiento, en orden de programación.
+    """
+
+    def __init__(self, seed: int = SIM_SEED, profile: Optional[LinkProfile] = None,
+                 epoch: float = SIM_EPOCH):
+        """
+        Inicializa la red simulada.
+
+        Args:
+            seed: Semilla de la red y del módulo `random` de los nodos
+            profile: Enlace por defecto entre cada par de nodos
+            epoch: Hora (segundos desde epoch) con la que arranca el reloj
+        """
+        self.rng = random.Random(seed)
+        random.seed(seed)
+        self.now = 0.0  # Segundos virtuales desde el inicio
+        self.epoch = epoch
+        self.profile = profile or LinkProfile()
+        self.links: dict[tuple[str, str], LinkProfile] = {}
+        # Partición activa: IP -> grupo (los nodos no listados forman otro)
+        self.groups: Optional[dict[str, int]] = None
+        self.endpoints: dict[str, "SimulatedEndpoint"] = {}
+
+        self._heap: list = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "datagrams_sent": 0,
+            "datagrams_delivered": 0,
+            "datagrams_lost": 0,
+            "datagrams_partitioned": 0,
+            "bytes_sent": 0,
+            "events": 0,
+            "errors": 0
+        }
+
+    # =========================================================================
+    # NODOS Y TOPOLOGÍA
+    # =========================================================================
+
+    def attach(self, local_ip: str, message_handler: Callable[[Message, str], None],
+               codec: str = WIRE_CODEC, members: Optional[list[str]] = None) -> "SimulatedEndpoint":
+        """
+        Conecta un nodo a la red (misma firma que los constructores de los
+        motores de red, para usarse como `engine` de `PaxosNode`).
+        """
+        if local_ip in self.endpoints:
+            raise ValueError(f"La IP {local_ip} ya está conectada a la red simulada")
+        endpoint = SimulatedEndpoint(self, local_ip, message_handler, codec, members)
+        self.endpoints[local_ip] = endpoint
+        return endpoint
+
+    def set_link(self, src: str, dst: str, profile: LinkProfile, symmetric: bool = True):
+        """Cambia el comportamiento del enlace src -> dst (y dst -> src)."""
+        self.links[(src, dst)] = profile
+        if symmetric:
+            self.links[(dst, src)] = profile
+
+    def partition(self, *groups: Iterable[str]):
+        """
+        Divide la red: solo se comunican los nodos de un mismo grupo. Los
+        nodos que no aparecen en ningún grupo forman uno más entre ellos.
+        """
+        self.groups = {ip: index for index, group in enumerate(groups) for ip in group}
+
+    def heal(self):
+        """Elimina la partición activa."""
+        self.groups = None
+
+    def connected(self, src: str, dst: str) -> bool:
+        """Indica si la partición activa permite ir de src a dst."""
+        if self.groups is None:
+            return True
+        return self.groups.get(src, -1) == self.groups.get(dst, -1)
+
+    # =========================================================================
+    # RELOJ VIRTUAL Y EVENTOS
+    # =========================================================================
+
+    def _schedule(self, deadline: float, action: Callable, args: tuple):
+        with self._lock:
+            heapq.heappush(self._heap, (deadline, next(self._counter), action, args))
+
+    def call_later(self, delay: float, callback: Callable[[], None]) -> TimerHandle:
+        """Programa `callback` tras `delay` segundos virtuales."""
+        handle = TimerHandle(self.now + delay, callback)
+        self._schedule(handle.deadline, self._fire, (handle,))
+        return handle
+
+    @staticmethod
+    def _fire(handle: TimerHandle):
+        if not handle.cancelled:
+            handle.callback()
+
+    def transmit(self, src: str, dst: str, datagram: bytes):
+        """Pone un datagrama en vuelo aplicando el enlace src -> dst."""
+        self.stats["datagrams_sent"] += 1
+        self.stats["bytes_sent"] += len(datagram)
+        if not self.connected(src, dst):
+            self.stats["datagrams_partitioned"] += 1
+            return
+        link = self.links.get((src, dst), self.profile)
+        if link.loss and self.rng.random() < link.loss:
+            self.stats["datagrams_lost"] += 1
+            return
+        delay = link.latency
+        if link.jitter:
+            delay += self.rng.uniform(0.0, link.jitter)
+        if link.reorder and self.rng.random() < link.reorder:
+            delay += self.rng.uniform(0.0, link.reorder_delay)
+        self._schedule(self.now + delay, self._deliver, (src, dst, datagram))
+
+    def _deliver(self, src: str, dst: str, datagram: bytes):
+        # Una partición creada con el datagrama en vuelo también lo corta
+        endpoint = self.endpoints.get(dst)
+        if not self.connected(src, dst):
+            self.stats["datagrams_partitioned"] += 1
+        elif endpoint is None or not endpoint.running:
+            self.stats["datagrams_lost"] += 1
+        else:
+            self.stats["datagrams_delivered"] += 1
+            endpoint._process_datagram(datagram, src)
+
+    def step(self) -> bool:
+        """
+        Ejecuta el próximo evento, avanzando el reloj hasta él.
+
+        Returns:
+            False si no quedaba ningún evento
+        """
+        with self._lock:
+            if not self._heap:
+                return False
+            deadline, _, action, args = heapq.heappop(self._heap)
+        self.now = max(self.now, deadline)
+        self.stats["events"] += 1
+        try:
+            action(*args)
+        except Exception as e:
+            self.stats["errors"] += 1
+            log_message("ERROR", f"Error en evento simulado: {e}")
+        return True
+
+    def run(self, duration: float):
+        """Ejecuta los eventos de los próximos `duration` segundos virtuales."""
+        end = self.now + duration
+        while self._heap and self._heap[0][0] <= end:
+            self.step()
+        self.now = max(self.now, end)
+
+    def run_until(self, predicate: Callable[[], bool], timeout: float = 60.0) -> bool:
+        """
+        Ejecuta eventos hasta que `predicate()` sea verdadero o pasen
+        `timeout` segundos virtuales.
+
+        Returns:
+            El valor final de `predicate()`
+        """
+        end = self.now + timeout
+        while not predicate():
+            if not self._heap or self._heap[0][0] > end:
+                self.now = max(self.now, end)
+                break
+            self.step()
+        return predicate()
+
+
+class SimulatedEndpoint(BaseNetwork):
+    """
+    Motor de red de un nodo conectado a una `SimulatedNetwork`.
+
+    Al detenerlo (`stop`) deja de recibir y sus temporizadores pendientes
+    ya no se ejecutan, lo que simula la caída del nodo; `start` lo vuelve
+    a conectar.
+    """
+
+    def __init__(self, fabric: SimulatedNetwork, local_ip: str,
+                 message_handler: Callable[[Message, str], None],
+                 codec: str = WIRE_CODEC, members: Optional[list[str]] = None):
+        super().__init__(local_ip, message_handler, codec, members)
+        self.fabric = fabric
+        self.incarnation = 0  # Cambia en cada arranque: invalida temporizadores viejos
+
+    def start(self):
+        """Conecta el nodo a la red."""
+        self.running = True
+        self.incarnation += 1
+
+    def stop(self):
+        """Desconecta el nodo."""
+        self.running = False
+
+    def _sendto(self, datagram: bytes, target_ip: str):
+        if self.running:
+            self.fabric.transmit(self.local_ip, target_ip, datagram)
+
+    def call_later(self, delay: float, callback: Callable[[], None]) -> TimerHandle:
+        """Programa un temporizador en el reloj virtual."""
+        handle = TimerHandle(self.fabric.now + delay, callback)
+        self.fabric._schedule(handle.deadline, self._fire, (handle, self.incarnation))
+        return handle
+
+    def _fire(self, handle: TimerHandle, incarnation: int):
+        if self.running and incarnation == self.incarnation and not handle.cancelled:
+            handle.callback()
+
+    def monotonic(self) -> float:
+        return self.fabric.now
+
+    def time(self) -> float:
+        return self.fabric.epoch + self.fabric.now
+
+
+class SimulatedCluster:
+    """
+    Cluster de `size` nodos Paxos sobre una red simulada, en un solo proceso.
+
+    Los nodos usan las IPs 10.77.0.1 ... 10.77.0.<size>.
+    """
+
+    def __init__(self, size: int, network: Optional[SimulatedNetwork] = None,
+                 **node_options: Any):
+        """
+        Crea los nodos (sin iniciarlos).
+
+        Args:
+            size: Cantidad de nodos (1-99)
+            network: Red a usar (por defecto una nueva con SIM_SEED)
+            **node_options: Opciones adicionales para cada `PaxosNode`
+        """
+        from paxos_node import PaxosNode  # paxos_node importa los motores de red
+
+        if not 1 <= size <= 99:
+            raise ValueError("El cluster simulado admite de 1 a 99 nodos")
+        self.network = network or SimulatedNetwork()
+        self.ips = [f"10.77.0.{i + 1}" for i in range(size)]
+        node_options.setdefault("wal_dir", None)
+        node_options.setdefault("snapshot_dir", None)
+        self.nodes = [
+            PaxosNode(ip, engine=self.network.attach, members=self.ips, **node_options)
+            for ip in self.ips
+        ]
+
+    def start(self):
+        """Inicia todos los nodos."""
+        for node in self.nodes:
+            node.start()
+
+    def stop(self):
+        """Detiene todos los nodos."""
+        for node in self.nodes:
+            node.stop()
+
+    def leader(self) -> Optional[Any]:
+        """Nodo que ganó la última Fase 1 (None si no hay líder)."""
+        leaders = [node for node in self.nodes if node.leader_ballot]
+        return max(leaders, key=lambda node: node.leader_ballot) if leaders else None
+
+    def wait_for_leader(self, timeout: float = 10.0, settle: float = 1.0) -> Optional[Any]:
+        """
+        Avanza el reloj hasta que haya un líder, deja pasar `settle`
+        segundos para que las candidaturas simultáneas se resuelvan y
+        retorna el líder resultante.
+        """
+        self.network.run_until(lambda: self.leader() is not None, timeout)
+        self.network.run(settle)
+        self.network.run_until(lambda: self.leader() is not None, timeout)
+        return self.leader()
+
+    def submit(self, value: Any, index: int = 0) -> Future:
+        """Envía un valor a través del nodo `index`."""
+        return self.nodes[index].submit(value)
+
+    def wait(self, futures: list[Future], timeout: float = 60.0) -> bool:
+        """Avanza el reloj hasta que terminen todas las `futures`."""
+        return self.network.run_until(lambda: all(f.done() for f in futures), timeout)
+
+
+if __name__ == "__main__":
+    configure_logging(level="WARN")
+    print("Red simulada: 200 valores por cluster (latencia 5 ms, 1% de pérdida)")
+    for size in (3, 5, 7, 51):
+        network = SimulatedNetwork(profile=LinkProfile(loss=0.01))
+        cluster = SimulatedCluster(size, network)
+        cluster.start()
+        cluster.wait_for_leader()
+        started, wall = network.now, time.perf_counter()
+        futures = [cluster.submit(f"valor-{i}", i % size) for i in range(200)]
+        done = cluster.wait(futures)
+        virtual = network.now - started
+        wall = time.perf_counter() - wall
+        decided = sum(1 for f in futures if f.done() and f.result())
+        print(f"  {size:2d} nodos: {decided}/200 decididos en {virtual * 1000:.1f} ms "
+              f"virtuales ({wall:.2f} s reales), "
+              f"{network.stats['datagrams_sent']} datagramas")
+        cluster.stop()
@@ -0,0 +1,132 @@
+"""
+Snapshots del Estado Replicado
+Grupo 7 - Sistemas Distribuidos UTPL
+
+Un snapshot guarda el estado de la máquina de estados tras aplicar todos
+los slots hasta `slot` inclusive. Permite truncar el prefijo del log (y
+del WAL) y poner al día a un nodo rezagado transfiriendo el estado en
+fragmentos (chunks) en lugar de todo el historial.
+
+Formato en disco (`snapshot-<slot>.bin`, big-endian):
+
+    magic (4s) | slot (q) | crc32 (I) | estado (formato etiquetado de codec.py)
+"""
+
+import os
+import struct
+import zlib
+from typing import Any, Optional
+
+from codec import decode_value, encode_value
+from config import SNAPSHOT_CHUNK_SIZE, log_message
+
+SNAPSHOT_MAGIC = b"PXSN"
+SNAPSHOT_HEADER = struct.Struct("!4sqI")
+
+SNAPSHOT_PREFIX = "snapshot-"
+SNAPSHOT_SUFFIX = ".bin"
+
+
+class Snapshot:
+    """Estado aplicado hasta `slot` (inclusive), ya serializado."""
+
+    __slots__ = ("slot", "data")
+
+    def __init__(self, slot: int, data: bytes):
+        self.slot = slot
+        self.data = data  # Estado codificado con codec.encode_value
+
+    @classmethod
+    def from_state(cls, slot: int, state: Any) -> "Snapshot":
+        return cls(slot, encode_value(state))
+
+    def state(self) -> Any:
+        """Decodifica el estado de la máquina de estados."""
+        return decode_value(self.data)[0]
+
+    def chunk_count(self, chunk_size: int = SNAPSHOT_CHUNK_SIZE) -> int:
+        return max(1, (len(self.data) + chunk_size - 1) // chunk_size)
+
+    def chunk(self, index: int, chunk_size: int = SNAPSHOT_CHUNK_SIZE) -> bytes:
+        """Retorna el fragmento `index` para la transferencia."""
+        return self.data[index * chunk_size:(index + 1) * chunk_size]
+
+
+class SnapshotAssembler:
+    """Reúne los chunks de un snapshot recibido de otro nodo."""
+
+    def __init__(self, slot: int, chunk_count: int):
+        self.slot = slot
+        self.chunks: list[Optional[bytes]] = [None] * chunk_count
+        self.received = 0
+
+    def add(self, index: int, data: bytes) -> bool:
+        """Añade un chunk. Retorna True si el snapshot quedó completo."""
+        if 0 <= index < len(self.chunks) and self.chunks[index] is None:
+            self.chunks[index] = bytes(data)
+            self.received += 1
+        return self.complete()
+
+    def complete(self) -> bool:
+        return self.received == len(self.chunks)
+
+    def first_missing(self) -> int:
+        """Índice del primer chunk que falta."""
+        return next((i for i, c in enumerate(self.chunks) if c is None), len(self.chunks))
+
+    def snapshot(self) -> Snapshot:
+        return Snapshot(self.slot, b"".join(self.chunks))
+
+
+class SnapshotStore:
+    """Guarda y carga snapshots en disco (solo se conserva el último)."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, slot: int) -> str:
+        return os.path.join(self.directory, f"{SNAPSHOT_PREFIX}{slot:012d}{SNAPSHOT_SUFFIX}")
+
+    def save(self, snapshot: Snapshot):
+        """Escribe el snapshot de forma atómica y borra los anteriores."""
+        path = self._path(snapshot.slot)
+        tmp = path + ".tmp"
+        header = SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, snapshot.slot, zlib.crc32(snapshot.data))
+        with open(tmp, "wb") as f:
+            f.write(header)
+            f.write(snapshot.data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        if hasattr(os, "O_DIRECTORY"):
+            dir_fd = os.open(self.directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+        for name in os.listdir(self.directory):
+            other = os.path.join(self.directory, name)
+            if name.startswith(SNAPSHOT_PREFIX) and other != path:
+                os.remove(other)
+
+    def load_latest(self) -> Optional[Snapshot]:
+        """Carga el snapshot más reciente válido, o None si no hay."""
+        names = sorted(
+            (n for n in os.listdir(self.directory)
+             if n.startswith(SNAPSHOT_PREFIX) and n.endswith(SNAPSHOT_SUFFIX)),
+            reverse=True)
+        for name in names:
+            path = os.path.join(self.directory, name)
+            with open(path, "rb") as f:
+                raw = f.read()
+            if len(raw) < SNAPSHOT_HEADER.size:
+                continue
+            magic, slot, crc = SNAPSHOT_HEADER.unpack_from(raw, 0)
+            data = raw[SNAPSHOT_HEADER.size:]
+            if magic != SNAPSHOT_MAGIC or zlib.crc32(data) != crc:
+                log_message("WARN", f"Snapshot corrupto ignorado: {path}")
+                continue
+            return Snapshot(slot, data)
+        return None
@@ -0,0 +1,63 @@
+"""
+Máquina de Estados Replicada
+Grupo 7 - Sistemas Distribuidos UTPL
+
+Los valores decididos por Paxos se aplican, en orden de slot, a una
+máquina de estados. Su estado (y no el historial del log) es lo que se
+guarda en los snapshots y se transfiere a los nodos rezagados.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any
+
+
+class StateMachine(ABC):
+    """
+    Interfaz de la máquina de estados replicada.
+
+    `snapshot` debe retornar un valor serializable por `codec.encode_value`
+    (None, bool, int, float, str, bytes, list o dict).
+    """
+
+    @abstractmethod
+    def apply(self, value: Any):
+        """Aplica un valor de cliente decidido."""
+
+    @abstractmethod
+    def snapshot(self) -> Any:
+        """Retorna una copia serializable del estado."""
+
+    @abstractmethod
+    def restore(self, state: Any):
+        """Reemplaza el estado por el de un snapshot."""
+
+    @abstractmethod
+    def read(self, query: Any = None) -> Any:
+        """Responde una consulta de solo lectura sobre el estado."""
+
+
+class RegisterStateMachine(StateMachine):
+    """
+    Registro replicado: el estado es el último valor decidido.
+
+    Es la semántica original del proyecto (un valor acordado), ahora
+    aplicada sobre el log de valores.
+    """
+
+    def __init__(self):
+        self.value: Any = None
+        self.applied_count = 0
+
+    def apply(self, value: Any):
+        self.value = value
+        self.applied_count += 1
+
+    def snapshot(self) -> Any:
+        return {"value": self.value, "applied_count": self.applied_count}
+
+    def restore(self, state: Any):
+        self.value = state["value"]
+        self.applied_count = state["applied_count"]
+
+    def read(self, query: Any = None) -> Any:
+        return self.value
@@ -0,0 +1,310 @@
+"""
+Write-Ahead Log del Acceptor
+Grupo 7 - Sistemas Distribuidos UTPL
+
+Un acceptor que reinicia y olvida sus promesas puede romper la seguridad
+de Paxos. Este módulo guarda en disco cada promesa y cada aceptación antes
+de que el acceptor responda (PROMISE/ACCEPTED).
+
+Para que la durabilidad no cueste un fsync por mensaje se usa group commit:
+un hilo escritor toma todos los registros que llegaron durante una ventana
+corta, los escribe juntos y hace un único fsync; después invoca los
+callbacks que envían las respuestas. Si la escritura falla, el WAL queda
+fallido: los callbacks de ese lote y de los siguientes reciben
+`durable=False` y el acceptor no responde.
+
+Los segmentos (`wal-00000001.log`, ...) se preasignan con ceros y solo se
+escriben al final. Formato de registro (big-endian):
+
+    longitud del valor (I) | crc32 (I) | tipo (B) | slot (q) | propuesta (q)
+    | valor (formato etiquetado de codec.py)
+
+Un tipo 0 marca el final de los datos escritos en el segmento.
+"""
+
+import os
+import struct
+import threading
+import zlib
+from typing import Any, Callable, Iterator, Optional, Tuple
+
+from codec import decode_value, encode_value
+from config import WAL_SEGMENT_SIZE, WAL_GROUP_COMMIT_MS, log_message
+
+# Tipos de registro
+REC_PROMISE = 1  # Promesa: no aceptar propuestas menores desde `slot`
+REC_ACCEPT = 2   # Aceptación de (propuesta, valor) en `slot`
+
+RECORD_HEADER = struct.Struct("!IIBqq")
+
+SEGMENT_PREFIX = "wal-"
+SEGMENT_SUFFIX = ".log"
+
+_fsync = getattr(os, "fdatasync", os.fsync)
+
+
+def _segment_name(number: int) -> str:
+    return f"{SEGMENT_PREFIX}{number:08d}{SEGMENT_SUFFIX}"
+
+
+def _checksum(kind: int, slot: int, proposal: int, payload: bytes) -> int:
+    return zlib.crc32(payload, zlib.crc32(struct.pack("!Bqq", kind, slot, proposal)))
+
+
+class _Segment:
+    """Segmento abierto para escritura."""
+
+    __slots__ = ("number", "path", "fd", "offset", "max_slot")
+
+    def __init__(self, number: int, path: str, fd: int, offset: int, max_slot: int = -1):
+        self.number = number
+        self.path = path
+        self.fd = fd
+        self.offset = offset
+        self.max_slot = max_slot
+
+
+class WriteAheadLog:
+    """
+    Log de escritura anticipada con group commit.
+
+    Uso:
+        wal = WriteAheadLog("datos/wal")
+        for kind, slot, proposal, value in wal.replay():
+            ...  # reconstruir el estado
+        wal.start()
+        wal.append(REC_ACCEPT, slot, proposal, value, callback=responder)
+
+    `responder(durable)` recibe True si el registro llegó a disco.
+    """
+
+    def __init__(self, directory: str, segment_size: int = WAL_SEGMENT_SIZE,
+                 group_commit_ms: float = WAL_GROUP_COMMIT_MS):
+        """
+        Inicializa el WAL.
+
+        Args:
+            directory: Directorio de los segmentos (se crea si no existe)
+            segment_size: Tamaño preasignado de cada segmento (bytes)
+            group_commit_ms: Ventana para agrupar registros en un fsync
+        """
+        self.directory = directory
+        self.segment_size = segment_size
+        self.group_commit = group_commit_ms / 1000.0
+        os.makedirs(directory, exist_ok=True)
+
+        self._queue: list = []
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._segment: Optional[_Segment] = None
+        self._closed_segments: list[Tuple[int, int]] = []  # (número, slot máximo)
+        self.failed: Optional[OSError] = None  # Primer error de escritura
+
+        # Estadísticas
+        self.records_written = 0
+        self.fsyncs = 0
+
+    # =========================================================================
+    # RECUPERACIÓN
+    # =========================================================================
+
+    def _segment_numbers(self) -> list[int]:
+        numbers = []
+        for name in os.listdir(self.directory):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                try:
+                    numbers.append(int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]))
+                except ValueError:
+                    continue
+        return sorted(numbers)
+
+    def replay(self) -> Iterator[Tuple[int, int, int, Any]]:
+        """
+        Lee todos los registros válidos en orden.
+
+        Debe llamarse antes de `start`: deja el último segmento posicionado
+        tras el último registro válido para seguir escribiendo.
+
+        Yields:
+            (tipo, slot, propuesta, valor)
+        """
+        numbers = self._segment_numbers()
+        for number in numbers:
+            path = os.path.join(self.directory, _segment_name(number))
+            with open(path, "rb") as f:
+                data = f.read()
+
+            offset = 0
+            max_slot = -1
+            while offset + RECORD_HEADER.size <= len(data):
+                length, crc, kind, slot, proposal = RECORD_HEADER.unpack_from(data, offset)
+                if kind == 0:
+                    break
+                start = offset + RECORD_HEADER.size
+                payload = data[start:start + length]
+                if len(payload) != length or _checksum(kind, slot, proposal, payload) != crc:
+                    log_message("WARN", f"Registro incompleto en {path} (offset {offset}), se ignora el resto")
+                    break
+                value, _ = decode_value(payload) if length else (None, 0)
+                max_slot = max(max_slot, slot)
+                yield kind, slot, proposal, value
+                offset = start + length
+
+            if number == numbers[-1]:
+                self._segment = _Segment(number, path, os.open(path, os.O_RDWR), offset, max_slot)
+            else:
+                self._closed_segments.append((number, max_slot))
+
+    # =========================================================================
+    # ESCRITURA
+    # =========================================================================
+
+    def start(self):
+        """Abre el segmento actual e inicia el hilo escritor."""
+        if self._segment is None:
+            numbers = self._segment_numbers()
+            if numbers:
+                # replay() no se llamó: continuar en un segmento nuevo. Los
+                # existentes no se registran (no se sabe qué slots tienen),
+                # así que `truncate_before` nunca los borra
+                log_message("WARN", f"WAL iniciado sin replay(): se conservan "
+                                    f"{len(numbers)} segmentos existentes")
+            self._open_segment(numbers[-1] + 1 if numbers else 1)
+
+        with self._cond:
+            self._running = True
+        self._thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self._thread.start()
+        log_message("INFO", f"WAL activo en {self.directory}")
+
+    def stop(self):
+        """Escribe los registros pendientes y cierra el WAL."""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout=5.0)
+        if self._segment:
+            os.close(self._segment.fd)
+            self._segment = None
+
+    def append(self, kind: int, slot: int, proposal: int, value: Any = None,
+               callback: Optional[Callable[[bool], None]] = None):
+        """
+        Encola un registro. No bloquea.
+
+        Args:
+            kind: REC_PROMISE o REC_ACCEPT
+            slot: Slot del registro
+            proposal: Número de propuesta
+            value: Valor aceptado (solo REC_ACCEPT)
+            callback: Se invoca en el hilo escritor tras el fsync con
+                `durable=True`, o con `durable=False` si el WAL falló
+        """
+        payload = encode_value(value) if kind == REC_ACCEPT else b""
+        record = RECORD_HEADER.pack(len(payload), _checksum(kind, slot, proposal, payload),
+                                    kind, slot, proposal) + payload
+        with self._cond:
+            self._queue.append((record, slot, callback))
+            if len(self._queue) == 1:
+                self._cond.notify()
+
+    def pending(self) -> int:
+        """Registros encolados que aún no llegaron a disco (aproximado)."""
+        return len(self._queue)
+
+    def _writer_loop(self):
+        """Hilo escritor: agrupa registros, escribe, hace fsync y notifica."""
+        while True:
+            with self._cond:
+                while self._running and not self._queue:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                if self._running and self.group_commit > 0:
+                    # Ventana de group commit: dejar que lleguen más registros
+                    self._cond.wait(self.group_commit)
+                batch, self._queue = self._queue, []
+
+            durable = self.failed is None
+            if durable:
+                try:
+                    self._write_batch(batch)
+                except OSError as e:
+                    # El estado en memoria ya no coincide con el disco (y el
+                    # segmento puede tener un lote a medias): no se escribe más
+                    self.failed = e
+                    durable = False
+                    log_message("ERROR", f"Error escribiendo el WAL, se deja de responder: {e}")
+
+            for _, _, callback in batch:
+                if callback:
+                    try:
+                        callback(durable)
+                    except Exception as e:
+                        log_message("ERROR", f"Error tras escribir el WAL: {e}")
+
+    def _write_batch(self, batch: list):
+        """Escribe un lote de registros y lo hace durable con un fsync."""
+        data = b"".join(record for record, _, _ in batch)
+        max_slot = max(slot for _, slot, _ in batch)
+
+        segment = self._segment
+        if segment.offset + len(data) > self.segment_size and segment.offset > 0:
+            # El segmento actual está lleno: cerrarlo y pasar al siguiente
+            _fsync(segment.fd)
+            os.close(segment.fd)
+            self._closed_segments.append((segment.number, segment.max_slot))
+            segment = self._open_segment(segment.number + 1)
+
+        os.pwrite(segment.fd, data, segment.offset)
+        segment.offset += len(data)
+        segment.max_slot = max(segment.max_slot, max_slot)
+        _fsync(segment.fd)
+
+        self.records_written += len(batch)
+        self.fsyncs += 1
+
+    def _open_segment(self, number: int) -> _Segment:
+        """Crea y preasigna un segmento nuevo."""
+        path = os.path.join(self.directory, _segment_name(number))
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            os.posix_fallocate(fd, 0, self.segment_size)
+        except (AttributeError, OSError):
+            os.ftruncate(fd, self.segment_size)
+        # Hacer durable la entrada del directorio
+        if hasattr(os, "O_DIRECTORY"):
+            dir_fd = os.open(self.directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        self._segment = _Segment(number, path, fd, 0)
+        return self._segment
+
+    def truncate_before(self, slot: int, promised_proposal: int):
+        """
+        Borra los segmentos cerrados cuyos registros son todos de slots
+        anteriores a `slot` (ya incluidos en un snapshot durable).
+
+        Antes de borrar se escribe una promesa con `promised_proposal`,
+        para no perder la promesa más alta si estaba en un segmento borrado.
+        """
+        def delete_segments(durable: bool):
+            if not durable:
+                return
+            keep = []
+            for number, max_slot in self._closed_segments:
+                if max_slot < slot:
+                    try:
+                        os.remove(os.path.join(self.directory, _segment_name(number)))
+                    except OSError as e:
+                        log_message("WARN", f"No se pudo borrar el segmento {number} del WAL: {e}")
+                        keep.append((number, max_slot))
+                else:
+                    keep.append((number, max_slot))
+            self._closed_segments = keep
+
+        self.append(REC_PROMISE, slot, promised_proposal, callback=delete_segments)